@@ -0,0 +1,819 @@
+"""Module providing a bitboard board representation and move generator.
+
+The board keeps one 64-bit integer per piece code, with bit n set if a
+piece of that code stands on square n (a1 = 0, h1 = 7, a8 = 56). Moves use
+the same integer encoding as the move module, with array board squares, so
+moves, perft results and hashes can be compared directly with the array
+board, and move.int_to_string works for both.
+
+The board also keeps the same material and piece-square scores as the
+array board, and provides the null moves, repetition detection and staged
+move generation used by the search, so the engine runs on either board
+(see backend).
+"""
+
+import sys
+
+from chess_engine import (
+    board,
+    constants as cs,
+    eval_tables as et,
+    fen_parser as fp,
+    hashing as hsh,
+    move,
+    move_gen as mg,
+)
+
+FULL = (1 << 64) - 1
+BIT = tuple(1 << sq for sq in range(64))
+
+# conversions between bitboard squares and array board indices
+SQ88 = tuple(cs.A1 + ((sq >> 3) << 4) + (sq & 7) for sq in range(64))
+SQ64 = [-1 for _ in range(256)]
+
+for _sq, _pos in enumerate(SQ88):
+    SQ64[_pos] = _sq
+
+PAWN_CODES = (cs.WP, cs.BP)
+
+# the Zobrist numbers of the array board, indexed by bitboard square
+KEYS = [[row[pos] for pos in SQ88] for row in hsh.PIECE_KEYS]
+EP_KEYS = tuple(hsh.ARRAY[hsh.OFFS["en_passant"] + f] for f in range(8))
+SIDE_KEY = hsh.ARRAY[hsh.OFFS["black"]]
+
+# the castling rights kept when a piece moves from or to a square
+CASTLING_MASKS = [cs.CASTLING_MASKS[pos] for pos in SQ88]
+
+# the material plus piece-square value of each piece code on each square
+SCORES = [[row[pos] for pos in SQ88] for row in et.SQUARE_SCORES]
+
+NORTH, SOUTH, EAST, WEST = 8, -8, 1, -1
+NE, NW, SE, SW = 9, 7, -7, -9
+ROOK_DIRS = (NORTH, SOUTH, EAST, WEST)
+BISHOP_DIRS = (NE, NW, SE, SW)
+
+
+def _on_board(sq, step):
+    """Checks if a step from a square stays on the board without wrapping."""
+    dest = sq + step
+    return 0 <= dest < 64 and abs((dest & 7) - (sq & 7)) <= 2
+
+
+def _ray(sq, step):
+    """Returns the squares along a direction from a square, excluding it."""
+    mask = 0
+    while _on_board(sq, step):
+        sq += step
+        mask |= BIT[sq]
+    return mask
+
+
+# the squares along each direction from each square
+RAYS = {d: tuple(_ray(sq, d) for sq in range(64)) for d in ROOK_DIRS + BISHOP_DIRS}
+
+KNIGHT_ATTACKS = tuple(
+    sum(
+        BIT[sq + s]
+        for s in (17, 15, 10, 6, -6, -10, -15, -17)
+        if _on_board(sq, s)
+    )
+    for sq in range(64)
+)
+KING_ATTACKS = tuple(
+    sum(BIT[sq + s] for s in ROOK_DIRS + BISHOP_DIRS if _on_board(sq, s))
+    for sq in range(64)
+)
+# the squares a pawn of each colour attacks from each square
+PAWN_ATTACKS = (
+    tuple(sum(BIT[sq + s] for s in (NE, NW) if _on_board(sq, s)) for sq in range(64)),
+    tuple(sum(BIT[sq + s] for s in (SE, SW) if _on_board(sq, s)) for sq in range(64)),
+)
+
+# the squares strictly between two squares on a line, and the whole line
+# through them, or 0 if they are not on a line
+BETWEEN = [[0 for _ in range(64)] for _ in range(64)]
+LINE = [[0 for _ in range(64)] for _ in range(64)]
+
+for _sq in range(64):
+    for _d in ROOK_DIRS + BISHOP_DIRS:
+        _ray_mask = RAYS[_d][_sq]
+        _mask = _ray_mask
+        while _mask:
+            _dest = (_mask & -_mask).bit_length() - 1
+            _mask &= _mask - 1
+            BETWEEN[_sq][_dest] = _ray_mask & ~RAYS[_d][_dest] & ~BIT[_dest]
+            LINE[_sq][_dest] = _ray_mask | RAYS[-_d][_sq] | BIT[_sq]
+
+RANK_3, RANK_6 = 0xFF << 16, 0xFF << 40
+PROMOTION_RANKS = (0xFF << 56, 0xFF)
+
+# the promotion types generated by each stage, keyed by (captures, quiets)
+STAGE_PROMOTIONS = {
+    (True, True): move.PROMOTIONS,
+    (True, False): (cs.Q,),
+    (False, True): mg.UNDERPROMOTIONS,
+}
+
+# the start and destination squares of the rook for each castle move
+ROOK_SQUARES = {cs.KINGSIDE: (7, 5), cs.QUEENSIDE: (0, 3)}
+
+
+class BitBoard:
+    """A chessboard stored as one bitboard per piece.
+
+    Attributes:
+        pieces (list): 16 bitboards indexed by piece code (colour and type).
+        occupied (list): The bitboards of all white and all black pieces.
+        mailbox (list): The piece code on each of the 64 squares, or 0.
+        black (int): Indicates whether the side to move is black.
+        castling_rights (int): The castling rights, one bit each for
+            WK, WQ, BK and BQ.
+        ep_square (int): The bitboard square of an en passant capture
+            (which may not actually be possible), or -1.
+        halfmove_clock (int): The number of halfmoves since the last capture
+            or pawn advance.
+        fullmove_num (int): The number of the full moves. starts at 1.
+        scores (list): The material and piece-square scores of white and
+            black, equal to the scores of the same position on the array
+            board and kept up to date by the move making functions.
+        hash (int): The Zobrist hash of the position, equal to the hash of
+            the same position on the array board.
+        ply (int): The number of moves on the undo stack.
+        undo_move, undo_halfmove, undo_ep, undo_castling, undo_hash (list):
+            The undo stack, parallel preallocated lists indexed by ply holding
+            each move (0 for a null move) and the irreversible state from
+            before it. The captured and promoted pieces are read back from
+            the move itself. The moves and hashes of the array board are
+            copied, so repetitions of earlier positions are detected, but
+            moves made before the conversion cannot be unmade.
+    """
+
+    def __init__(self, bd=None):
+        bd = bd or board.Board()
+        self.pieces = [0 for _ in range(16)]
+        self.occupied = [0, 0]
+        self.mailbox = [0 for _ in range(64)]
+
+        for sq, pos in enumerate(SQ88):
+            piece = bd.array[pos] & 15
+            if piece:
+                self.pieces[piece] |= BIT[sq]
+                self.occupied[piece >> 3] |= BIT[sq]
+                self.mailbox[sq] = piece
+
+        self.black = bd.black
+        self.castling_rights = bd.castling_rights
+        self.ep_square = -1 if bd.ep_square == -1 else SQ64[bd.ep_square]
+        self.halfmove_clock = bd.halfmove_clock
+        self.fullmove_num = bd.fullmove_num
+        self.scores = bd.scores[:]
+        self.hash = bd.hash
+        self.ply = bd.ply
+        self.undo_move = bd.undo_move[:]
+        self.undo_halfmove = [0] * len(bd.undo_hash)
+        self.undo_ep = [0] * len(bd.undo_hash)
+        self.undo_castling = [0] * len(bd.undo_hash)
+        self.undo_hash = bd.undo_hash[:]
+
+    def __eq__(self, other):
+        return (
+            self.pieces == other.pieces
+            and self.black == other.black
+            and self.castling_rights == other.castling_rights
+            and self.ep_square == other.ep_square
+            and self.halfmove_clock == other.halfmove_clock
+            and self.fullmove_num == other.fullmove_num
+        )
+
+    @property
+    def check(self):
+        """The pieces giving check to the side to move, nonzero when in check."""
+        side = self.black
+        king_sq = self.pieces[cs.K | (side << 3)].bit_length() - 1
+        return attackers(self, king_sq, side ^ 1, self.occupied[0] | self.occupied[1])
+
+    is_repetition = board.Board.is_repetition
+
+    def save_state(self, mv):
+        """Pushes the board state prior to a move onto the undo stack.
+
+        Args:
+            mv (int): The move being made, or 0 for a null move.
+        """
+        ply = self.ply
+
+        if ply == len(self.undo_hash):
+            for stack in (
+                self.undo_move,
+                self.undo_halfmove,
+                self.undo_ep,
+                self.undo_castling,
+                self.undo_hash,
+            ):
+                stack.extend([0] * ply)
+
+        self.undo_move[ply] = mv
+        self.undo_halfmove[ply] = self.halfmove_clock
+        self.undo_ep[ply] = self.ep_square
+        self.undo_castling[ply] = self.castling_rights
+        self.undo_hash[ply] = self.hash
+        self.ply = ply + 1
+
+    def restore_state(self):
+        """Pops the board state prior to the last move off the undo stack."""
+        ply = self.ply - 1
+        self.ply = ply
+        self.halfmove_clock = self.undo_halfmove[ply]
+        self.ep_square = self.undo_ep[ply]
+        self.castling_rights = self.undo_castling[ply]
+        self.hash = self.undo_hash[ply]
+
+    def to_fen(self):
+        """Converts the board to a FEN string."""
+        arr = [cs.GD if square == cs.GD else 0 for square in cs.STARTING_ARRAY]
+
+        for sq, pos in enumerate(SQ88):
+            arr[pos] = self.mailbox[sq]
+
+        bd = board.Board(
+            arr,
+            self.black,
+            self.castling_rights,
+            -1 if self.ep_square == -1 else SQ88[self.ep_square],
+            self.halfmove_clock,
+            self.fullmove_num,
+        )
+        return bd.to_fen()
+
+
+def from_fen(fen_str):
+    """Converts a FEN string to a bitboard."""
+    return BitBoard(fp.fen_to_board(fen_str))
+
+
+def backend(bd):
+    """Returns the modules providing move making and generation for a board.
+
+    Args:
+        bd (Board | BitBoard): The board to make and generate moves for.
+
+    Returns:
+        tuple: The module with make_move, unmake_move, make_null_move and
+            unmake_null_move, and the module with all_moves, all_captures,
+            all_quiets and castle_moves.
+    """
+    if isinstance(bd, BitBoard):
+        module = sys.modules[__name__]
+        return module, module
+    return move, mg
+
+
+def rook_attacks(sq, occ):
+    """Returns the squares a rook on a square attacks given the occupied squares."""
+    attacks = 0
+
+    for d in (NORTH, EAST):  # the nearest blocker is the lowest set bit
+        ray = RAYS[d][sq]
+        blockers = ray & occ
+        if blockers:
+            ray ^= RAYS[d][(blockers & -blockers).bit_length() - 1]
+        attacks |= ray
+
+    for d in (SOUTH, WEST):  # the nearest blocker is the highest set bit
+        ray = RAYS[d][sq]
+        blockers = ray & occ
+        if blockers:
+            ray ^= RAYS[d][blockers.bit_length() - 1]
+        attacks |= ray
+
+    return attacks
+
+
+def bishop_attacks(sq, occ):
+    """Returns the squares a bishop on a square attacks given the occupied squares."""
+    attacks = 0
+
+    for d in (NE, NW):
+        ray = RAYS[d][sq]
+        blockers = ray & occ
+        if blockers:
+            ray ^= RAYS[d][(blockers & -blockers).bit_length() - 1]
+        attacks |= ray
+
+    for d in (SE, SW):
+        ray = RAYS[d][sq]
+        blockers = ray & occ
+        if blockers:
+            ray ^= RAYS[d][blockers.bit_length() - 1]
+        attacks |= ray
+
+    return attacks
+
+
+def queen_attacks(sq, occ):
+    """Returns the squares a queen on a square attacks given the occupied squares."""
+    return rook_attacks(sq, occ) | bishop_attacks(sq, occ)
+
+
+def attackers(bd, sq, side, occ):
+    """Returns the pieces of a side that attack a square.
+
+    Args:
+        bd (BitBoard): The board to check.
+        sq (int): The bitboard square to check.
+        side (int): The side whose attackers are returned.
+        occ (int): The occupied squares, which block sliding pieces.
+
+    Returns:
+        int: A bitboard of the attacking pieces.
+    """
+    pieces = bd.pieces
+    off = side << 3
+    queens = pieces[cs.Q | off]
+
+    return (
+        (KNIGHT_ATTACKS[sq] & pieces[cs.N | off])
+        | (KING_ATTACKS[sq] & pieces[cs.K | off])
+        | (PAWN_ATTACKS[side ^ 1][sq] & pieces[PAWN_CODES[side]])
+        | (rook_attacks(sq, occ) & (pieces[cs.R | off] | queens))
+        | (bishop_attacks(sq, occ) & (pieces[cs.B | off] | queens))
+    )
+
+
+def pinned_pieces(bd, king_sq):
+    """Returns the pieces of the side to move that are pinned to their king."""
+    pieces = bd.pieces
+    us = bd.occupied[bd.black]
+    them = bd.occupied[bd.black ^ 1]
+    off = (bd.black ^ 1) << 3
+    queens = pieces[cs.Q | off]
+
+    # enemy sliders that would attack the king if none of our pieces were there
+    snipers = (rook_attacks(king_sq, them) & (pieces[cs.R | off] | queens)) | (
+        bishop_attacks(king_sq, them) & (pieces[cs.B | off] | queens)
+    )
+    pinned = 0
+
+    while snipers:
+        sq = (snipers & -snipers).bit_length() - 1
+        snipers &= snipers - 1
+        blockers = BETWEEN[king_sq][sq] & us
+
+        if blockers and not blockers & (blockers - 1):
+            pinned |= blockers
+
+    return pinned
+
+
+def _add_moves(bd, start, dests, moves):
+    """Appends a move from a square to each square of a bitboard."""
+    mailbox = bd.mailbox
+    base = SQ88[start] | (mailbox[start] << move.PIECE_SHIFT)
+
+    while dests:
+        dest = (dests & -dests).bit_length() - 1
+        dests &= dests - 1
+        captured = mailbox[dest]
+
+        if captured:
+            moves.append(
+                base
+                | (SQ88[dest] << 8)
+                | (captured << move.CAPTURED_SHIFT)
+                | move.CAPTURE
+            )
+        else:
+            moves.append(base | (SQ88[dest] << 8))
+
+
+def _add_pawn_moves(bd, start, dests, moves, pr_types=move.PROMOTIONS):
+    """Appends a pawn move to each square of a bitboard, once per promotion type."""
+    if not dests & PROMOTION_RANKS[bd.black]:
+        _add_moves(bd, start, dests, moves)
+        return
+
+    promotions = []
+    _add_moves(bd, start, dests, promotions)
+
+    for mv in promotions:
+        for pr_type in pr_types:
+            moves.append(mv | (pr_type << move.PROMOTION_SHIFT))
+
+
+def _ep_legal(bd, start, king_sq, occ):
+    """Checks if an en passant capture leaves the king of the side to move safe."""
+    side = bd.black
+    cap_sq = bd.ep_square - 8 + 16 * side
+    pawns = PAWN_CODES[side ^ 1]
+
+    bd.pieces[pawns] ^= BIT[cap_sq]
+    occ ^= BIT[start] | BIT[cap_sq] | BIT[bd.ep_square]
+    safe = not attackers(bd, king_sq, side ^ 1, occ)
+    bd.pieces[pawns] ^= BIT[cap_sq]
+
+    return safe
+
+
+def gen_pawn_moves(bd, targets, pinned, king_sq, moves, captures=True, quiets=True):
+    """Appends the legal pawn moves of the side to move to a list.
+
+    Args:
+        bd (BitBoard): The board to generate moves for.
+        targets (int): The squares a piece may move to, which are restricted
+            to blocking or capturing the checker when in check.
+        pinned (int): The pieces pinned to the king.
+        king_sq (int): The square of the king of the side to move.
+        moves (list): The list to append moves to.
+        captures (bool, optional): Whether to generate the captures and
+            queen promotions. Defaults to True.
+        quiets (bool, optional): Whether to generate the quiet moves and
+            underpromotions. Defaults to True.
+    """
+    side = bd.black
+    pawns = bd.pieces[PAWN_CODES[side]]
+    occ = bd.occupied[0] | bd.occupied[1]
+    empty = ~occ & FULL
+    enemies = bd.occupied[side ^ 1] & targets
+    line = LINE[king_sq]
+    pr_types = STAGE_PROMOTIONS[captures, quiets]
+
+    if not captures:  # only the captures that underpromote
+        enemies &= PROMOTION_RANKS[side]
+
+    if side:
+        single = (pawns >> 8) & empty
+        double = ((single & RANK_6) >> 8) & empty & targets
+        single &= targets
+        step = 8
+    else:
+        single = (pawns << 8) & empty
+        double = ((single & RANK_3) << 8) & empty & targets
+        single &= targets
+        step = -8
+
+    if not quiets:  # only the pushes that promote to a queen
+        single &= PROMOTION_RANKS[side]
+        double = 0
+
+    for dests, back, flags in ((single, step, 0), (double, 2 * step, move.DOUBLE_PUSH)):
+        while dests:
+            dest = (dests & -dests).bit_length() - 1
+            dests &= dests - 1
+            start = dest + back
+
+            if not BIT[start] & pinned or line[start] & BIT[dest]:
+                if flags:
+                    moves.append(
+                        SQ88[start]
+                        | (SQ88[dest] << 8)
+                        | (PAWN_CODES[side] << move.PIECE_SHIFT)
+                        | flags
+                    )
+                else:
+                    _add_pawn_moves(bd, start, BIT[dest], moves, pr_types)
+
+    attacks = PAWN_ATTACKS[side]
+
+    while pawns:
+        start = (pawns & -pawns).bit_length() - 1
+        pawns &= pawns - 1
+        dests = attacks[start] & enemies
+
+        if BIT[start] & pinned:
+            dests &= line[start]
+
+        _add_pawn_moves(bd, start, dests, moves, pr_types)
+
+        ep = bd.ep_square
+        if (
+            captures
+            and ep != -1
+            and attacks[start] & BIT[ep]
+            and _ep_legal(bd, start, king_sq, occ)
+        ):
+            moves.append(
+                SQ88[start]
+                | (SQ88[ep] << 8)
+                | (PAWN_CODES[side] << move.PIECE_SHIFT)
+                | (PAWN_CODES[side ^ 1] << move.CAPTURED_SHIFT)
+                | move.CAPTURE
+                | move.EN_PASSANT
+            )
+
+
+def gen_piece_moves(bd, targets, pinned, king_sq, moves):
+    """Appends the legal knight, bishop, rook and queen moves to a list."""
+    pieces = bd.pieces
+    off = bd.black << 3
+    occ = bd.occupied[0] | bd.occupied[1]
+    line = LINE[king_sq]
+
+    knights = pieces[cs.N | off] & ~pinned  # a pinned knight can never move
+    while knights:
+        start = (knights & -knights).bit_length() - 1
+        knights &= knights - 1
+        _add_moves(bd, start, KNIGHT_ATTACKS[start] & targets, moves)
+
+    for p_type, attacks in (
+        (cs.B, bishop_attacks),
+        (cs.R, rook_attacks),
+        (cs.Q, queen_attacks),
+    ):
+        sliders = pieces[p_type | off]
+
+        while sliders:
+            start = (sliders & -sliders).bit_length() - 1
+            sliders &= sliders - 1
+            dests = attacks(start, occ) & targets
+
+            if BIT[start] & pinned:
+                dests &= line[start]
+
+            _add_moves(bd, start, dests, moves)
+
+
+def gen_king_moves(bd, king_sq, moves, targets=FULL):
+    """Appends the king moves to target squares that are not attacked to a list."""
+    side = bd.black
+    occ = (bd.occupied[0] | bd.occupied[1]) ^ BIT[king_sq]
+    dests = KING_ATTACKS[king_sq] & ~bd.occupied[side] & targets
+    safe = 0
+
+    while dests:
+        dest = (dests & -dests).bit_length() - 1
+        dests &= dests - 1
+
+        if not attackers(bd, dest, side ^ 1, occ):
+            safe |= BIT[dest]
+
+    _add_moves(bd, king_sq, safe, moves)
+
+
+def gen_castle_moves(bd, king_sq, moves):
+    """Appends the legal castle moves for the side to move to a list.
+
+    The king must not be in check when this is called.
+    """
+    side = bd.black
+    occ = bd.occupied[0] | bd.occupied[1]
+
+    for castling, right, empty, crossed in (
+        (cs.KINGSIDE, 0, (BIT[5] | BIT[6]), (5, 6)),
+        (cs.QUEENSIDE, 1, (BIT[1] | BIT[2] | BIT[3]), (3, 2)),
+    ):
+        if not (bd.castling_rights >> (2 * side + right)) & 1:
+            continue
+
+        rank = 56 * side
+        if occ & (empty << rank):
+            continue
+
+        if any(attackers(bd, rank + sq, side ^ 1, occ) for sq in crossed):
+            continue
+
+        moves.append(
+            move.encode(
+                SQ88[king_sq],
+                SQ88[rank + crossed[1]],
+                castling,
+                piece=cs.K | (side << 3),
+            )
+        )
+
+
+def all_moves(bd):
+    """Returns a list of all legal moves for the side to move.
+
+    Promotions are generated once for each piece that can be promoted to.
+    """
+    side = bd.black
+    king_sq = bd.pieces[cs.K | (side << 3)].bit_length() - 1
+    occ = bd.occupied[0] | bd.occupied[1]
+    checkers = attackers(bd, king_sq, side ^ 1, occ)
+    moves = []
+
+    if checkers & (checkers - 1):  # double check, only the king can move
+        gen_king_moves(bd, king_sq, moves)
+        return moves
+
+    if checkers:
+        checker_sq = checkers.bit_length() - 1
+        targets = checkers | BETWEEN[king_sq][checker_sq]
+    else:
+        targets = ~bd.occupied[side] & FULL
+
+    pinned = pinned_pieces(bd, king_sq)
+    gen_pawn_moves(bd, targets, pinned, king_sq, moves)
+    gen_piece_moves(bd, targets, pinned, king_sq, moves)
+    gen_king_moves(bd, king_sq, moves)
+
+    if not checkers:
+        gen_castle_moves(bd, king_sq, moves)
+
+    return moves
+
+
+def all_captures(bd):
+    """Returns a list of all legal captures and queen promotions.
+
+    If the side to move is in check, all moves that escape the check are
+    returned instead.
+    """
+    side = bd.black
+    king_sq = bd.pieces[cs.K | (side << 3)].bit_length() - 1
+
+    if bd.check:
+        return all_moves(bd)
+
+    enemies = bd.occupied[side ^ 1]
+    pinned = pinned_pieces(bd, king_sq)
+    moves = []
+    gen_pawn_moves(bd, FULL, pinned, king_sq, moves, quiets=False)
+    gen_piece_moves(bd, enemies, pinned, king_sq, moves)
+    gen_king_moves(bd, king_sq, moves, enemies)
+    return moves
+
+
+def all_quiets(bd):
+    """Returns a list of all legal quiet moves and underpromotions, except castling.
+
+    Together with all_captures and castle_moves, these are the moves of
+    all_moves. The side to move must not be in check.
+    """
+    side = bd.black
+    king_sq = bd.pieces[cs.K | (side << 3)].bit_length() - 1
+    empty = ~(bd.occupied[0] | bd.occupied[1]) & FULL
+    pinned = pinned_pieces(bd, king_sq)
+    moves = []
+    gen_pawn_moves(bd, FULL, pinned, king_sq, moves, captures=False)
+    gen_piece_moves(bd, empty, pinned, king_sq, moves)
+    gen_king_moves(bd, king_sq, moves, empty)
+    return moves
+
+
+def castle_moves(bd):
+    """Returns a list of the legal castle moves for the side to move, not in check."""
+    moves = []
+    gen_castle_moves(bd, bd.pieces[cs.K | (bd.black << 3)].bit_length() - 1, moves)
+    return moves
+
+
+def make_move(mv, bd):
+    """Carries out a legal move and updates the board state.
+
+    Args:
+        mv (int): An integer encoding the move information.
+        bd (BitBoard): The board to update.
+    """
+    start = SQ64[mv & 0xFF]
+    dest = SQ64[(mv >> 8) & 0xFF]
+    castling = (mv >> 16) & 3
+    pr_type = (mv >> move.PROMOTION_SHIFT) & 7
+    side = bd.black
+    pieces = bd.pieces
+    occupied = bd.occupied
+    mailbox = bd.mailbox
+
+    piece = (mv >> move.PIECE_SHIFT) & 15
+    captured = mailbox[dest]
+    ep_square = bd.ep_square
+
+    scores = bd.scores
+    bd.save_state(mv)
+
+    move_bits = BIT[start] | BIT[dest]
+    pieces[piece] ^= move_bits
+    occupied[side] ^= move_bits
+    mailbox[start] = 0
+    mailbox[dest] = piece
+    scores[side] += SCORES[piece][dest] - SCORES[piece][start]
+    b_hash = bd.hash ^ KEYS[piece][start] ^ KEYS[piece][dest]
+    bd.halfmove_clock += 1
+
+    if captured:
+        pieces[captured] ^= BIT[dest]
+        occupied[side ^ 1] ^= BIT[dest]
+        scores[side ^ 1] -= SCORES[captured][dest]
+        b_hash ^= KEYS[captured][dest]
+        bd.halfmove_clock = 0
+
+    if ep_square != -1:
+        b_hash ^= EP_KEYS[ep_square & 7]
+        bd.ep_square = -1
+
+    if piece == PAWN_CODES[side]:
+        bd.halfmove_clock = 0
+
+        if mv & move.EN_PASSANT:
+            cap_sq = dest - 8 + 16 * side
+            pawn = PAWN_CODES[side ^ 1]
+            pieces[pawn] ^= BIT[cap_sq]
+            occupied[side ^ 1] ^= BIT[cap_sq]
+            mailbox[cap_sq] = 0
+            scores[side ^ 1] -= SCORES[pawn][cap_sq]
+            b_hash ^= KEYS[pawn][cap_sq]
+        elif mv & move.DOUBLE_PUSH:
+            bd.ep_square = (start + dest) >> 1
+            b_hash ^= EP_KEYS[dest & 7]
+        elif pr_type:
+            new_piece = pr_type | (side << 3)
+            pieces[piece] ^= BIT[dest]
+            pieces[new_piece] |= BIT[dest]
+            mailbox[dest] = new_piece
+            scores[side] += SCORES[new_piece][dest] - SCORES[piece][dest]
+            b_hash ^= KEYS[piece][dest] ^ KEYS[new_piece][dest]
+
+    elif castling:
+        r_start, r_dest = (56 * side + sq for sq in ROOK_SQUARES[castling])
+        rook = cs.R | (side << 3)
+        rook_bits = BIT[r_start] | BIT[r_dest]
+        pieces[rook] ^= rook_bits
+        occupied[side] ^= rook_bits
+        mailbox[r_start] = 0
+        mailbox[r_dest] = rook
+        scores[side] += SCORES[rook][r_dest] - SCORES[rook][r_start]
+        b_hash ^= KEYS[rook][r_start] ^ KEYS[rook][r_dest]
+
+    rights = bd.castling_rights
+    bd.castling_rights &= CASTLING_MASKS[start] & CASTLING_MASKS[dest]
+    b_hash ^= hsh.CASTLING_KEYS[rights ^ bd.castling_rights]
+
+    bd.hash = b_hash ^ SIDE_KEY
+    bd.fullmove_num += side
+    bd.black ^= 1
+
+
+def unmake_move(mv, bd):
+    """Reverses a move and any changes to the board state."""
+    start = SQ64[mv & 0xFF]
+    dest = SQ64[(mv >> 8) & 0xFF]
+    castling = (mv >> 16) & 3
+    bd.restore_state()
+    captured = 0 if mv & move.EN_PASSANT else move.captured_piece(mv)
+    bd.black ^= 1
+    side = bd.black
+    bd.fullmove_num -= side
+    pieces = bd.pieces
+    occupied = bd.occupied
+    mailbox = bd.mailbox
+    scores = bd.scores
+    piece = mailbox[dest]
+    scores[side] -= SCORES[piece][dest]
+
+    if (mv >> move.PROMOTION_SHIFT) & 7:
+        pieces[piece] ^= BIT[dest]
+        piece = PAWN_CODES[side]
+        pieces[piece] |= BIT[dest]
+
+    move_bits = BIT[start] | BIT[dest]
+    pieces[piece] ^= move_bits
+    occupied[side] ^= move_bits
+    mailbox[start] = piece
+    mailbox[dest] = captured
+    scores[side] += SCORES[piece][start]
+
+    if captured:
+        pieces[captured] |= BIT[dest]
+        occupied[side ^ 1] |= BIT[dest]
+        scores[side ^ 1] += SCORES[captured][dest]
+    elif mv & move.EN_PASSANT:
+        cap_sq = dest - 8 + 16 * side
+        pawn = PAWN_CODES[side ^ 1]
+        pieces[pawn] |= BIT[cap_sq]
+        occupied[side ^ 1] |= BIT[cap_sq]
+        mailbox[cap_sq] = pawn
+        scores[side ^ 1] += SCORES[pawn][cap_sq]
+    elif castling:
+        r_start, r_dest = (56 * side + sq for sq in ROOK_SQUARES[castling])
+        rook = cs.R | (side << 3)
+        rook_bits = BIT[r_start] | BIT[r_dest]
+        pieces[rook] ^= rook_bits
+        occupied[side] ^= rook_bits
+        mailbox[r_dest] = 0
+        mailbox[r_start] = rook
+        scores[side] += SCORES[rook][r_start] - SCORES[rook][r_dest]
+
+
+def make_null_move(bd):
+    """Passes the turn to the other side without moving a piece.
+
+    Must not be called when the side to move is in check.
+    """
+    bd.save_state(0)
+    b_hash = bd.hash ^ SIDE_KEY
+
+    if bd.ep_square != -1:
+        b_hash ^= EP_KEYS[bd.ep_square & 7]
+        bd.ep_square = -1
+
+    bd.hash = b_hash
+    bd.halfmove_clock += 1
+    bd.fullmove_num += bd.black
+    bd.black ^= 1
+
+
+def unmake_null_move(bd):
+    """Reverses a null move."""
+    bd.black ^= 1
+    bd.fullmove_num -= bd.black
+    bd.restore_state()
@@ -1,6 +1,16 @@
 "Module providing the board class."
 
-from chess_engine import constants as cs, utils
+import struct
+
+from chess_engine import constants as cs, eval_tables as et, hashing as hsh, utils
+
+# initial number of plies the undo stack holds, doubled when it fills up
+UNDO_SIZE = 64
+
+# a packed position: the occupied squares as a bitboard, the piece code of
+# each occupied square in a nibble, side to move and castling rights,
+# en passant square + 1, halfmove clock and fullmove number
+PACKED_POSITION = struct.Struct("<Q16sBBHH2x")
 
 
 class Board:
@@ -10,8 +20,8 @@ class Board:
         array (list): An list of 256 integers consisting of the pieces on
             the board, plus off-board sentinel values and padding.
         black (int): Indicates whether the side to move is black.
-        castling_rights (list): a list storing the castling rights:
-            [WK, WQ, BK, BQ]
+        castling_rights (int): The castling rights, with one bit each for
+            WK, WQ, BK and BQ (see constants.CASTLE_WK etc.).
         ep_square (int): The target square index of an en passant capture
             (which may not actually be possible).
         halfmove_clock (int): The number of halfmoves since the last capture
@@ -22,13 +32,44 @@ class Board:
             3: double check
         checker (int): The position of a piece giving check, if in check.
         piece_list (list): Associates each piece with its position.
-        prev_state (list): A list of tuples containing irreversible state from
-            the previous moves:
-        (halfmove clock, ep square, castling rights, check, captured piece type)
+        hash (int): The Zobrist hash of the position, kept up to date by
+            the move making functions.
+        scores (list): The material and piece-square scores of white and
+            black, kept up to date by the move making functions.
+        ply (int): The number of moves on the undo stack.
+        undo_move, undo_halfmove, undo_ep, undo_castling, undo_check,
+        undo_checker, undo_hash, undo_captured (list): The undo stack, a set
+            of parallel preallocated lists indexed by ply which store the
+            irreversible state from before each move, so that no objects are
+            created when a move is made. undo_hash doubles as the history of
+            positions used to detect repetitions.
     """
 
     # pylint: disable=too-many-instance-attributes
-    # 10 attributes is reasonable here.
+    # 12 attributes plus one undo stack list per saved field is reasonable here.
+
+    __slots__ = (
+        "array",
+        "black",
+        "castling_rights",
+        "ep_square",
+        "halfmove_clock",
+        "fullmove_num",
+        "check",
+        "checker",
+        "piece_list",
+        "hash",
+        "scores",
+        "ply",
+        "undo_move",
+        "undo_halfmove",
+        "undo_ep",
+        "undo_castling",
+        "undo_check",
+        "undo_checker",
+        "undo_hash",
+        "undo_captured",
+    )
 
     def __init__(
         self,
@@ -43,14 +84,24 @@ class Board:
     ):
         self.array = arr or list(cs.STARTING_ARRAY)
         self.black = black
-        self.castling_rights = cr or [True, True, True, True]
+        self.castling_rights = cs.ALL_CASTLING if cr is None else cr
         self.ep_square = ep_sqr
         self.halfmove_clock = hm_clk
         self.fullmove_num = fm_num
         self.check = check
         self.checker = -1
-        self.prev_state = []
+        self.ply = 0
+        self.undo_move = [0] * UNDO_SIZE
+        self.undo_halfmove = [0] * UNDO_SIZE
+        self.undo_ep = [0] * UNDO_SIZE
+        self.undo_castling = [0] * UNDO_SIZE
+        self.undo_check = [0] * UNDO_SIZE
+        self.undo_checker = [0] * UNDO_SIZE
+        self.undo_hash = [0] * UNDO_SIZE
+        self.undo_captured = [0] * UNDO_SIZE
         self.piece_list = p_list or list(cs.STARTING_PIECE_LIST)
+        self.hash = hsh.zobrist_hash(self)
+        self.scores = et.board_scores(self.array)
 
     def __eq__(self, other):
         return (
@@ -140,9 +191,9 @@ class Board:
         result += "/".join(reversed(rows[:-1].split("/")))
         result += " b " if self.black else " w "
 
-        if any(self.castling_rights):
+        if self.castling_rights:
             for i, c in enumerate("KQkq"):
-                if self.castling_rights[i]:
+                if (self.castling_rights >> i) & 1:
                     result += c
             result += " "
         else:
@@ -152,30 +203,172 @@ class Board:
         result += " " + str(self.halfmove_clock)
         return result + " " + str(self.fullmove_num)
 
+    def copy(self):
+        """Returns an independent copy of the board, including its undo stack.
+
+        This is much faster than a round trip through to_fen and fen_to_board,
+        as nothing is parsed or recomputed.
+        """
+        other = Board.__new__(Board)
+        other.array = self.array[:]
+        other.black = self.black
+        other.castling_rights = self.castling_rights
+        other.ep_square = self.ep_square
+        other.halfmove_clock = self.halfmove_clock
+        other.fullmove_num = self.fullmove_num
+        other.check = self.check
+        other.checker = self.checker
+        other.piece_list = self.piece_list[:]
+        other.hash = self.hash
+        other.scores = self.scores[:]
+        other.ply = self.ply
+        other.undo_move = self.undo_move[:]
+        other.undo_halfmove = self.undo_halfmove[:]
+        other.undo_ep = self.undo_ep[:]
+        other.undo_castling = self.undo_castling[:]
+        other.undo_check = self.undo_check[:]
+        other.undo_checker = self.undo_checker[:]
+        other.undo_hash = self.undo_hash[:]
+        other.undo_captured = self.undo_captured[:]
+        return other
+
+    def pack(self):
+        """Packs the position into PACKED_POSITION.size (32) bytes.
+
+        The undo stack is not packed, so moves made before packing cannot
+        be unmade on the unpacked board.
+
+        Raises:
+            OverflowError: If there are more than 32 pieces on the board.
+        """
+        occupancy = 0
+        pieces = 0
+        shift = 0
+
+        for i, pos in enumerate(cs.SQUARES):
+            square = self.array[pos]
+            if square:
+                occupancy |= 1 << i
+                pieces |= (square & 15) << shift
+                shift += 4
+
+        return PACKED_POSITION.pack(
+            occupancy,
+            pieces.to_bytes(16, "little"),
+            self.black | (self.castling_rights << 1),
+            self.ep_square + 1,
+            self.halfmove_clock,
+            self.fullmove_num,
+        )
+
+    @staticmethod
+    def unpack(data, offset=0):
+        """Creates a board from a position packed by Board.pack.
+
+        Args:
+            data (bytes): A buffer holding the packed position, such as a
+                bytes object or a memory-mapped file.
+            offset (int, optional): The index in data of the first byte.
+
+        Returns:
+            Board: The unpacked board.
+        """
+        # fen_parser imports this module, so it is only imported when needed
+        # pylint: disable-next=import-outside-toplevel
+        from chess_engine import fen_parser as fp
+
+        occupancy, pieces, flags, ep, hm_clk, fm_num = PACKED_POSITION.unpack_from(
+            data, offset
+        )
+        pieces = int.from_bytes(pieces, "little")
+        arr = fp.EMPTY_ARRAY[:]
+        piece_dict = {piece: [] for piece in fp.PIECES}
+
+        while occupancy:
+            low = occupancy & -occupancy
+            pos = cs.SQUARES[low.bit_length() - 1]
+            arr[pos] = pieces & 15
+            piece_dict[pieces & 15].append(pos)
+            pieces >>= 4
+            occupancy ^= low
+
+        return fp.make_board(
+            arr, piece_dict, flags & 1, flags >> 1, ep - 1, hm_clk, fm_num
+        )
+
+    def is_repetition(self):
+        """Returns whether the position has occurred before.
+
+        Only positions since the last capture or pawn move can repeat, and
+        only those with the same side to move, so at most
+        halfmove_clock / 2 hashes on the undo stack are compared. Positions
+        from before a null move are not compared either, as the null move
+        is not a move of the game.
+        """
+        b_hash = self.hash
+        undo_move = self.undo_move
+        undo_hash = self.undo_hash
+        stop = max(self.ply - self.halfmove_clock, 0)
+
+        for i in range(self.ply - 1, stop - 1, -1):
+            if not undo_move[i]:  # a null move
+                stop = i + 1
+                break
+
+        for i in range(self.ply - 4, stop - 1, -2):
+            if undo_hash[i] == b_hash:
+                return True
+
+        return False
+
     def switch_side(self):
         """Changes the side to move on the board."""
         self.black ^= 1
 
-    def save_state(self, p_type, promotion):
-        """Saves board state prior to a move to the stack prev_state.
+    def save_state(self, mv, captured):
+        """Pushes the board state prior to a move onto the undo stack.
 
         Args:
-            p_type (int): The type of the captured piece.
-            promotion (bool): Whether the move was a promotion.
+            mv (int): The move being made, or 0 for a null move.
+            captured (int): The array value of the captured piece, if any.
         """
+        ply = self.ply
 
-        self.prev_state.append(
-            (
-                self.halfmove_clock,
-                self.ep_square,
-                list(self.castling_rights),
-                self.check,
-                self.checker,
-                p_type,
-                promotion,
-            )
-        )
+        if ply == len(self.undo_hash):
+            for stack in (
+                self.undo_move,
+                self.undo_halfmove,
+                self.undo_ep,
+                self.undo_castling,
+                self.undo_check,
+                self.undo_checker,
+                self.undo_hash,
+                self.undo_captured,
+            ):
+                stack.extend([0] * ply)
+
+        self.undo_move[ply] = mv
+        self.undo_halfmove[ply] = self.halfmove_clock
+        self.undo_ep[ply] = self.ep_square
+        self.undo_castling[ply] = self.castling_rights
+        self.undo_check[ply] = self.check
+        self.undo_checker[ply] = self.checker
+        self.undo_hash[ply] = self.hash
+        self.undo_captured[ply] = captured
+        self.ply = ply + 1
 
-    def get_prev_state(self):
-        """Returns the state saved prior to the most recent move."""
-        return self.prev_state.pop()
+    def restore_state(self):
+        """Pops the state saved prior to the most recent move.
+
+        Returns:
+            int: The array value of the piece captured by the move, if any.
+        """
+        ply = self.ply - 1
+        self.ply = ply
+        self.halfmove_clock = self.undo_halfmove[ply]
+        self.ep_square = self.undo_ep[ply]
+        self.castling_rights = self.undo_castling[ply]
+        self.check = self.undo_check[ply]
+        self.checker = self.undo_checker[ply]
+        self.hash = self.undo_hash[ply]
+        return self.undo_captured[ply]
@@ -56,6 +56,19 @@ SIDE_OFFSET = 16
 A1 = 0x44
 A8 = 0xB4
 
+# castling rights are stored as one bit each in a 4-bit integer
+CASTLE_WK, CASTLE_WQ, CASTLE_BK, CASTLE_BQ = 1, 2, 4, 8
+ALL_CASTLING = 15
+
+# the castling rights kept when a piece moves from or to each board index
+CASTLING_MASKS = [ALL_CASTLING for _ in range(256)]
+CASTLING_MASKS[A1] = ALL_CASTLING & ~CASTLE_WQ
+CASTLING_MASKS[A1 + 4] = ALL_CASTLING & ~(CASTLE_WK | CASTLE_WQ)
+CASTLING_MASKS[A1 + 7] = ALL_CASTLING & ~CASTLE_WK
+CASTLING_MASKS[A8] = ALL_CASTLING & ~CASTLE_BQ
+CASTLING_MASKS[A8 + 4] = ALL_CASTLING & ~(CASTLE_BK | CASTLE_BQ)
+CASTLING_MASKS[A8 + 7] = ALL_CASTLING & ~CASTLE_BK
+
 ICONS = ["\u2003", "\u2659", "\u2003", "\u2658", "\u2657", "\u2656", "\u2655",
          "\u2654", "\u2003", "\u2003", "\u265f", "\u265e", "\u265d", "\u265c", 
          "\u265b", "\u265a"]
@@ -113,3 +126,31 @@ for i in range(2, 8):
     for v in VALID_VECS[B]:
         MOVE_TABLE[0x77 + i * v] = DISTANT_MASKS[B] | DISTANT_MASKS[Q]
         UNIT_VEC[0x77 + i * v] = v
+
+# every square on the board
+SQUARES = tuple(
+    rank + file for rank in range(0x40, 0xC0, 0x10) for file in range(4, 12)
+)
+_ON_BOARD = set(SQUARES)
+
+# the squares along each direction from each square, nearest first,
+# stopping at the edge of the board
+RAYS = {v: [() for _ in range(256)] for v in VALID_VECS[Q]}
+
+for v, rays in RAYS.items():
+    for sqr in SQUARES:
+        ray = []
+        current = sqr + v
+        while current in _ON_BOARD:
+            ray.append(current)
+            current += v
+        rays[sqr] = tuple(ray)
+
+# the squares a knight or king can step to, and a pawn can capture on,
+# from each square
+STEPS = {p_type: [() for _ in range(256)] for p_type in (P, p, N, K)}
+
+for p_type, steps in STEPS.items():
+    vecs = VALID_VECS[p_type][1:] if p_type in PAWNS else VALID_VECS[p_type]
+    for sqr in SQUARES:
+        steps[sqr] = tuple(sqr + v for v in vecs if sqr + v in _ON_BOARD)
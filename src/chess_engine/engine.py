@@ -1,14 +1,15 @@
 "Module providing the chess engine implementation."
 
 import math
-import time
+import multiprocessing as mp
 
 from chess_engine import (
+    bitboard as bb,
     constants as cs,
-    eval_tables as et,
-    hashing as hsh,
+    limits as lm,
     move,
-    move_gen as mg,
+    move_order as mo,
+    transposition as tt,
 )
 
 
@@ -16,118 +17,659 @@ def evaluate(bd):
     """Returns the value of a certain position.
 
     Args:
-        bd (Board): The board to analyse.
+        bd (Board | BitBoard): The board to analyse.
 
     Returns:
         int: The relative score evaluated for the given board position.
     """
-    material_values = [0, 0]
-    i = 0x44
+    return bd.scores[bd.black] - bd.scores[bd.black ^ 1]
+
+
+MATE = 100000
+DRAW = 0
+INF = 2 * MATE
+MATE_BOUND = MATE - 1000  # scores beyond this are mates in a number of plies
+DELTA_MARGIN = 200  # the most a position can improve beyond the material won
+ASPIRATION_WINDOW = 50  # the initial half-width of the root search window
+ASPIRATION_DEPTH = 3  # the first depth searched with an aspiration window
+NULL_MOVE = "0000"  # the move string sent when there are no legal moves
+STOP_CHECK_NODES = 2048  # how often (in nodes) a search checks its limits
+NULL_MOVE_DEPTH = 3  # the least remaining depth at which a null move is tried
+NULL_MOVE_REDUCTION = 2  # the depth reduction of a null move search
+LMR_DEPTH = 3  # the least remaining depth at which late moves are reduced
+LMR_MOVES = 3  # the number of moves searched at full depth before reducing
+
+# the reduction of a late move, indexed by remaining depth and move number
+LMR_TABLE = [
+    [
+        int(0.75 + math.log(d) * math.log(m) / 2.25) if d and m else 0
+        for m in range(256)
+    ]
+    for d in range(64)
+]
+
+
+class SearchStopped(Exception):
+    """Raised to unwind a search that has been told to stop."""
+
+
+def score_to_tt(score, ply):
+    """Converts a mate score relative to the root into one relative to the node."""
+    if score > MATE_BOUND:
+        return score + ply
+    if score < -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def score_from_tt(score, ply):
+    """Converts a mate score relative to the node into one relative to the root."""
+    if score > MATE_BOUND:
+        return score - ply
+    if score < -MATE_BOUND:
+        return score + ply
+    return score
+
+
+def quiescence(bd, alpha, beta, info, ply):
+    """Searches captures until a quiet position is reached.
+
+    The side to move may stand pat on the static evaluation, unless in
+    check, in which case every evasion is searched. Captures that cannot
+    raise the score to alpha even with a margin are skipped.
 
-    while i < 0xBC:
-        square = bd.array[i]
+    Args:
+        bd (Board | BitBoard): The board to analyse.
+        alpha (int): The score below which any positions are discarded.
+        beta (int): The score above which any positions are discarded.
+        info (SearchInfo): The shared state of the search.
+        ply (int): The distance from the root of the search.
+
+    Returns:
+        int: The highest score found for the given position.
+    """
+    info.nodes += 1
 
-        if square == cs.GD:
-            i += 8
-            continue
+    if info.nodes >= info.next_poll:
+        info.poll()
 
-        if square:
-            square_val = et.P_SQUARE_VALS[square & 15][i]
-            material_values[bd.black] += square_val
+    if ply > info.seldepth:
+        info.seldepth = ply
 
-        i += 1
+    if ply >= mo.MAX_PLY - 1:
+        return evaluate(bd)
+
+    in_check = bd.check
+    stand_pat = 0
+
+    if not in_check:
+        stand_pat = evaluate(bd)
+
+        if stand_pat >= beta:
+            return beta
+        alpha = max(alpha, stand_pat)
 
-    if bd.black:
-        material = (material_values[1] - material_values[0]) * -1
-    else:
-        material = material_values[0] - material_values[1]
+    mover, gen = bb.backend(bd)
+    captures = []
+    for mv in gen.all_captures(bd):
+        captures.append((mo.mvv_lva(mv), mv))
+    captures.sort(reverse=True)
 
-    return material
+    found_move = False
+
+    for _, mv in captures:
+        if not in_check:
+            if stand_pat + mo.capture_value(mv) + DELTA_MARGIN <= alpha:
+                continue
+
+        mover.make_move(mv, bd)
+        found_move = True
+
+        try:
+            value = -quiescence(bd, -beta, -alpha, info, ply + 1)
+        finally:
+            mover.unmake_move(mv, bd)
+
+        if value >= beta:
+            return beta
+
+        alpha = max(alpha, value)
+
+    if in_check and not found_move:
+        return -MATE + ply
+
+    return alpha
 
 
-def search(bd, alpha, beta, depth, t_table=None):
+class SearchInfo:
+    """State shared by every node of a search.
+
+    Attributes:
+        t_table (TranspositionTable): Stores the best move, score and bound
+            type of visited positions.
+        orderer (MoveOrderer): The killer move and history tables.
+        nodes (int): The number of nodes visited.
+        seldepth (int): The greatest distance from the root reached,
+            including the quiescence search.
+        re_searches (int): The number of zero-window searches that failed
+            high and were repeated with the full window.
+        aspiration_fails (int): The number of root searches that fell
+            outside the aspiration window and were repeated.
+        null_move (bool): Whether null-move pruning is enabled.
+        lmr (bool): Whether late move reductions are enabled.
+        limits (SearchLimits): When the search must stop. Checked every
+            STOP_CHECK_NODES nodes, and at the node limit if there is one.
+        next_poll (int): The node count at which the limits are next checked.
+        shared_nodes (Value): In a helper process, receives the number of
+            nodes searched each time the limits are checked, or None.
+        helper_nodes (tuple): In the main process of a parallel search, the
+            shared node counts of the helper processes.
+        reporter: Receives progress updates, or None. Its iteration(bd,
+            info, depth, score) method is called after each completed
+            iteration and its current_move(bd, info, depth, mv, number)
+            method before each move is searched at the root.
+    """
+
+    def __init__(
+        self, t_table=None, limits=None, null_move=True, lmr=True, reporter=None
+    ):
+        self.t_table = t_table if t_table is not None else tt.TranspositionTable()
+        self.orderer = mo.MoveOrderer()
+        self.nodes = 0
+        self.seldepth = 0
+        self.re_searches = 0
+        self.aspiration_fails = 0
+        self.null_move = null_move
+        self.lmr = lmr
+        self.limits = limits if limits is not None else lm.SearchLimits()
+        self.reporter = reporter
+        self.next_poll = 0
+        self.shared_nodes = None
+        self.helper_nodes = ()
+
+    def new_search(self):
+        """Prepares the shared state for a search from a new position."""
+        self.t_table.new_search()
+        self.orderer.new_search()
+        self.nodes = 0
+        self.next_poll = 0
+        self.seldepth = 0
+        self.re_searches = 0
+        self.aspiration_fails = 0
+
+    def total_nodes(self):
+        """Returns the number of nodes searched by this and any helper processes.
+
+        The counts of the helpers are those they last published, which lag
+        behind by at most STOP_CHECK_NODES nodes each.
+        """
+        return self.nodes + sum(n.value for n in self.helper_nodes)
+
+    def poll(self):
+        """Checks the limits of the search and schedules the next check.
+
+        A helper process publishes its node count first, and the node limit
+        applies to the nodes of all processes. The next check is
+        STOP_CHECK_NODES nodes later, or sooner if the node limit would be
+        passed before then, so a node limit is exact in a single process.
+
+        Raises:
+            SearchStopped: If a limit has been reached.
+        """
+        if self.shared_nodes is not None:
+            self.shared_nodes.value = self.nodes
+
+        nodes = self.total_nodes()
+
+        if self.limits.stopped(nodes):
+            raise SearchStopped
+
+        interval = STOP_CHECK_NODES
+        if self.limits.nodes is not None:
+            interval = min(interval, self.limits.nodes - nodes)
+
+        self.next_poll = self.nodes + interval
+
+
+def has_pieces(bd):
+    """Checks whether the side to move has any pieces besides pawns and king."""
+    if isinstance(bd, bb.BitBoard):
+        off = bd.black << 3
+        return any(bd.pieces[p_type | off] for p_type in (cs.N, cs.B, cs.R, cs.Q))
+
+    off = cs.SIDE_OFFSET * bd.black
+
+    for pos in bd.piece_list[off : off + cs.SIDE_OFFSET]:
+        if pos != -1 and bd.array[pos] & 7 not in (cs.P, cs.p, cs.K):
+            return True
+
+    return False
+
+
+def search(bd, alpha, beta, depth, info=None, ply=0, allow_null=True):
     """Searches the game tree to a given depth to find the highest attainable score.
 
+    The first move is searched with the full window. The remaining moves are
+    searched with a zero window around alpha and only searched again with
+    the full window if they turn out to be better (principal variation search).
+
+    In zero-window nodes, the side to move first passes the turn. If a
+    reduced search still fails high, the node is pruned (null-move pruning).
+    This is skipped in check and when the side to move only has pawns,
+    where passing may be better than any move (zugzwang). Late quiet moves
+    are searched to a reduced depth, and searched again at full depth if
+    they fail high (late move reductions).
+
+    Below the root, a position that has occurred before scores as a draw,
+    which cuts off cycles of moves. At the last ply of the killer table,
+    the quiescence search is used whatever the remaining depth.
+
     Args:
-        bd (Board): The board to analyse.
+        bd (Board | BitBoard): The board to analyse.
         alpha (int): The score below which any positions are discarded.
         beta (int): The score above which any positions are discarded.
         depth (int): The depth to reach in the search tree.
-        t_table (dict, optional): A table that stores information about visited
-            positions in the following format:
-            board hash: (best move, score)
+        info (SearchInfo, optional): The transposition table, move ordering
+            tables and statistics of the search.
+        ply (int, optional): The distance from the root of the search.
+        allow_null (bool, optional): Whether a null move may be tried.
+            Defaults to True, and is False directly after a null move.
 
     Returns:
         int: The highest score found for the given position.
     """
-    if t_table is None:
-        t_table = {}
-
-    if depth == 0:
-        return evaluate(bd)
+    if info is None:
+        info = SearchInfo()
+
+    # a repeated position is a draw, as the side to move can repeat it again
+    if ply and bd.is_repetition():
+        return DRAW
+
+    if depth == 0 or ply >= mo.MAX_PLY - 1:
+        return quiescence(bd, alpha, beta, info, ply)
+
+    info.nodes += 1
+
+    if info.nodes >= info.next_poll:
+        info.poll()
+
+    if ply > info.seldepth:
+        info.seldepth = ply
+
+    b_hash = bd.hash
+    entry = info.t_table.probe(b_hash)
+    tt_move = 0
+
+    if entry is not None:
+        tt_move = entry[0]
+
+        if entry[2] >= depth:
+            score = score_from_tt(entry[1], ply)
+            flag = entry[3]
+
+            if flag == tt.EXACT:
+                return score
+            if flag == tt.LOWER and score >= beta:
+                return beta
+            if flag == tt.UPPER and score <= alpha:
+                return alpha
+
+    in_check = bd.check
+    mover, _ = bb.backend(bd)
+
+    if (
+        info.null_move
+        and allow_null
+        and not in_check
+        and depth >= NULL_MOVE_DEPTH
+        and beta - alpha == 1
+        and abs(beta) < MATE_BOUND
+        and has_pieces(bd)
+        and evaluate(bd) >= beta
+    ):
+        mover.make_null_move(bd)
+        try:
+            value = -search(
+                bd,
+                -beta,
+                -beta + 1,
+                depth - 1 - NULL_MOVE_REDUCTION,
+                info=info,
+                ply=ply + 1,
+                allow_null=False,
+            )
+        finally:
+            mover.unmake_null_move(bd)
 
-    b_hash = hsh.zobrist_hash(bd)
-
-    for key, _ in t_table.items():
-        if b_hash == key:
-            return t_table[b_hash][1]
-
-    value = -math.inf
+        if value >= beta:
+            return beta
 
-    moves = mg.all_moves(bd)
     best_move = 0
     found_move = False
-
-    for mv in moves:
-        result = move.make_move(mv, bd)
-        if result == -1:
-            continue
-        found_move = True
-
-        value = max(value, -search(bd, -beta, -alpha, depth - 1, t_table=t_table))
+    n_moves = 0
+    killers = info.orderer.killers[ply]
+    can_reduce = info.lmr and depth >= LMR_DEPTH and not in_check
+
+    for mv in info.orderer.order(bd, tt_move, ply):
+        reduction = 0
+
+        if can_reduce and n_moves >= LMR_MOVES and mv not in killers:
+            if not mo.capture_value(mv):
+                reduction = min(LMR_TABLE[min(depth, 63)][n_moves], depth - 2)
+
+        if not ply and info.reporter is not None:
+            info.reporter.current_move(bd, info, depth, mv, n_moves + 1)
+
+        mover.make_move(mv, bd)
+        n_moves += 1
+
+        if bd.check:  # moves that give check are not reduced
+            reduction = 0
+
+        try:
+            if not found_move:
+                value = -search(bd, -beta, -alpha, depth - 1, info=info, ply=ply + 1)
+                found_move = True
+            else:
+                reduced_depth = depth - 1 - reduction
+                value = -search(
+                    bd, -alpha - 1, -alpha, reduced_depth, info=info, ply=ply + 1
+                )
+
+                if value > alpha and reduced_depth < depth - 1:
+                    info.re_searches += 1
+                    value = -search(
+                        bd, -alpha - 1, -alpha, depth - 1, info=info, ply=ply + 1
+                    )
+
+                if alpha < value < beta:
+                    info.re_searches += 1
+                    value = -search(
+                        bd, -beta, -alpha, depth - 1, info=info, ply=ply + 1
+                    )
+        finally:
+            mover.unmake_move(mv, bd)
 
         if value >= beta:
-            move.unmake_move(mv, bd)
-            t_table[b_hash] = (mv, value)
+            info.orderer.record_cutoff(bd, mv, depth, ply)
+            info.t_table.store(b_hash, mv, score_to_tt(beta, ply), depth, tt.LOWER)
             return beta  # fail-high node
 
         if value > alpha:
             best_move = mv
             alpha = value
 
-        move.unmake_move(mv, bd)
+    if not found_move:
+        value = -MATE + ply if bd.check else DRAW
+        info.t_table.store(b_hash, 0, score_to_tt(value, ply), depth, tt.EXACT)
+        return value
 
-    if not (found_move or bd.check):
-        value = 0
-
-    t_table[b_hash] = (best_move, value)
+    flag = tt.EXACT if best_move else tt.UPPER
+    info.t_table.store(b_hash, best_move, score_to_tt(alpha, ply), depth, flag)
     return alpha
 
 
-def find_move(bd, search_time, depth_lim=100, t_table=None):
-    """Performs a search and returns the move that led to the best score.
+def aspiration_search(bd, info, depth, prev_score):
+    """Searches the root with a narrow window around the previous score.
+
+    The window is widened on the side that failed until the score falls
+    inside it.
+
+    Args:
+        bd (Board | BitBoard): The board to analyse.
+        info (SearchInfo): The shared state of the search.
+        depth (int): The depth to search to.
+        prev_score (int): The score of the previous iteration.
+
+    Returns:
+        int: The score of the position.
+    """
+    if depth < ASPIRATION_DEPTH or abs(prev_score) > MATE_BOUND:
+        return search(bd, -INF, INF, depth, info=info)
+
+    delta = ASPIRATION_WINDOW
+    alpha, beta = prev_score - delta, prev_score + delta
+
+    while True:
+        score = search(bd, alpha, beta, depth, info=info)
+
+        if score <= alpha:
+            alpha = max(alpha - delta, -INF)
+        elif score >= beta:
+            beta = min(beta + delta, INF)
+        else:
+            return score
+
+        info.aspiration_fails += 1
+        delta *= 2
+
+
+def principal_variation(bd, t_table, max_len):
+    """Follows the best moves stored in the table from the current position.
+
+    Args:
+        bd (Board | BitBoard): The board at the root of the variation.
+        t_table (TranspositionTable): The table of the search.
+        max_len (int): The greatest number of moves to return.
+
+    Returns:
+        list: The move strings of the variation, which ends early if a
+            position is missing from the table or is repeated.
+    """
+    mover, gen = bb.backend(bd)
+    moves = []
+    pv = []
+    seen = set()
+
+    while len(pv) < max_len and bd.hash not in seen:
+        seen.add(bd.hash)
+        entry = t_table.probe(bd.hash)
+
+        if entry is None or entry[0] not in gen.all_moves(bd):
+            break
+
+        mv = entry[0]
+        pv.append(move.int_to_string(mv))
+        mover.make_move(mv, bd)
+        moves.append(mv)
+
+    for mv in reversed(moves):
+        mover.unmake_move(mv, bd)
+
+    return pv
+
+
+def first_legal_move(bd):
+    """Returns any legal move in the position, or 0 if there are none."""
+    _, gen = bb.backend(bd)
+    moves = gen.all_moves(bd)
+    return moves[0] if moves else 0
+
+
+def iterative_deepening(bd, info, start_depth=1):
+    """Searches to increasing depths until a limit of the search is reached.
+
+    No new iteration is started once the soft time limit has passed. An
+    iteration that reaches a hard limit is abandoned, leaving the board as
+    it was.
 
     Args:
-        bd (Board): The board to analyse.
-        search_time (int): The time the engine will spend on this search.
-        depth_lim (int, optional): The maximum depth to search to. Defaults to 100.
-        t_table (dict, optional): A table that stores information about visited
-            positions in the following format:
-            board hash: (best move, score)
+        bd (Board | BitBoard): The board to analyse.
+        info (SearchInfo): The shared state of the search. Its limits are
+            measured from the start of this call.
+        start_depth (int, optional): The first depth to search to. Defaults to 1.
 
     Returns:
-        string: The move string of the best move found in the search.
+        int: The best move of the last completed iteration, or 0 if there
+            are no moves.
     """
-    start = time.time()
+    info.limits.start_clock()
+    best_move = 0
+    score = 0
+    i = start_depth
 
-    if t_table is None:
-        t_table = {}
+    while i == start_depth or info.limits.next_iteration(i, info.total_nodes()):
+        try:
+            score = aspiration_search(bd, info, i, score)
+        except SearchStopped:
+            break
 
-    board_hash = hsh.zobrist_hash(bd)
-    i = 0
+        entry = info.t_table.probe(bd.hash)
+        best_move = entry[0] if entry else 0
 
-    while time.time() - start < search_time and i <= depth_lim:
-        search(bd, -math.inf, math.inf, i, t_table=t_table)
+        if info.reporter is not None:
+            info.reporter.iteration(bd, info, i, score)
         i += 1
 
-    return move.int_to_string(bd, t_table[board_hash][0])
+        if i > info.limits.depth:
+            break
+
+    return best_move or first_legal_move(bd)
+
+
+def helper_search(bd, t_table_name, size_mb, age, start_depth, depth_lim, stop, nodes):
+    """Runs the search of a helper process in a lazy SMP search.
+
+    The helper searches its own copy of the board to increasing depths and
+    shares its results with the other processes through the transposition
+    table, until the stop event is set.
+
+    Args:
+        bd (Board | BitBoard): The board to analyse.
+        t_table_name (str): The name of the shared transposition table.
+        size_mb (int): The size of the shared transposition table.
+        age (int): The generation of the current search.
+        start_depth (int): The first depth to search to.
+        depth_lim (int): The maximum depth to search to.
+        stop (Event): Set when the helper should stop searching.
+        nodes (Value): Receives the number of nodes the helper has searched,
+            each time it checks whether to stop and when it finishes.
+    """
+    t_table = tt.SharedTranspositionTable(size_mb, name=t_table_name)
+    t_table.age = age
+    info = SearchInfo(t_table, lm.SearchLimits(depth=depth_lim, stop=stop))
+    info.shared_nodes = nodes
+
+    try:
+        iterative_deepening(bd, info, start_depth)
+    finally:
+        nodes.value = info.nodes
+        t_table.close()
+
+
+def parallel_search(bd, info, threads):
+    """Searches with helper processes that share the transposition table.
+
+    Helpers alternate between starting one and two plies deep, so that they
+    tend to search ahead of the main process and fill the table for it.
+    While the search runs, the node limit and the reporter see the nodes
+    of every process (see SearchInfo.total_nodes).
+
+    Args:
+        bd (Board | BitBoard): The board to analyse.
+        info (SearchInfo): The shared state of the main search. Its table
+            must be a SharedTranspositionTable.
+        threads (int): The total number of processes to search with.
+
+    Returns:
+        int: The best move found by the main search.
+    """
+    stop = mp.Event()
+    helper_nodes = [mp.Value("q", 0, lock=False) for _ in range(threads - 1)]
+    helpers = [
+        mp.Process(
+            target=helper_search,
+            args=(
+                bd,
+                info.t_table.name,
+                info.t_table.size_mb,
+                info.t_table.age,
+                2 - i % 2,
+                info.limits.depth,
+                stop,
+                helper_nodes[i],
+            ),
+            daemon=True,
+        )
+        for i in range(threads - 1)
+    ]
+
+    info.helper_nodes = helper_nodes
+
+    for helper in helpers:
+        helper.start()
+
+    try:
+        best_move = iterative_deepening(bd, info)
+    finally:
+        stop.set()
+        for helper in helpers:
+            helper.join()
+
+        info.nodes = info.total_nodes()
+        info.helper_nodes = ()
+
+    return best_move
+
+
+def find_move(
+    bd,
+    search_time=None,
+    depth_lim=100,
+    t_table=None,
+    threads=1,
+    limits=None,
+    reporter=None,
+):
+    """Performs a search and returns the move that led to the best score.
+
+    Args:
+        bd (Board | BitBoard): The board to analyse.
+        search_time (float, optional): The time in seconds the engine will
+            spend on this search. Ignored if limits are given.
+        depth_lim (int, optional): The maximum depth to search to. Defaults
+            to 100. Ignored if limits are given.
+        t_table (TranspositionTable, optional): A table that stores the
+            best move, score and bound type of visited positions. It is kept
+            between searches if provided.
+        threads (int, optional): The number of processes to search with.
+            Defaults to 1.
+        limits (SearchLimits, optional): When the search must stop.
+        reporter (optional): Receives progress updates from the main
+            search. See SearchInfo.
+
+    Raises:
+        ValueError: If more than one process is requested and the provided
+            table is not a SharedTranspositionTable.
+
+    Returns:
+        string: The move string of the best move found in the search, or
+            NULL_MOVE if there are no legal moves.
+    """
+    if limits is None:
+        limits = lm.SearchLimits(depth=depth_lim, movetime=search_time)
+
+    if threads > 1 and t_table is not None:
+        if not isinstance(t_table, tt.SharedTranspositionTable):
+            raise ValueError("A parallel search requires a shared table")
+
+    own_table = threads > 1 and t_table is None
+    if own_table:
+        t_table = tt.SharedTranspositionTable()
+
+    info = SearchInfo(t_table, limits, reporter=reporter)
+    info.new_search()
+
+    try:
+        if threads > 1:
+            best_move = parallel_search(bd, info, threads)
+        else:
+            best_move = iterative_deepening(bd, info)
+    finally:
+        if own_table:
+            t_table.close()
+
+    if not best_move:
+        return NULL_MOVE
+
+    return move.int_to_string(best_move)
@@ -135,3 +135,29 @@ P_SQUARE_VALS = {
 PIECE_VALS = { cs.B: 330, cs.K: 20000, cs.N: 320, cs.P: 100, cs.p: 100, cs.Q: 900, cs.R: 500 }
 
 # fmt: on
+
+# the material plus piece-square value of each piece code on each square
+SQUARE_SCORES = [[0 for _ in range(256)] for _ in range(16)]
+
+for _piece, _arr in P_SQUARE_VALS.items():
+    SQUARE_SCORES[_piece] = [PIECE_VALS[_piece & 7] + val for val in _arr]
+
+
+def board_scores(arr):
+    """Sums the material and piece-square values of each side.
+
+    Args:
+        arr (list): The board array.
+
+    Returns:
+        list: The total scores of white and black.
+    """
+    scores = [0, 0]
+
+    for i in cs.SQUARES:
+        square = arr[i]
+
+        if square:
+            scores[(square >> 3) & 1] += SQUARE_SCORES[square & 15][i]
+
+    return scores
@@ -5,28 +5,72 @@ import re
 
 from chess_engine import board, constants as cs, utils
 
+# fmt: off
+PIECES = (
+    cs.WP, cs.WN, cs.WB, cs.WR, cs.WQ, cs.WK,
+    cs.BP, cs.BN, cs.BB, cs.BR, cs.BQ, cs.BK
+)
+# fmt: on
+
+# the piece code of each letter and the number of empty squares of each digit
+# in the board field of a FEN string
+FEN_PIECES = {cs.LETTERS[piece]: piece for piece in PIECES}
+FEN_EMPTY = {str(n): n for n in range(1, 9)}
+
+FEN_REGEX = re.compile(
+    r"\s*^(((?:[rnbqkpRNBQKP1-8]+\/){7})[rnbqkpRNBQKP1-8]+)\s([b|w])\s(-|[K|Q|k|q]{1,4})\s(-|[a-h][1-8])\s(\d+\s\d+)$"
+)
+
+# the piece list offsets that each piece type is assigned to, in order
+PIECE_SLOTS = [(cs.WP, range(8, 16)), (cs.BP, range(24, 32))]
+
+for _side in (cs.WHITE, cs.BLACK):
+    _off = cs.SIDE_OFFSET * _side
+    PIECE_SLOTS += [
+        (cs.N | (_side << 3), (_off + 1, _off + 6)),
+        (cs.B | (_side << 3), (_off + 2, _off + 5)),
+        (cs.R | (_side << 3), (_off, _off + 7)),
+        (cs.Q | (_side << 3), (_off + 3,)),
+    ]
+
+# the promoted pieces that can fill each side's unused pawn offsets
+PROMOTED_SLOTS = [
+    (
+        [pc | (_side << 3) for pc in (cs.Q, cs.N, cs.R, cs.B)],
+        range(cs.SIDE_OFFSET * _side + 8, cs.SIDE_OFFSET * _side + 16),
+    )
+    for _side in (cs.WHITE, cs.BLACK)
+]
+
+# a board array with no pieces, only the border guards
+EMPTY_ARRAY = [0 for _ in range(256)]
+
+for _i in (0x20, 0x30, 0xC0, 0xD0):
+    EMPTY_ARRAY[_i + 2 : _i + 14] = [cs.GD for _ in range(12)]
+
+for _i in range(0x40, 0xC0, 0x10):
+    EMPTY_ARRAY[_i + 2 : _i + 4] = [cs.GD, cs.GD]
+    EMPTY_ARRAY[_i + 12 : _i + 14] = [cs.GD, cs.GD]
+
 
 def find_distant_checkers(bd, pos):
     """Finds all distant checkers of the king."""
     checkers = []
 
     for v in cs.VALID_VECS[cs.Q]:
-        current = pos + v
-        square = bd.array[current]
+        ray = cs.RAYS[v][pos]
 
-        if square == cs.GD:
+        if not ray:
             continue
 
+        square = bd.array[ray[0]]
+
         if square and (square >> 3) & 1 == bd.black:
             continue
 
-        while True:
-            current += v
+        for current in ray[1:]:
             square = bd.array[current]
 
-            if square == cs.GD:
-                break
-
             if square:
                 if (square >> 3) & 1 != bd.black and cs.MOVE_TABLE[
                     utils.square_diff(current, pos)
@@ -38,39 +82,26 @@ def find_distant_checkers(bd, pos):
 
 
 def get_board_array(bstr):
-    """Converts a board string to an array and piece dictionary."""
-    rows = "/".join(reversed(bstr.split("/")))
-
-    # fmt: off
-    pieces = (
-        cs.WP, cs.WN, cs.WB, cs.WR, cs.WQ, cs.WK,
-        cs.BP, cs.BN, cs.BB, cs.BR, cs.BQ, cs.BK
-    )
-    # fmt: on
-
-    piece_dict = {p: set() for p in pieces}
-    arr = [0 for _ in range(256)]
-
-    for i in (0x20, 0x30, 0xC0, 0xD0):
-        arr[i + 2 : i + 14] = [cs.GD for _ in range(12)]
-
-    for i in range(0x40, 0xC0, 0x10):
-        arr[i + 2 : i + 4] = [cs.GD, cs.GD]
-        arr[i + 12 : i + 14] = [cs.GD, cs.GD]
+    """Converts a board string to an array and piece dictionary.
 
+    The positions of each piece are listed in ascending order, as the ranks
+    are read from the first to the last.
+    """
+    piece_dict = {p: [] for p in PIECES}
+    arr = EMPTY_ARRAY[:]
     i = 0x44
 
-    for char in rows:
-        if char == "/":
-            i = (i & 0xF0) + 0x14
-        else:
-            try:
-                piece = cs.LETTERS.index(char)
+    for row in reversed(bstr.split("/")):
+        for char in row:
+            piece = FEN_PIECES.get(char)
+            if piece:
                 arr[i] = piece
-                piece_dict[piece].add(i)
+                piece_dict[piece].append(i)
                 i += 1
-            except ValueError:
-                i += int(char)
+            else:
+                i += FEN_EMPTY[char]
+
+        i = (i & 0xF0) + 0x14
 
     return arr, piece_dict
 
@@ -81,44 +112,36 @@ def get_piece_list(arr, piece_dict, black, c_rights, ep):
     Args:
         arr (list): The board array.
         piece_dict (dict): A dictionary associating each piece
-            type/colour with its positions on the board.
+            type/colour with a list of its positions on the board, in
+            ascending order.
         black (int): Whether the side to move is black.
-        c_rights (list): The castling rights.
+        c_rights (int): The castling rights.
         ep (int): The en passant square.
 
     Returns:
         list: A list containing the current positions of all 32 pieces
             in the starting position.
     """
+    piece_list = [-1 for _ in range(32)]
 
-    def update_piece(piece, position, offset, p_list):
-        p_list[offset] = position
+    def update_piece(piece, position, offset):
+        piece_list[offset] = position
         piece_dict[piece].remove(position)
         arr[position] |= offset << 4
 
-    def find_pieces(p_type, side, row_offs, p_list):
-        off = cs.SIDE_OFFSET * side
-        for i in row_offs:
-            if piece_list[off + i] == -1:
-                piece = p_type | (side << 3)
-                if piece_dict[piece]:
-                    update_piece(piece, min(piece_dict[piece]), off + i, p_list)
-
-    piece_list = [-1 for _ in range(32)]
-
     for side in (cs.WHITE, cs.BLACK):
         off = cs.SIDE_OFFSET * side
 
         # identify rooks required for castling rights
         for i in range(2):
-            if c_rights[2 * side + i]:
+            if (c_rights >> (2 * side + i)) & 1:
                 rook = cs.R | (side << 3)
                 pos = cs.A1 + (0x70 * side) + 7 * (1 - i)
-                update_piece(rook, pos, off + 7 * (1 - i), piece_list)
+                update_piece(rook, pos, off + 7 * (1 - i))
 
         # find kings
         king = cs.K | (side << 3)
-        update_piece(king, min(piece_dict[king]), off + 4, piece_list)
+        update_piece(king, piece_dict[king][0], off + 4)
 
     # identify enemy pawn that has just moved two steps from starting position
     if ep != -1:
@@ -126,35 +149,32 @@ def get_piece_list(arr, piece_dict, black, c_rights, ep):
         pawns = (cs.WP, cs.BP)
         pawn_pos = ep + cs.BW * (1 - 2 * black)
         piece_off = cs.SIDE_OFFSET * side + 8 + (pawn_pos >> 4) - 4
-        update_piece(pawns[side], pawn_pos, piece_off, piece_list)
+        update_piece(pawns[side], pawn_pos, piece_off)
 
     # search for any other pieces still in their original positions
     for i, loc in enumerate(cs.STARTING_PIECE_LIST):
         if arr[loc] == cs.STARTING_ARRAY[loc] and piece_list[i] == -1:
-            update_piece(arr[loc], loc, i, piece_list)
+            update_piece(arr[loc], loc, i)
 
     # find the remaining pieces
-    pawn_offsets = list(range(8, 16))
-    find_pieces(cs.P, cs.WHITE, pawn_offsets, piece_list)
-    find_pieces(cs.p, cs.BLACK, pawn_offsets, piece_list)
-
-    for side in (cs.WHITE, cs.BLACK):
-        find_pieces(cs.N, side, (1, 6), piece_list)
-        find_pieces(cs.B, side, (2, 5), piece_list)
-        find_pieces(cs.R, side, (0, 7), piece_list)
-        find_pieces(cs.Q, side, (3,), piece_list)
+    for piece, offsets in PIECE_SLOTS:
+        positions = piece_dict[piece]
+        for i in offsets:
+            if not positions:
+                break
+            if piece_list[i] == -1:
+                update_piece(piece, positions[0], i)
 
     # if we have more queens/bishops/knights/rooks than in the starting position
     # these are promoted pawns
-    for side in (cs.WHITE, cs.BLACK):
-        off = cs.SIDE_OFFSET * side
-        pieces = [pc | (side << 3) for pc in (cs.Q, cs.N, cs.R, cs.B)]
-
-        for i in range(8, 16):
-            if piece_list[off + i] == -1:
-                for piece in pieces:
-                    if piece_dict[piece]:
-                        update_piece(piece, min(piece_dict[piece]), off + i, piece_list)
+    for pieces, offsets in PROMOTED_SLOTS:
+        for i in offsets:
+            if piece_list[i] != -1:
+                continue
+            for piece in pieces:
+                if piece_dict[piece]:
+                    update_piece(piece, piece_dict[piece][0], i)
+                    break
 
     return piece_list
 
@@ -196,10 +216,32 @@ def initialise_check(bd):
     bd.check = 0
 
 
+def make_board(arr, piece_dict, black, c_rights, ep, hm_clk, fm_num):
+    """Creates a board object from an array of piece codes.
+
+    Args:
+        arr (list): The board array, without piece list indices.
+        piece_dict (dict): A dictionary associating each piece
+            type/colour with a list of its positions on the board, in
+            ascending order.
+        black (int): Whether the side to move is black.
+        c_rights (int): The castling rights.
+        ep (int): The en passant square.
+        hm_clk (int): The halfmove clock.
+        fm_num (int): The fullmove number.
+
+    Returns:
+        Board: The board, with its piece list and check status set.
+    """
+    piece_list = get_piece_list(arr, piece_dict, black, c_rights, ep)
+    bd = board.Board(arr, black, c_rights, ep, hm_clk, fm_num, -1, piece_list)
+    initialise_check(bd)
+    return bd
+
+
 def fen_to_board(fen_str):
     """Converts a FEN string to a board object."""
-    reg = r"\s*^(((?:[rnbqkpRNBQKP1-8]+\/){7})[rnbqkpRNBQKP1-8]+)\s([b|w])\s(-|[K|Q|k|q]{1,4})\s(-|[a-h][1-8])\s(\d+\s\d+)$"
-    if re.fullmatch(reg, fen_str) is None:
+    if FEN_REGEX.fullmatch(fen_str) is None:
         raise ValueError
 
     # info[0]: the squares on the board
@@ -210,13 +252,66 @@ def fen_to_board(fen_str):
     # info[5]: the full move number
     info = fen_str.split(" ")
     side = int(info[1] == "b")
-    c_rights = [c in info[2] for c in "KQkq"]
+    c_rights = sum(1 << i for i, c in enumerate("KQkq") if c in info[2])
     ep = -1 if info[3] == "-" else utils.string_to_coord(info[3])
     arr, piece_dict = get_board_array(info[0])
-    piece_list = get_piece_list(arr, piece_dict, side, c_rights, ep)
-
-    bd = board.Board(
-        arr, side, c_rights, ep, int(info[4]), int(info[5]), -1, piece_list
+    return make_board(
+        arr, piece_dict, side, c_rights, ep, int(info[4]), int(info[5])
     )
-    initialise_check(bd)
-    return bd
+
+
+def parse_epd(line):
+    """Parses a line of an EPD file.
+
+    The four position fields may be followed by the halfmove clock and
+    fullmove number, as in perft suites. Otherwise these are read from the
+    hmvc and fmvn operations, defaulting to 0 and 1.
+
+    Args:
+        line (str): The EPD line, e.g. "<fen> ;D1 20 ;D2 400".
+
+    Returns:
+        tuple: The board and a dictionary of operands keyed by opcode.
+    """
+    fields = line.split(None, 4)
+    if len(fields) < 4:
+        raise ValueError
+
+    rest = fields[4] if len(fields) == 5 else ""
+    clocks = rest.split(None, 2)
+
+    if len(clocks) >= 2 and clocks[0].isdigit() and clocks[1].isdigit():
+        rest = clocks[2] if len(clocks) == 3 else ""
+    else:
+        clocks = None
+
+    operations = {}
+
+    for operation in rest.split(";"):
+        opcode, _, operand = operation.strip().partition(" ")
+        if opcode:
+            operations[opcode] = operand.strip().strip('"')
+
+    if clocks is None:
+        clocks = (operations.get("hmvc", "0"), operations.get("fmvn", "1"))
+
+    return fen_to_board(" ".join(fields[:4] + list(clocks[:2]))), operations
+
+
+def iter_epd(path):
+    """Yields the board and operations of each line of an EPD file.
+
+    Lines are read and parsed one at a time, so files of any size can be
+    streamed. Blank lines and lines starting with # are skipped.
+
+    Args:
+        path (str): The path of the EPD file.
+
+    Yields:
+        tuple: The board and a dictionary of operands keyed by opcode.
+    """
+    with open(path, "r", encoding="UTF-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield parse_epd(line)
@@ -41,16 +41,36 @@ def get_hash(pos, piece):
     return ARRAY[square_off + piece_off - 1]
 
 
+# the number for each piece code (colour and type) at each board index
+PIECE_KEYS = [[0 for _ in range(256)] for _ in range(16)]
+
+for _piece, _letter in enumerate(cs.LETTERS):
+    if not _letter.isalpha():
+        continue
+
+    for _rank in range(0x40, 0xC0, 0x10):
+        for _file in range(4, 12):
+            PIECE_KEYS[_piece][_rank + _file] = get_hash(_rank + _file, _piece)
+
+
+# the numbers for each combination of castling rights, so that the rights
+# changed by a move can be hashed with a single lookup
+CASTLING_KEYS = [0 for _ in range(16)]
+
+for _rights in range(16):
+    for _i in range(4):
+        if (_rights >> _i) & 1:
+            CASTLING_KEYS[_rights] ^= ARRAY[OFFS["castling"] + _i]
+
+
 def zobrist_hash(bd):
     """Hashes a board position to a unique number."""
     value = 0
-    i = 0
 
-    for i in range(0x44, 0xC4, 0x10):
-        for j in range(8):
-            square = bd.array[i + j]
-            if square:
-                value ^= get_hash(i + j, square)
+    for pos in cs.SQUARES:
+        square = bd.array[pos]
+        if square:
+            value ^= PIECE_KEYS[square & 15][pos]
 
     if bd.black:
         value ^= ARRAY[OFFS["black"]]
@@ -58,53 +78,66 @@ def zobrist_hash(bd):
     if bd.ep_square != -1:
         value ^= ARRAY[OFFS["en_passant"] + (bd.ep_square & 0x0F) - 4]
 
-    for i in range(4):
-        if bd.castling_rights[i]:
-            value ^= ARRAY[OFFS["castling"] + i]
+    return value ^ CASTLING_KEYS[bd.castling_rights]
+
+
+def update_state_hash(b_hash, bd, ep_square, c_rights):
+    """Updates a board hash for the special state changed by a move.
+
+    Args:
+        b_hash (int): The board hash to update.
+        bd (Board): The board state after the move is made.
+        ep_square (int): The en passant square before the move was made.
+        c_rights (int): The castling rights before the move was made.
+
+    Returns:
+        int: The hash with the en passant, castling and side to move
+            numbers of the updated board.
+    """
+    if ep_square != -1:
+        b_hash ^= ARRAY[OFFS["en_passant"] + (ep_square & 0x0F) - 4]
+
+    if bd.ep_square != -1:
+        b_hash ^= ARRAY[OFFS["en_passant"] + (bd.ep_square & 0x0F) - 4]
 
-    return value
+    b_hash ^= CASTLING_KEYS[c_rights ^ bd.castling_rights]
 
+    return b_hash ^ ARRAY[OFFS["black"]]
 
-def update_hash(b_hash, mv, bd, pr_type=cs.Q):
+
+def update_hash(b_hash, mv, bd):
     """Updates a board hash for a move to be made.
 
+    The moving, captured and promoted pieces are all read from the move, so
+    only the castling rights and en passant square of the board are used.
+
     Args:
         current_hash (int): The board hash to update.
         mv (int): A move integer.
         bd (Board): The board state before the move is made.
-        pr_type (int, optional): The type of piece to promote a pawn to.
-            Defaults to Queen.
 
     Returns:
         int: The hash of the board position after the move is made.
     """
     start, dest, castling = move.decode(mv)
-    piece = bd.array[start]
+    piece = move.moved_piece(mv)
+    captured = move.captured_piece(mv)
+    pr_type = move.promotion_type(mv)
 
     # moving piece
     b_hash ^= get_hash(start, piece)
-    b_hash ^= get_hash(dest, piece)
+    b_hash ^= get_hash(dest, pr_type | (bd.black << 3) if pr_type else piece)
 
-    cap_pos = -1
     ep_file = -1
 
-    if piece & 7 == cs.PAWNS[bd.black]:
-        if (dest >> 4) - 4 == 7 * (1 - bd.black):
-            b_hash ^= get_hash(dest, piece)
-            b_hash ^= get_hash(dest, pr_type | (bd.black << 3))
-
-        if dest == bd.ep_square and not bd.array[dest]:
-            cap_pos = bd.ep_square + (cs.BW * (1 - 2 * bd.black))
-
-        if dest - start in (2 * cs.FW, 2 * cs.BW):
-            ep_file = (dest & 0x0F) - 4
-
-    if bd.array[dest]:
-        cap_pos = dest
-
     # removing captured piece
-    if cap_pos != -1:
-        b_hash ^= get_hash(cap_pos, bd.array[cap_pos])
+    if mv & move.EN_PASSANT:
+        b_hash ^= get_hash(dest + (cs.BW * (1 - 2 * bd.black)), captured)
+    elif captured:
+        b_hash ^= get_hash(dest, captured)
+
+    if mv & move.DOUBLE_PUSH:
+        ep_file = (dest & 0x0F) - 4
 
     if castling:
         # move rook
@@ -113,29 +146,9 @@ def update_hash(b_hash, mv, bd, pr_type=cs.Q):
         b_hash ^= get_hash(r_start, rook)
         b_hash ^= get_hash(r_start + 5 * castling - 12, rook)
 
-        # remove castling rights
-        c_off = 2 * bd.black
-        b_hash ^= ARRAY[OFFS["castling"] + c_off]
-        b_hash ^= ARRAY[OFFS["castling"] + c_off + 1]
-
-    else:
-        moved = (start, dest)
-        for side in (cs.WHITE, cs.BLACK):
-            c_off = 2 * side
-            rank = cs.A1 + (0x70 * side)
-
-            if rank + 4 in moved:
-                if bd.castling_rights[c_off]:
-                    b_hash ^= ARRAY[OFFS["castling"] + c_off]
-                if bd.castling_rights[c_off + 1]:
-                    b_hash ^= ARRAY[OFFS["castling"] + c_off + 1]
-                break
-
-            if rank in moved and bd.castling_rights[c_off + cs.QUEENSIDE - 2]:
-                b_hash ^= ARRAY[OFFS["castling"] + c_off + cs.QUEENSIDE - 2]
-
-            if rank + 7 in moved and bd.castling_rights[c_off + cs.KINGSIDE - 2]:
-                b_hash ^= ARRAY[OFFS["castling"] + c_off + cs.KINGSIDE - 2]
+    # castling rights lost by moving the king or a rook, or capturing a rook
+    kept = cs.CASTLING_MASKS[start] & cs.CASTLING_MASKS[dest]
+    b_hash ^= CASTLING_KEYS[bd.castling_rights & ~kept]
 
     # removing previous en passant file, if any
     if bd.ep_square != -1:
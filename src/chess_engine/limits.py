@@ -0,0 +1,118 @@
+"""Module providing the limits that decide when a search must stop."""
+
+import time
+
+MOVES_TO_GO = 30  # the number of moves the remaining time is assumed to cover
+MOVE_OVERHEAD = 0.05  # the time in seconds lost to communication per move
+HARD_FACTOR = 5  # how far the hard limit may exceed the soft limit
+HARD_FRACTION = 0.5  # the most of the remaining time a single move may use
+
+
+def allocate_time(time_left, inc=0, moves_to_go=None):
+    """Splits the remaining clock time into soft and hard limits for a move.
+
+    The soft limit is an even share of the remaining time plus most of the
+    increment. No new iteration is started once it has passed. The hard
+    limit lets an iteration that is almost done finish, but never uses more
+    than a fraction of the remaining time, or nearly all of it on the last
+    move before a time control.
+
+    Args:
+        time_left (float): The time in seconds left on the clock.
+        inc (float, optional): The increment in seconds per move. Defaults to 0.
+        moves_to_go (int, optional): The number of moves until the next time
+            control, if known.
+
+    Returns:
+        tuple: The soft and hard time limits in seconds.
+    """
+    available = max(time_left - MOVE_OVERHEAD, 0.001)
+    mtg = min(moves_to_go or MOVES_TO_GO, MOVES_TO_GO)
+
+    soft = available / mtg + inc * 3 / 4
+    hard = min(
+        soft * HARD_FACTOR, available * (HARD_FRACTION if mtg > 1 else 0.9)
+    )
+    return min(soft, hard), hard
+
+
+class SearchLimits:
+    """The conditions under which a search stops.
+
+    Attributes:
+        depth (int): The maximum depth to search to.
+        nodes (int): The number of nodes after which the search is aborted,
+            or None for no limit.
+        soft_time (float): The time in seconds after which no new iteration
+            is started, or None for no limit.
+        hard_time (float): The time in seconds after which the search is
+            aborted, or None for no limit.
+        deadline (float): An absolute time (as returned by time.time()) at
+            which the search is aborted, or None. Set from hard_time when
+            the clock is started.
+        stop (Event): If set, the search is aborted.
+        start (float): The time at which the clock was started.
+    """
+
+    def __init__(
+        self,
+        depth=100,
+        nodes=None,
+        movetime=None,
+        soft_time=None,
+        hard_time=None,
+        deadline=None,
+        stop=None,
+    ):
+        if movetime is not None:
+            soft_time = hard_time = movetime
+
+        self.depth = depth
+        self.nodes = nodes
+        self.soft_time = soft_time
+        self.hard_time = hard_time
+        self.deadline = deadline
+        self.stop = stop
+        self.start = time.time()
+
+    def start_clock(self):
+        """Starts timing the search, fixing the deadline."""
+        self.start = time.time()
+
+        if self.hard_time is not None:
+            deadline = self.start + self.hard_time
+            if self.deadline is None or deadline < self.deadline:
+                self.deadline = deadline
+
+    def elapsed(self):
+        """Returns the time in seconds since the clock was started."""
+        return time.time() - self.start
+
+    def stopped(self, nodes):
+        """Checks whether a running search must be aborted.
+
+        Args:
+            nodes (int): The number of nodes searched so far.
+
+        Returns:
+            bool: True if the stop flag is set or a limit has been reached.
+        """
+        if self.stop is not None and self.stop.is_set():
+            return True
+        if self.nodes is not None and nodes >= self.nodes:
+            return True
+        return self.deadline is not None and time.time() >= self.deadline
+
+    def next_iteration(self, depth, nodes):
+        """Checks whether an iteration to a given depth should be started.
+
+        Args:
+            depth (int): The depth of the next iteration.
+            nodes (int): The number of nodes searched so far.
+
+        Returns:
+            bool: True if the search should continue to the given depth.
+        """
+        if depth > self.depth or self.stopped(nodes):
+            return False
+        return self.soft_time is None or self.elapsed() < self.soft_time
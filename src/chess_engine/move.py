@@ -1,23 +1,75 @@
 "Module providing move making, unmaking and checking utilities."
 
-from chess_engine import constants as cs, utils
+from chess_engine import constants as cs, eval_tables as et, hashing as hsh, utils
 
+# layout of a move integer:
+# bits 0-7: start, bits 8-15: destination, bits 16-17: castling,
+# bits 18-20: promotion type, bits 21-24: moving piece (colour and type),
+# bits 25-28: captured piece (colour and type), bits 29-31: flags
+PROMOTION_SHIFT, PIECE_SHIFT, CAPTURED_SHIFT = 18, 21, 25
+CAPTURE, EN_PASSANT, DOUBLE_PUSH = 1 << 29, 1 << 30, 1 << 31
 
-def encode(start, dest, castling=0):
-    """Encodes move information into an integer."""
-    return start | (dest << 8) | (castling << 16)
+PROMOTIONS = (cs.Q, cs.N, cs.B, cs.R)
+
+
+def encode(start, dest, castling=0, piece=0, captured=0, promotion=0, flags=0):
+    """Encodes move information into an integer.
+
+    Args:
+        start (int): The start square of the moving piece.
+        dest (int): The destination square of the moving piece.
+        castling (int, optional): KINGSIDE or QUEENSIDE for a castle move.
+        piece (int, optional): The colour and type of the moving piece.
+        captured (int, optional): The colour and type of the captured piece.
+        promotion (int, optional): The type of piece a pawn promotes to.
+        flags (int, optional): Any of CAPTURE, EN_PASSANT and DOUBLE_PUSH.
+
+    Returns:
+        int: The move integer.
+    """
+    return (
+        start
+        | (dest << 8)
+        | (castling << 16)
+        | (promotion << PROMOTION_SHIFT)
+        | (piece << PIECE_SHIFT)
+        | (captured << CAPTURED_SHIFT)
+        | flags
+    )
 
 
 def decode(mv):
-    """Extracts move information from an integer."""
-    return (mv & 0xFF, (mv >> 8) & 0xFF, (mv >> 16) & 0xF)
+    """Extracts the start, destination and castling type from a move integer."""
+    return (mv & 0xFF, (mv >> 8) & 0xFF, (mv >> 16) & 3)
+
+
+def moved_piece(mv):
+    """Returns the colour and type of the piece moved by a move."""
+    return (mv >> PIECE_SHIFT) & 15
+
+
+def captured_piece(mv):
+    """Returns the colour and type of the piece captured by a move, or 0."""
+    return (mv >> CAPTURED_SHIFT) & 15
+
+
+def promotion_type(mv):
+    """Returns the type of piece a move promotes to, or 0."""
+    return (mv >> PROMOTION_SHIFT) & 7
 
 
 def string_to_int(bd, mstr, unmake=False):
-    """Converts a move string to an integer."""
+    """Converts a move string to an integer.
+
+    The moving and captured pieces are read from the board, so the move
+    must be made from the current position. If unmake is set, the move has
+    just been made and only the squares, castling type and promotion are
+    encoded, which is all unmake_move needs.
+    """
     try:
         start = utils.string_to_coord(mstr[0:2])
         dest = utils.string_to_coord(mstr[2:4])
+        promotion = cs.LETTERS.index(mstr[4]) & 7 if len(mstr) == 5 else 0
 
         castling = 0
 
@@ -33,25 +85,42 @@ def string_to_int(bd, mstr, unmake=False):
             if abs(diff) == 2:
                 castling = cs.KINGSIDE if diff == 2 else cs.QUEENSIDE
 
-        return encode(start, dest, castling)
+        if unmake:
+            return encode(start, dest, castling, promotion=promotion)
+
+        piece = bd.array[start] & 15
+        captured = bd.array[dest] & 15
+        flags = 0
+
+        if piece == (cs.WP, cs.BP)[bd.black]:
+            if dest == bd.ep_square and not captured:
+                captured = (cs.WP, cs.BP)[bd.black ^ 1]
+                flags |= EN_PASSANT
+            elif abs(dest - start) == 2 * cs.FW:
+                flags |= DOUBLE_PUSH
+
+            if dest >> 4 == 7 * (1 - bd.black) + 4 and not promotion:
+                promotion = cs.Q
+
+        if captured:
+            flags |= CAPTURE
+
+        return encode(start, dest, castling, piece, captured, promotion, flags)
 
     except (IndexError, ValueError):
         return -1
 
 
-def int_to_string(bd, mv):
+def int_to_string(mv):
     """Converts a move integer to a move string."""
     start, dest, _ = decode(mv)
-    promotion = ""
-
-    if bd.array[start] & 7 == cs.PAWNS[bd.black] and ((dest & 0xF0) >> 4) - 4 == 7 * (
-        1 - bd.black
-    ):
-        promotion = "q"
+    promotion = (mv >> PROMOTION_SHIFT) & 7
 
     return (
-        utils.coord_to_string(start) + utils.coord_to_string(dest) + promotion
-    ).strip()
+        utils.coord_to_string(start)
+        + utils.coord_to_string(dest)
+        + (cs.LETTERS[promotion | cs.BVAL] if promotion else "")
+    )
 
 
 def is_square_attacked(bd, pos, black):
@@ -71,15 +140,12 @@ def is_square_attacked(bd, pos, black):
                 vecs.remove(v)
 
     for v in vecs:
-        current = pos + v
-        while True:
-            current += v
+        for current in cs.RAYS[v][pos]:
             square = bd.array[current]
 
             if square:
                 if (
-                    square != cs.GD
-                    and (square >> 3) & 1 == black
+                    (square >> 3) & 1 == black
                     and cs.MOVE_TABLE[utils.square_diff(current, pos)]
                     & cs.DISTANT_MASKS[square & 7]
                 ):
@@ -139,37 +205,15 @@ def update_check(bd, start, dest):
     bd.checker = dest
 
 
-def legal_king_move(bd, dest, castling):
-    """Checks whether a king move is legal."""
-    if castling:
-        squares = [
-            cs.A1 + (0x70 * (bd.black ^ 1)) + 2 * int(castling == cs.KINGSIDE) + x
-            for x in range(2, 5)
-        ]
-
-        for sqr in squares:
-            if is_square_attacked(bd, sqr, bd.black):
-                return False
-
-        return True
-
-    return not is_square_attacked(bd, dest, bd.black)
-
-
 def ep_pinned(bd, start, king_pos, ep_sqr):
     """Checks if an en passant capture would leave the king in check."""
     v = cs.UNIT_VEC[utils.square_diff(king_pos, start)]
-    current = king_pos
 
-    while True:
-        current += v
+    for current in cs.RAYS[v][king_pos]:
         if current in (start, ep_sqr):
             continue
 
         square = bd.array[current]
-        if square == cs.GD:
-            return False
-
         if square:
             if (square >> 3) & 1 != bd.black and cs.MOVE_TABLE[
                 utils.square_diff(current, king_pos)
@@ -177,6 +221,8 @@ def ep_pinned(bd, start, king_pos, ep_sqr):
                 return True
             return False
 
+    return False
+
 
 def unmake_move(mv, bd):
     """Reverses a move and any changes to the board state."""
@@ -191,35 +237,59 @@ def unmake_move(mv, bd):
         bd.array[r_dest] = 0
         bd.array[r_start] = rook
         bd.piece_list[rook >> 4] = r_start
+        rook_scores = et.SQUARE_SCORES[rook & 15]
+        bd.scores[bd.black] += rook_scores[r_start] - rook_scores[r_dest]
 
     piece = bd.array[dest]
     bd.array[dest] = 0
     bd.array[start] = piece
     bd.piece_list[piece >> 4] = start
+    bd.scores[bd.black] -= et.SQUARE_SCORES[piece & 15][dest]
+
+    captured = bd.restore_state()
 
-    (
-        bd.halfmove_clock,
-        bd.ep_square,
-        bd.castling_rights,
-        bd.check,
-        bd.checker,
-        captured,
-        promotion,
-    ) = bd.get_prev_state()
-
-    if promotion:  # change to pawn of same colour
+    if (mv >> PROMOTION_SHIFT) & 7:  # change to pawn of same colour
         pawn = (cs.WP, cs.BP)[bd.black]
         bd.array[start] = (piece & 0x1F0) | (bd.black << 3) | pawn
 
+    bd.scores[bd.black] += et.SQUARE_SCORES[bd.array[start] & 15][start]
+
     if captured:
         cap_pos = dest
         if dest == bd.ep_square:
             cap_pos += cs.BW * (1 - 2 * bd.black)
         bd.array[cap_pos] = captured
         bd.piece_list[captured >> 4] = cap_pos
+        bd.scores[bd.black ^ 1] += et.SQUARE_SCORES[captured & 15][cap_pos]
+
+
+def make_null_move(bd):
+    """Passes the turn to the other side without moving a piece.
+
+    Used by the search to test whether a position is good enough that even
+    giving the opponent a free move does not help them. Must not be called
+    when the side to move is in check.
+    """
+    ep_square = bd.ep_square
+    bd.save_state(0, 0)
+    bd.halfmove_clock += 1
+    bd.ep_square = -1
+    bd.hash = hsh.update_state_hash(bd.hash, bd, ep_square, bd.castling_rights)
+    bd.fullmove_num += bd.black
+    bd.switch_side()
+    bd.check = 0
+    bd.checker = -1
+
+
+def unmake_null_move(bd):
+    """Reverses a null move."""
+    bd.switch_side()
+    bd.fullmove_num -= bd.black
+
+    bd.restore_state()
 
 
-def make_castle_move(mv, bd, dest, castling):
+def make_castle_move(bd, castling):
     """Completes a castle move."""
     r_start = cs.A1 + (0x70 * bd.black) + 0x7 * (3 - castling)
     r_dest = r_start + 5 * castling - 12
@@ -228,40 +298,34 @@ def make_castle_move(mv, bd, dest, castling):
     bd.array[r_start] = 0
     bd.array[r_dest] = rook
     bd.piece_list[rook >> 4] = r_dest
+    rook_keys = hsh.PIECE_KEYS[rook & 15]
+    bd.hash ^= rook_keys[r_start] ^ rook_keys[r_dest]
+    rook_scores = et.SQUARE_SCORES[rook & 15]
+    bd.scores[bd.black] += rook_scores[r_dest] - rook_scores[r_start]
 
-    bd.castling_rights[2 * bd.black] = False
-    bd.castling_rights[2 * bd.black + 1] = False
+    ep_square = bd.ep_square
+    c_rights = bd.castling_rights
+    bd.castling_rights &= ~(3 << (2 * bd.black))
 
     bd.ep_square = -1
+    bd.hash = hsh.update_state_hash(bd.hash, bd, ep_square, c_rights)
     bd.fullmove_num += bd.black
     bd.switch_side()
 
-    if not legal_king_move(bd, dest, castling):
-        unmake_move(mv, bd)
-        return -1
-
     update_check(bd, r_start, r_dest)
-    return 0
 
 
-def make_pawn_move(bd, start, dest, piece, pr_type):
+def make_pawn_move(bd, mv, start, dest, piece):
     "Completes a pawn move."
-    promotion = dest >> 4 == 7 * (1 - bd.black) + 4
+    pr_type = (mv >> PROMOTION_SHIFT) & 7
     victim_pawn_pos = dest + cs.BW * (1 - 2 * bd.black)
     cap_pos = dest
     captured = bd.array[cap_pos]
     override_check = 0
 
     # en passant capture
-    if dest == bd.ep_square and not captured:
+    if mv & EN_PASSANT:
         king_off = cs.SIDE_OFFSET * bd.black
-        king_pos = bd.piece_list[king_off + 4]
-
-        if king_pos >> 4 == start >> 4 and ep_pinned(
-            bd, start, king_pos, victim_pawn_pos
-        ):
-            return -1
-
         enemy_king_pos = bd.piece_list[16 - king_off + 4]
         ep_diff = utils.square_diff(enemy_king_pos, victim_pawn_pos)
         step = cs.UNIT_VEC[ep_diff]
@@ -293,11 +357,17 @@ def make_pawn_move(bd, start, dest, piece, pr_type):
         cap_pos = victim_pawn_pos
         captured = bd.array[cap_pos]
 
-    bd.save_state(captured, promotion)
+    bd.save_state(mv, captured)
+    ep_square = bd.ep_square
+    c_rights = bd.castling_rights
+    b_hash = bd.hash ^ hsh.PIECE_KEYS[piece & 15][start]
+    bd.scores[bd.black] -= et.SQUARE_SCORES[piece & 15][start]
 
     if captured:
         bd.piece_list[captured >> 4] = -1
         bd.array[cap_pos] = 0
+        b_hash ^= hsh.PIECE_KEYS[captured & 15][cap_pos]
+        bd.scores[bd.black ^ 1] -= et.SQUARE_SCORES[captured & 15][cap_pos]
 
     bd.array[start] = 0
     bd.array[dest] = piece
@@ -306,18 +376,18 @@ def make_pawn_move(bd, start, dest, piece, pr_type):
     bd.ep_square = -1
     bd.halfmove_clock = 0
 
-    if dest - start in (2 * cs.FW, 2 * cs.BW):
+    if mv & DOUBLE_PUSH:
         # ep square is one step back from the destination of a double pawn push
         bd.ep_square = victim_pawn_pos
-    elif promotion:  # change to promoted type
+    elif pr_type:  # change to promoted type
         bd.array[dest] = (piece & 0x1F0) | (bd.black << 3) | pr_type
 
         if captured:
-            off = 2 * (bd.black ^ 1)
-            file = (dest & 0x0F) - 4
-            bd.castling_rights[off] &= file != 7
-            bd.castling_rights[off + 1] &= file != 0
+            bd.castling_rights &= cs.CASTLING_MASKS[dest]
 
+    b_hash ^= hsh.PIECE_KEYS[bd.array[dest] & 15][dest]
+    bd.scores[bd.black] += et.SQUARE_SCORES[bd.array[dest] & 15][dest]
+    bd.hash = hsh.update_state_hash(b_hash, bd, ep_square, c_rights)
     bd.fullmove_num += bd.black
     bd.switch_side()
 
@@ -326,78 +396,70 @@ def make_pawn_move(bd, start, dest, piece, pr_type):
         bd.check |= 2
         bd.checker = override_check
 
-    return 0
 
-
-def make_move(mv, bd, pr_type=cs.Q):
+def make_move(mv, bd):
     """Carries out a move and updates the board state.
 
+    The move must be legal, as generated by move_gen.
+
     Args:
         mv (int): An integer encoding the move information.
         bd (Board): The board to update.
-
-    Returns:
-        int: 0, if the move is legal and the board is updated,
-            or -1, if the move is illegal (causing the move to be
-            reversed).
     """
     start, dest, castling = decode(mv)
     piece = bd.array[start]
 
-    if piece & 7 in (cs.P, cs.p):
-        return make_pawn_move(bd, start, dest, piece, pr_type)
+    if (mv >> PIECE_SHIFT) & 7 in (cs.P, cs.p):
+        make_pawn_move(bd, mv, start, dest, piece)
+        return
 
     captured = bd.array[dest]
-    bd.save_state(captured, False)
+    bd.save_state(mv, captured)
     bd.halfmove_clock += 1
+    piece_keys = hsh.PIECE_KEYS[piece & 15]
+    bd.hash ^= piece_keys[start] ^ piece_keys[dest]
+    piece_scores = et.SQUARE_SCORES[piece & 15]
+    bd.scores[bd.black] += piece_scores[dest] - piece_scores[start]
 
     if captured:
         bd.piece_list[captured >> 4] = -1
         bd.halfmove_clock = 0
+        bd.hash ^= hsh.PIECE_KEYS[captured & 15][dest]
+        bd.scores[bd.black ^ 1] -= et.SQUARE_SCORES[captured & 15][dest]
 
     bd.array[start] = 0
     bd.array[dest] = piece
     bd.piece_list[piece >> 4] = dest
 
     if castling:
-        return make_castle_move(mv, bd, dest, castling)
+        make_castle_move(bd, castling)
+        return
 
     # update castling rights
-    first_rank = cs.A1 + 0x70 * bd.black
-    last_rank = cs.A8 - 0x70 * bd.black
-    off = 2 * bd.black
-    bd.castling_rights[off] &= start != first_rank + 7
-    bd.castling_rights[off + 1] &= start != first_rank
-    bd.castling_rights[(2 - off)] &= dest != last_rank + 7
-    bd.castling_rights[(2 - off) + 1] &= dest != last_rank
+    ep_square = bd.ep_square
+    c_rights = bd.castling_rights
+    bd.castling_rights &= cs.CASTLING_MASKS[start] & cs.CASTLING_MASKS[dest]
 
     bd.ep_square = -1  # reset en passant square
+
+    bd.hash = hsh.update_state_hash(bd.hash, bd, ep_square, c_rights)
     bd.fullmove_num += bd.black
     bd.switch_side()
 
-    if piece & 7 == cs.K:
-        bd.castling_rights[off] = False
-        bd.castling_rights[off + 1] = False
-
-        if not legal_king_move(bd, dest, castling):
-            unmake_move(mv, bd)
-            return -1
-
     update_check(bd, start, dest)
 
-    return 0
-
 
 def make_move_from_string(mstr, bd):
-    """Converts a move string to an integer and calls the make function."""
+    """Converts a move string to an integer and calls the make function.
+
+    Returns:
+        int: 0 if the move was made, or -1 if the string is not a move.
+    """
     mv = string_to_int(bd, mstr)
 
     if mv != -1:
-        promotion = cs.Q
-        if len(mstr) == 5:
-            promotion = cs.LETTERS.index(mstr[-1]) & ~(1 << 3)
-
-        return make_move(mv, bd, pr_type=promotion)
+        make_move(mv, bd)
+        return 0
 
     return -1
 
@@ -406,4 +468,7 @@ def unmake_move_from_string(mstr, bd):
     """Parses a move string and calls the unmake function."""
     mv = string_to_int(bd, mstr, unmake=True)
     if mv != -1:
+        if bd.ply and (bd.undo_move[bd.ply - 1] ^ mv) & 0xFFFF == 0:
+            # the last move made, which keeps a promotion the string may omit
+            mv = bd.undo_move[bd.ply - 1]
         unmake_move(mv, bd)
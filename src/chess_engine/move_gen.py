@@ -2,21 +2,53 @@
 
 from chess_engine import constants as cs, move, utils
 
+UNDERPROMOTIONS = (cs.N, cs.B, cs.R)
+
+
+def piece_bits(bd, pos):
+    """Returns the start square and moving piece bits of a move from pos."""
+    return pos | ((bd.array[pos] & 15) << move.PIECE_SHIFT)
+
+
+def capture_bits(square):
+    """Returns the captured piece and capture flag bits of a move onto square."""
+    return ((square & 15) << move.CAPTURED_SHIFT) | move.CAPTURE
+
+
+def ep_bits(bd):
+    """Returns the captured piece and flag bits of an en passant capture."""
+    return capture_bits((cs.WP, cs.BP)[bd.black ^ 1]) | move.EN_PASSANT
+
+
+def add_pawn_move(bd, mv, moves, promotions=move.PROMOTIONS):
+    """Appends a pawn move, once for each promotion type if it promotes."""
+    if (mv >> 12) & 0xF == 7 * (1 - bd.black) + 4:  # destination rank
+        for pr_type in promotions:
+            moves.append(mv | (pr_type << move.PROMOTION_SHIFT))
+    else:
+        moves.append(mv)
+
 
 def gen_pawn_moves(bd, vecs, pos, moves):
-    """Appends all pawn moves from index pos to a list."""
+    """Appends all pawn moves from index pos to a list.
+
+    A move to the last rank is appended once for each promotion type.
+    """
     straight = cs.FW * (1 - 2 * bd.black)
+    base = piece_bits(bd, pos)
 
     for v in vecs:
         if v == straight:
             current = pos + straight
             if not bd.array[current]:
-                moves.append(move.encode(pos, current))
+                add_pawn_move(bd, base | (current << 8), moves)
 
                 if (pos >> 4) - 4 == 1 + 5 * bd.black and not bd.array[
                     pos + 2 * straight
                 ]:
-                    moves.append(move.encode(pos, pos + 2 * straight))
+                    moves.append(
+                        base | ((pos + 2 * straight) << 8) | move.DOUBLE_PUSH
+                    )
             continue
 
         current = pos + v
@@ -29,35 +61,118 @@ def gen_pawn_moves(bd, vecs, pos, moves):
         ):
             continue
 
-        moves.append(move.encode(pos, current))
+        if square:
+            add_pawn_move(bd, base | (current << 8) | capture_bits(square), moves)
+        else:
+            moves.append(base | (current << 8) | ep_bits(bd))
 
 
 def gen_step(bd, vecs, pos, moves):
-    """Appends all pseudo-legal single-step moves for a piece at index pos to a list."""
-    for v in vecs:
-        square = bd.array[pos + v]
+    """Appends all pseudo-legal single-step moves for a piece at index pos to a list.
 
-        if square == cs.GD or square and (square >> 3) & 1 == bd.black:
-            continue
+    Knights and kings always use every one of their vectors, so the target
+    squares are read from the step table of the piece rather than vecs.
+    """
+    arr = bd.array
+    base = piece_bits(bd, pos)
 
-        moves.append(move.encode(pos, pos + v))
+    for dest in cs.STEPS[arr[pos] & 7][pos]:
+        square = arr[dest]
+
+        if not square:
+            moves.append(base | (dest << 8))
+        elif (square >> 3) & 1 != bd.black:
+            moves.append(base | (dest << 8) | capture_bits(square))
 
 
 def gen_sliders(bd, vecs, pos, moves):
     """Appends any piece moves along the provided set of vectors to a list."""
-    for v in vecs:
-        current = pos
+    arr = bd.array
+    base = piece_bits(bd, pos)
 
-        while True:
-            current += v
-            square = bd.array[current]
+    for v in vecs:
+        for current in cs.RAYS[v][pos]:
+            square = arr[current]
 
             if square:
-                if square != cs.GD and (square >> 3) & 1 != bd.black:
-                    moves.append(move.encode(pos, current))
+                if (square >> 3) & 1 != bd.black:
+                    moves.append(base | (current << 8) | capture_bits(square))
                 break
 
-            moves.append(move.encode(pos, current))
+            moves.append(base | (current << 8))
+
+
+def attack_map(bd):
+    """Marks every square attacked by the side that is not to move.
+
+    The king of the side to move is lifted off the board while the map is
+    built, so that squares behind it on a line of attack are marked too.
+
+    Args:
+        bd (Board): The board to analyse.
+
+    Returns:
+        bytearray: A 256-entry map that is non-zero at attacked indices.
+    """
+    arr = bd.array
+    attacked = bytearray(256)
+    king_pos = bd.piece_list[cs.SIDE_OFFSET * bd.black + 4]
+    king = arr[king_pos]
+    arr[king_pos] = 0
+    off = cs.SIDE_OFFSET * (bd.black ^ 1)
+
+    for pos in bd.piece_list[off : off + cs.SIDE_OFFSET]:
+        if pos == -1:
+            continue
+
+        p_type = arr[pos] & 7
+
+        if p_type in (cs.B, cs.R, cs.Q):
+            for v in cs.VALID_VECS[p_type]:
+                for current in cs.RAYS[v][pos]:
+                    attacked[current] = 1
+                    if arr[current]:
+                        break
+        else:
+            for dest in cs.STEPS[p_type][pos]:
+                attacked[dest] = 1
+
+    arr[king_pos] = king
+    return attacked
+
+
+def gen_king_moves(bd, king_pos, gen, moves):
+    """Appends the king moves made by gen that do not move into check.
+
+    The attack map is only built if the king has a square to move to.
+    """
+    candidates = []
+    gen(bd, cs.VALID_VECS[cs.K], king_pos, candidates)
+
+    if candidates:
+        attacked = attack_map(bd)
+        for mv in candidates:
+            if not attacked[(mv >> 8) & 0xFF]:
+                moves.append(mv)
+
+
+def remove_ep_pinned(bd, king_pos, moves):
+    """Removes an en passant capture that would expose the king along its rank."""
+    if bd.ep_square == -1:
+        return
+
+    for mv in moves:
+        start, dest, _ = move.decode(mv)
+
+        if (
+            mv & move.EN_PASSANT
+            and king_pos >> 4 == start >> 4
+            and move.ep_pinned(
+                bd, start, king_pos, dest + cs.BW * (1 - 2 * bd.black)
+            )
+        ):
+            moves.remove(mv)
+            return
 
 
 SELECT = {
@@ -70,14 +185,162 @@ SELECT = {
 }
 
 
+def gen_pawn_captures(bd, vecs, pos, moves):
+    """Appends all pawn captures and queen promotions from index pos to a list."""
+    straight = cs.FW * (1 - 2 * bd.black)
+    base = piece_bits(bd, pos)
+
+    for v in vecs:
+        current = pos + v
+        square = bd.array[current]
+
+        if v == straight:
+            if not square and current >> 4 == 7 * (1 - bd.black) + 4:
+                moves.append(
+                    base | (current << 8) | (cs.Q << move.PROMOTION_SHIFT)
+                )
+            continue
+
+        if (
+            square == cs.GD
+            or (square and (square >> 3) & 1 == bd.black)
+            or (not square and current != bd.ep_square)
+        ):
+            continue
+
+        if square:
+            add_pawn_move(
+                bd, base | (current << 8) | capture_bits(square), moves, (cs.Q,)
+            )
+        else:
+            moves.append(base | (current << 8) | ep_bits(bd))
+
+
+def gen_step_captures(bd, vecs, pos, moves):
+    """Appends all single-step captures for a piece at index pos to a list."""
+    arr = bd.array
+    base = piece_bits(bd, pos)
+
+    for dest in cs.STEPS[arr[pos] & 7][pos]:
+        square = arr[dest]
+
+        if square and (square >> 3) & 1 != bd.black:
+            moves.append(base | (dest << 8) | capture_bits(square))
+
+
+def gen_slider_captures(bd, vecs, pos, moves):
+    """Appends any captures along the provided set of vectors to a list."""
+    arr = bd.array
+    base = piece_bits(bd, pos)
+
+    for v in vecs:
+        for current in cs.RAYS[v][pos]:
+            square = arr[current]
+
+            if square:
+                if (square >> 3) & 1 != bd.black:
+                    moves.append(base | (current << 8) | capture_bits(square))
+                break
+
+
+CAPTURE_SELECT = {
+    cs.P: gen_pawn_captures,
+    cs.p: gen_pawn_captures,
+    cs.B: gen_slider_captures,
+    cs.N: gen_step_captures,
+    cs.R: gen_slider_captures,
+    cs.Q: gen_slider_captures,
+}
+
+
+def gen_pawn_quiets(bd, vecs, pos, moves):
+    """Appends all quiet pawn pushes and underpromotions from index pos to a list.
+
+    Underpromotions, including those that capture, are treated as quiet
+    moves so that the capture stage only searches queen promotions.
+    """
+    straight = cs.FW * (1 - 2 * bd.black)
+    base = piece_bits(bd, pos)
+    promoting = (pos + straight) >> 4 == 7 * (1 - bd.black) + 4
+
+    for v in vecs:
+        current = pos + v
+        square = bd.array[current]
+
+        if v == straight:
+            if square:
+                continue
+
+            if promoting:
+                add_pawn_move(bd, base | (current << 8), moves, UNDERPROMOTIONS)
+                continue
+
+            moves.append(base | (current << 8))
+
+            if (pos >> 4) - 4 == 1 + 5 * bd.black and not bd.array[
+                pos + 2 * straight
+            ]:
+                moves.append(base | ((pos + 2 * straight) << 8) | move.DOUBLE_PUSH)
+
+        elif (
+            promoting
+            and square
+            and square != cs.GD
+            and (square >> 3) & 1 != bd.black
+        ):
+            add_pawn_move(
+                bd,
+                base | (current << 8) | capture_bits(square),
+                moves,
+                UNDERPROMOTIONS,
+            )
+
+
+def gen_step_quiets(bd, vecs, pos, moves):
+    """Appends all single-step moves to empty squares for a piece at index pos."""
+    arr = bd.array
+    base = piece_bits(bd, pos)
+
+    for dest in cs.STEPS[arr[pos] & 7][pos]:
+        if not arr[dest]:
+            moves.append(base | (dest << 8))
+
+
+def gen_slider_quiets(bd, vecs, pos, moves):
+    """Appends any moves to empty squares along the provided set of vectors."""
+    arr = bd.array
+    base = piece_bits(bd, pos)
+
+    for v in vecs:
+        for current in cs.RAYS[v][pos]:
+            if arr[current]:
+                break
+            moves.append(base | (current << 8))
+
+
+QUIET_SELECT = {
+    cs.P: gen_pawn_quiets,
+    cs.p: gen_pawn_quiets,
+    cs.B: gen_slider_quiets,
+    cs.N: gen_step_quiets,
+    cs.R: gen_slider_quiets,
+    cs.Q: gen_slider_quiets,
+}
+
+
 def gen_move_in_check(bd, king_pos, step, vecs, loc, moves):
     """Appends any moves that the current piece can make to escape check to a list."""
     p_type = bd.array[loc] & 7
     diff = utils.square_diff(loc, bd.checker)
     v = cs.UNIT_VEC[diff]
+    base = piece_bits(bd, loc)
+    capture = base | (bd.checker << 8) | capture_bits(bd.array[bd.checker])
 
     if cs.MOVE_TABLE[diff] & cs.CONTACT_MASKS[p_type] and v in vecs:
-        moves.append(move.encode(loc, bd.checker))
+        if p_type in cs.PAWNS:
+            add_pawn_move(bd, capture, moves)
+        else:
+            moves.append(capture)
 
     if (
         p_type in (cs.B, cs.R, cs.Q)
@@ -95,7 +358,7 @@ def gen_move_in_check(bd, king_pos, step, vecs, loc, moves):
             current += v
 
         if valid:
-            moves.append(move.encode(loc, bd.checker))
+            moves.append(capture)
 
     # attempt ep capture
     if p_type == cs.PAWNS[bd.black] and bd.checker == (
@@ -106,7 +369,7 @@ def gen_move_in_check(bd, king_pos, step, vecs, loc, moves):
             cs.MOVE_TABLE[ep_diff] & cs.CONTACT_MASKS[p_type]
             and cs.UNIT_VEC[ep_diff] in vecs
         ):
-            moves.append(move.encode(loc, bd.ep_square))
+            moves.append(base | (bd.ep_square << 8) | ep_bits(bd))
 
     # attempt to block checker
     if bd.check == 2:
@@ -124,22 +387,31 @@ def gen_move_in_check(bd, king_pos, step, vecs, loc, moves):
                     pos += step
 
 
-def gen_pinned_pieces(bd, indices, king_pos, step, moves):
-    """Generates moves for pinned pieces."""
+def gen_pinned_pieces(bd, indices, king_pos, step, moves, select=None):
+    """Generates moves for pinned pieces.
+
+    Args:
+        bd (Board): The board to generate moves for.
+        indices (set): The piece list indices of the pieces to move.
+        king_pos (int): The position of the king of the side to move.
+        step (int): The unit vector from the king to the checker.
+        moves (list): The list to append moves to.
+        select (dict, optional): The generator functions for each piece
+            type. Defaults to SELECT.
+
+    Returns:
+        set: The piece list indices of the pieces that are not pinned.
+    """
+    select = select or SELECT
     for v in cs.VALID_VECS[cs.K]:
         pinned = 0
         loc = -1
         attacker = -1
-        current = king_pos
 
-        while True:
-            current += v
+        for current in cs.RAYS[v][king_pos]:
             square = bd.array[current]
 
             if square:
-                if square == cs.GD:
-                    break
-
                 if (square >> 3) & 1 != bd.black:
                     if (
                         cs.MOVE_TABLE[utils.square_diff(current, king_pos)]
@@ -174,13 +446,48 @@ def gen_pinned_pieces(bd, indices, king_pos, step, moves):
             if bd.check:
                 gen_move_in_check(bd, king_pos, step, vecs, loc, moves)
             else:
-                SELECT[p_type](bd, vecs, loc, moves)
+                select[p_type](bd, vecs, loc, moves)
 
     return indices
 
 
+def gen_castle_moves(bd, king_pos, moves):
+    """Appends the legal castle moves for the side to move.
+
+    The squares between king and rook must be empty, and the squares the
+    king crosses must not be attacked.
+    """
+    off = 2 * bd.black
+    rank = cs.A1 + (0x70 * bd.black)
+    attacked = None
+
+    for castle in (cs.KINGSIDE, cs.QUEENSIDE):
+        if not (bd.castling_rights >> (off + castle - 2)) & 1:
+            continue
+
+        is_kingside = 3 - castle
+        if not any(
+            bd.array[rank + (1 + 4 * is_kingside) : rank + (4 + 3 * is_kingside)]
+        ):
+            if attacked is None:
+                attacked = attack_map(bd)
+
+            crossed = rank + 2 + 2 * is_kingside
+            if any(attacked[crossed : crossed + 3]):
+                continue
+
+            moves.append(
+                piece_bits(bd, king_pos)
+                | ((king_pos - 2 + 4 * is_kingside) << 8)
+                | (castle << 16)
+            )
+
+
 def all_moves(bd):
-    """Generates all moves for the side to move."""
+    """Generates all legal moves for the side to move.
+
+    Promotions are generated once for each piece that can be promoted to.
+    """
     moves = []
     piece_list_offset = cs.SIDE_OFFSET * bd.black
 
@@ -192,7 +499,7 @@ def all_moves(bd):
 
     # must always generate king moves
     king_pos = bd.piece_list[piece_list_offset + 4]
-    gen_step(bd, cs.VALID_VECS[cs.K], king_pos, moves)
+    gen_king_moves(bd, king_pos, gen_step, moves)
     indices.remove(piece_list_offset + 4)
 
     # generate moves for pinned pieces and in check
@@ -205,27 +512,102 @@ def all_moves(bd):
                 loc = bd.piece_list[i]
                 vecs = cs.VALID_VECS[bd.array[loc] & 7]
                 gen_move_in_check(bd, king_pos, step, vecs, loc, moves)
+        remove_ep_pinned(bd, king_pos, moves)
         return moves
 
-    # generate castle moves if possible
-    off = 2 * bd.black
-    rank = cs.A1 + (0x70 * bd.black)
+    gen_castle_moves(bd, king_pos, moves)
 
-    for castle in (cs.KINGSIDE, cs.QUEENSIDE):
-        if not bd.castling_rights[off + castle - 2]:
-            continue
+    for i in indices:
+        loc = bd.piece_list[i]
+        p_type = bd.array[loc] & 7
+        SELECT[p_type](bd, cs.VALID_VECS[p_type], loc, moves)
 
-        is_kingside = 3 - castle
-        if not any(
-            bd.array[rank + (1 + 4 * is_kingside) : rank + (4 + 3 * is_kingside)]
-        ):
-            moves.append(
-                move.encode(king_pos, king_pos - 2 + 4 * is_kingside, castling=castle)
-            )
+    remove_ep_pinned(bd, king_pos, moves)
+    return moves
+
+
+def all_captures(bd):
+    """Generates all legal captures and queen promotions for the side to move.
+
+    If the side to move is in check, all moves that escape the check are
+    generated instead.
+    """
+    if bd.check:
+        return all_moves(bd)
+
+    moves = []
+    piece_list_offset = cs.SIDE_OFFSET * bd.black
+
+    indices = {
+        piece_list_offset + i
+        for i in range(16)
+        if bd.piece_list[piece_list_offset + i] != -1
+    }
+
+    king_pos = bd.piece_list[piece_list_offset + 4]
+    gen_king_moves(bd, king_pos, gen_step_captures, moves)
+    indices.remove(piece_list_offset + 4)
+
+    step = cs.UNIT_VEC[utils.square_diff(king_pos, bd.checker)]
+    indices = gen_pinned_pieces(bd, indices, king_pos, step, moves, CAPTURE_SELECT)
 
     for i in indices:
         loc = bd.piece_list[i]
         p_type = bd.array[loc] & 7
-        SELECT[p_type](bd, cs.VALID_VECS[p_type], loc, moves)
+        CAPTURE_SELECT[p_type](bd, cs.VALID_VECS[p_type], loc, moves)
 
+    remove_ep_pinned(bd, king_pos, moves)
     return moves
+
+
+def all_quiets(bd):
+    """Generates all legal quiet moves and underpromotions, except castling.
+
+    Together with all_captures and castle_moves, these are the moves of
+    all_moves. The side to move must not be in check.
+    """
+    moves = []
+    piece_list_offset = cs.SIDE_OFFSET * bd.black
+
+    indices = {
+        piece_list_offset + i
+        for i in range(16)
+        if bd.piece_list[piece_list_offset + i] != -1
+    }
+
+    king_pos = bd.piece_list[piece_list_offset + 4]
+    gen_king_moves(bd, king_pos, gen_step_quiets, moves)
+    indices.remove(piece_list_offset + 4)
+
+    indices = gen_pinned_pieces(bd, indices, king_pos, 0, moves, QUIET_SELECT)
+
+    for i in indices:
+        loc = bd.piece_list[i]
+        p_type = bd.array[loc] & 7
+        QUIET_SELECT[p_type](bd, cs.VALID_VECS[p_type], loc, moves)
+
+    return moves
+
+
+def castle_moves(bd):
+    """Generates the legal castle moves for the side to move, not in check."""
+    moves = []
+    gen_castle_moves(bd, bd.piece_list[cs.SIDE_OFFSET * bd.black + 4], moves)
+    return moves
+
+
+def staged_moves(bd):
+    """Yields the moves of all_moves in stages, generating each stage lazily.
+
+    Captures and queen promotions come first, then quiet moves and
+    underpromotions, then castling. A consumer that stops early never pays
+    for the later stages. If the side to move is in check, the evasions are
+    yielded as a single stage.
+    """
+    if bd.check:
+        yield from all_moves(bd)
+        return
+
+    yield from all_captures(bd)
+    yield from all_quiets(bd)
+    yield from castle_moves(bd)
@@ -0,0 +1,153 @@
+"""Module providing move ordering heuristics for the search."""
+
+from chess_engine import bitboard as bb, constants as cs, eval_tables as et, move
+
+MAX_PLY = 128
+
+
+def capture_value(mv):
+    """Returns the material won by a capture or promotion.
+
+    Args:
+        mv (int): The move, which carries the captured and promoted pieces.
+
+    Returns:
+        int: The value of the captured piece plus any promotion gain,
+            or 0 if the move is quiet.
+    """
+    victim = (mv >> move.CAPTURED_SHIFT) & 7
+    pr_type = (mv >> move.PROMOTION_SHIFT) & 7
+    value = et.PIECE_VALS[victim] if victim else 0
+
+    if pr_type:
+        value += et.PIECE_VALS[pr_type] - et.PIECE_VALS[cs.P]
+
+    return value
+
+
+def mvv_lva(mv):
+    """Scores a capture by most valuable victim, then least valuable attacker.
+
+    Args:
+        mv (int): The move, which carries the moving and captured pieces.
+
+    Returns:
+        int: The score of the capture, or 0 if the move is quiet.
+    """
+    value = capture_value(mv)
+
+    if not value:
+        return 0
+
+    return value * 100 - et.PIECE_VALS[(mv >> move.PIECE_SHIFT) & 7] // 100
+
+
+def history_index(mv):
+    """Returns the index of a move in the history table: piece, then destination."""
+    return (((mv >> move.PIECE_SHIFT) & 15) << 8) | ((mv >> 8) & 0xFF)
+
+
+class MoveOrderer:
+    """Orders moves so that the ones likely to cause a cutoff are tried first.
+
+    Attributes:
+        killers (list): Two quiet moves per ply that recently caused a
+            beta cutoff.
+        history (list): Scores for quiet moves indexed by piece code and
+            destination square, increased whenever the move causes a cutoff.
+    """
+
+    def __init__(self):
+        self.killers = [[0, 0] for _ in range(MAX_PLY)]
+        self.history = [0 for _ in range(16 << 8)]
+
+    def new_search(self):
+        """Forgets the killer moves and ages the history scores."""
+        self.killers = [[0, 0] for _ in range(MAX_PLY)]
+        self.history = [h >> 1 for h in self.history]
+
+    def record_cutoff(self, bd, mv, depth, ply):
+        """Updates the killer moves and history scores for a quiet move.
+
+        Args:
+            bd (Board): The board before the move is made.
+            mv (int): The move that caused a beta cutoff.
+            depth (int): The remaining depth at the node.
+            ply (int): The distance of the node from the root.
+        """
+        if mvv_lva(mv):
+            return
+
+        killers = self.killers[ply]
+        if killers[0] != mv:
+            killers[1] = killers[0]
+            killers[0] = mv
+
+        self.history[history_index(mv)] += depth * depth
+
+    def order(self, bd, tt_move, ply):
+        """Yields moves in the order they should be searched.
+
+        The stages are: the transposition table move, captures by MVV-LVA,
+        the killer moves of the ply, then quiet moves by history score.
+        Quiet moves are only generated once the captures have been searched,
+        or earlier if they are needed to check that the table move is valid.
+
+        Args:
+            bd (Board | BitBoard): The board to generate moves for.
+            tt_move (int): The best move stored for the position, or 0.
+            ply (int): The distance of the node from the root.
+
+        Yields:
+            int: The next move to search.
+        """
+        _, gen = bb.backend(bd)
+
+        if bd.check:  # evasions are generated together
+            captures, quiets = [], []
+            for mv in gen.all_moves(bd):
+                (captures if capture_value(mv) else quiets).append(mv)
+        else:
+            captures, quiets = gen.all_captures(bd), None
+
+        if tt_move and tt_move not in captures:
+            if quiets is None:
+                quiets = gen.all_quiets(bd) + gen.castle_moves(bd)
+            if tt_move not in quiets:
+                tt_move = 0
+
+        if tt_move:
+            yield tt_move
+
+        scored = []
+        for mv in captures:
+            if mv != tt_move:
+                scored.append((mvv_lva(mv), mv))
+
+        scored.sort(reverse=True)
+        for _, mv in scored:
+            yield mv
+
+        if quiets is None:
+            quiets = gen.all_quiets(bd) + gen.castle_moves(bd)
+
+        killers = self.killers[ply]
+        quiet_killers = []
+        scored = []
+
+        for mv in quiets:
+            if mv == tt_move:
+                continue
+
+            if mv in killers:
+                quiet_killers.append(mv)
+            else:
+                scored.append((self.history[history_index(mv)], mv))
+
+        for mv in killers:
+            if mv in quiet_killers:
+                yield mv
+
+        scored.sort(reverse=True)
+        for _, mv in scored:
+            yield mv
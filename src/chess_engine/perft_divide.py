@@ -1,72 +1,437 @@
 """Module providing perft and divide functions for testing."""
 
-from chess_engine import constants as cs, move, move_gen as mg
+import os
+from concurrent import futures
 
+from chess_engine import (
+    bitboard as bb,
+    board,
+    eval_tables as et,
+    fen_parser as fp,
+    hashing as hsh,
+    move,
+    move_gen as mg,
+)
 
-def perft(bd, depth):
+# the root is split at ply 2 if it has fewer moves than this per worker
+TASKS_PER_JOB = 4
+
+# the statistics counted by perft_stats, in the order of the columns of the
+# perft results tables on the Chess Programming Wiki
+STATS = (
+    "nodes",
+    "captures",
+    "ep",
+    "castles",
+    "promotions",
+    "checks",
+    "discovery_checks",
+    "double_checks",
+    "checkmates",
+)
+STATS_HEADINGS = (
+    "Depth",
+    "Nodes",
+    "Captures",
+    "E.p.",
+    "Castles",
+    "Promotions",
+    "Checks",
+    "Discovery Checks",
+    "Double Checks",
+    "Checkmates",
+)
+
+
+def perft(bd, depth, debug=False):
     """Returns the number of nodes at a given depth beginning from a position.
 
+    At depth 1 the legal moves are counted without being made, as the move
+    generators only produce legal moves, with one move per promotion piece.
+
     Args:
-        bd (Board): The board position to begin the traversal from.
+        bd (Board | BitBoard): The board position to begin the traversal from.
         depth (int): The depth at which the search should be halted.
+        debug (bool, optional): Whether to check the incrementally updated
+            board hash and scores against a full recomputation at every node.
+            Only supported for Board.
+
+    Raises:
+        RuntimeError: If debug is set and the board hash or scores are
+            incorrect.
 
     Returns:
         int: The number of nodes encountered at the search depth.
     """
+    if debug:
+        if bd.hash != hsh.zobrist_hash(bd):
+            raise RuntimeError(f"Incorrect board hash at {bd.to_fen()}")
+        if bd.scores != et.board_scores(bd.array):
+            raise RuntimeError(f"Incorrect board scores at {bd.to_fen()}")
+
     if depth == 0:
         return 1
 
-    moves = mg.all_moves(bd)
+    mover, gen = bb.backend(bd)
+    moves = gen.all_moves(bd)
+
+    if depth == 1 and not debug:  # debug checks the leaf boards too
+        return len(moves)
+
     nodes = 0
 
     for m in moves:
-        if move.make_move(m, bd) != -1:
-            nodes += perft(bd, depth - 1)
-            promoted = bd.prev_state[-1][-1]
-            move.unmake_move(m, bd)
+        mover.make_move(m, bd)
+        nodes += perft(bd, depth - 1, debug)
+        mover.unmake_move(m, bd)
+
+    return nodes
 
-            if promoted:
-                for pc in (cs.N, cs.B, cs.R):
-                    if move.make_move(m, bd, pr_type=pc) != -1:
-                        nodes += perft(bd, depth - 1)
-                        move.unmake_move(m, bd)
 
+def hashed_perft(bd, depth, table):
+    """Returns the perft result of a position, reusing cached subtree counts.
+
+    The node count below every position searched to depth 2 or more is
+    stored in the table, so subtrees reached again by a transposition are
+    only counted once. Depth 1 is counted in bulk, as in perft, which is
+    cheaper than a table lookup.
+
+    Args:
+        bd (Board | BitBoard): The board position to begin the traversal from.
+        depth (int): The depth at which the search should be halted.
+        table (PerftTable): The cache of node counts.
+
+    Returns:
+        int: The number of nodes encountered at the search depth.
+    """
+    mover, gen = bb.backend(bd)
+
+    if depth < 2:
+        return len(gen.all_moves(bd)) if depth else 1
+
+    nodes = table.probe(bd.hash, depth)
+    if nodes is not None:
+        return nodes
+
+    moves = gen.all_moves(bd)
+    nodes = 0
+
+    for m in moves:
+        mover.make_move(m, bd)
+        nodes += hashed_perft(bd, depth - 1, table)
+        mover.unmake_move(m, bd)
+
+    table.store(bd.hash, depth, nodes)
     return nodes
 
 
-def get_result(bd, mv, depth, total, pr_type=cs.Q):
-    """Outputs the perft result after a move is made from the starting position."""
-    if move.make_move(mv, bd, pr_type=pr_type) != -1:
-        n = perft(bd, depth - 1)
-        total += n
-        move.unmake_move(mv, bd)
-        return n, total
+def perft_stats(bd, depth, stats=None):
+    """Counts the nodes at a given depth and the kinds of move leading to them.
 
-    return 0, total
+    Captures include en passant captures. A discovery check is a single
+    check not given by the moved piece, and double checks are only counted
+    as double checks. Checkmates are found by generating the replies to
+    the leaf moves which give check.
 
+    Args:
+        bd (Board): The board position to begin the traversal from.
+        depth (int): The depth at which the search should be halted.
+        stats (dict, optional): The counts to add to. Defaults to new
+            counts of zero.
 
-def divide(bd, depth, stdout=None):
-    """Prints every initial move from a position and how many child nodes it has.
+    Returns:
+        dict: The count of each of STATS at the search depth.
+    """
+    if stats is None:
+        stats = dict.fromkeys(STATS, 0)
+
+    if depth == 0:
+        stats["nodes"] += 1
+        return stats
+
+    moves = mg.all_moves(bd)
+
+    if depth > 1:
+        for m in moves:
+            move.make_move(m, bd)
+            perft_stats(bd, depth - 1, stats)
+            move.unmake_move(m, bd)
+
+        return stats
+
+    stats["nodes"] += len(moves)
+
+    for m in moves:
+        _, dest, castling = move.decode(m)
+
+        if m & move.CAPTURE:
+            stats["captures"] += 1
+        if m & move.EN_PASSANT:
+            stats["ep"] += 1
+        if castling:
+            stats["castles"] += 1
+        if move.promotion_type(m):
+            stats["promotions"] += 1
+
+        move.make_move(m, bd)
+
+        if bd.check:
+            stats["checks"] += 1
+            if bd.check == 3:
+                stats["double_checks"] += 1
+            elif bd.checker != dest and not castling:  # castling checks by rook
+                stats["discovery_checks"] += 1
+            if not mg.all_moves(bd):
+                stats["checkmates"] += 1
+
+        move.unmake_move(m, bd)
+
+    return stats
+
+
+def print_stats(bd, depth, stdout=None):
+    """Prints a table of the perft statistics of a position at each depth.
 
     Args:
         bd (Board): The board position to begin the traversal from.
+        depth (int): The greatest depth to print statistics for.
+        stdout (SupportsWrite[str], optional): The file object the
+            print function should write to. Defaults to None.
+    """
+    widths = [max(len(heading), 10) for heading in STATS_HEADINGS]
+    widths[0] = len(STATS_HEADINGS[0])
+
+    print(
+        "  ".join(f"{h:>{w}}" for h, w in zip(STATS_HEADINGS, widths)), file=stdout
+    )
+
+    for d in range(1, depth + 1):
+        stats = perft_stats(bd, d)
+        row = (d,) + tuple(stats[name] for name in STATS)
+        print("  ".join(f"{n:>{w}}" for n, w in zip(row, widths)), file=stdout)
+
+
+def perft_task(packed, bitboard, moves, depth):
+    """Counts the nodes below a line of moves, in a worker process.
+
+    Args:
+        packed (bytes): The root position, packed by Board.pack.
+        bitboard (bool): Whether to count on a BitBoard.
+        moves (tuple): The moves to make from the root position.
+        depth (int): The perft depth of the root position.
+
+    Returns:
+        int: The number of nodes at the search depth below the line.
+    """
+    bd = board.Board.unpack(packed)
+    if bitboard:
+        bd = bb.BitBoard(bd)
+
+    mover, _ = bb.backend(bd)
+    for mv in moves:
+        mover.make_move(mv, bd)
+
+    return perft(bd, depth - len(moves))
+
+
+def read_checkpoint(path, fen, depth):
+    """Reads the node counts recorded in a checkpoint file.
+
+    The file starts with a line holding the depth and FEN of the root
+    position, followed by one line per finished task: the moves of the
+    task and the number of nodes below them. A line cut short by a crash
+    is ignored. If the file does not exist or has no complete first line,
+    the header is written and no tasks are finished.
+
+    Args:
+        path (str): The path of the checkpoint file.
+        fen (str): The FEN of the root position.
+        depth (int): The perft depth of the root position.
+
+    Raises:
+        ValueError: If the file is a checkpoint of another position or depth.
+
+    Returns:
+        dict: Associates the moves of each finished task, as a
+            space-separated string, with its node count.
+    """
+    header = f"{depth} {fen}\n"
+    lines = []
+
+    if os.path.exists(path):
+        with open(path, "r", encoding="UTF-8") as f:
+            lines = f.readlines()
+
+    if not lines or not lines[0].endswith("\n"):
+        with open(path, "w", encoding="UTF-8") as f:
+            f.write(header)
+            f.flush()
+            os.fsync(f.fileno())
+        return {}
+
+    if lines[0] != header:
+        raise ValueError(f"{path} is not a checkpoint of perft {header.strip()}")
+
+    done = {}
+
+    for line in lines[1:]:
+        if line.endswith("\n"):
+            moves, n = line.rsplit(" ", 1)
+            done[moves] = int(n)
+
+    return done
+
+
+def write_checkpoint(path, moves, n):
+    """Appends a finished task to a checkpoint file and flushes it to disk."""
+    with open(path, "a", encoding="UTF-8") as f:
+        f.write(f"{moves} {n}\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def run_tasks(packed, bitboard, tasks, depth, jobs):
+    """Yields each task and its node count as soon as it is finished.
+
+    Args:
+        packed (bytes): The root position, packed by Board.pack.
+        bitboard (bool): Whether to count on a BitBoard.
+        tasks (list): The lines of moves to count the nodes below.
+        depth (int): The perft depth of the root position.
+        jobs (int): The number of worker processes. If less than 2, the
+            tasks are run in this process.
+
+    Yields:
+        tuple: A task and the number of nodes below it.
+    """
+    if jobs < 2:
+        for task in tasks:
+            yield task, perft_task(packed, bitboard, task, depth)
+        return
+
+    with futures.ProcessPoolExecutor(jobs) as pool:
+        pending = {
+            pool.submit(perft_task, packed, bitboard, task, depth): task
+            for task in tasks
+        }
+
+        try:
+            for future in futures.as_completed(pending):
+                yield pending[future], future.result()
+        except BaseException:
+            # don't wait for tasks which were never started
+            pool.shutdown(cancel_futures=True)
+            raise
+
+
+def root_counts(bd, depth, jobs, checkpoint=None):
+    """Counts the nodes below each root move with a pool of worker processes.
+
+    Each root move is a task, unless the root has few moves for the number
+    of workers, in which case each reply to a root move is a task. Workers
+    receive the position as the 32 bytes of Board.pack.
+
+    With a checkpoint file, the root is always split at ply 2, so that a
+    run can be resumed with any number of workers. Each finished task is
+    recorded in the file, and tasks recorded by an earlier run are skipped.
+
+    Args:
+        bd (Board | BitBoard): The board position to begin the traversal from.
+        depth (int): The depth at which the search should be halted.
+        jobs (int): The number of worker processes.
+        checkpoint (str, optional): The path of the checkpoint file.
+
+    Returns:
+        dict: The number of nodes below each root move, in generation order.
+    """
+    mover, gen = bb.backend(bd)
+    root_moves = gen.all_moves(bd)
+    split = depth > 2 and (
+        checkpoint is not None or len(root_moves) < TASKS_PER_JOB * jobs
+    )
+    tasks = []
+
+    for mv in root_moves:
+        if split:
+            mover.make_move(mv, bd)
+            tasks += [(mv, reply) for reply in gen.all_moves(bd)]
+            mover.unmake_move(mv, bd)
+        else:
+            tasks.append((mv,))
+
+    bitboard = isinstance(bd, bb.BitBoard)
+    packed = (fp.fen_to_board(bd.to_fen()) if bitboard else bd).pack()
+    counts = dict.fromkeys(root_moves, 0)
+    done = read_checkpoint(checkpoint, bd.to_fen(), depth) if checkpoint else {}
+    lines = {task: " ".join(move.int_to_string(mv) for mv in task) for task in tasks}
+    pending = []
+
+    for task in tasks:
+        if lines[task] in done:
+            counts[task[0]] += done[lines[task]]
+        else:
+            pending.append(task)
+
+    for task, n in run_tasks(packed, bitboard, pending, depth, jobs):
+        counts[task[0]] += n
+        if checkpoint:
+            write_checkpoint(checkpoint, lines[task], n)
+
+    return counts
+
+
+def parallel_perft(bd, depth, jobs, checkpoint=None):
+    """Returns the perft result of a position, counted by worker processes.
+
+    Args:
+        bd (Board | BitBoard): The board position to begin the traversal from.
+        depth (int): The depth at which the search should be halted.
+        jobs (int): The number of worker processes.
+        checkpoint (str, optional): The path of a checkpoint file to record
+            finished subtrees in and resume from (see root_counts).
+
+    Returns:
+        int: The number of nodes encountered at the search depth.
+    """
+    if depth < 2 or (jobs < 2 and checkpoint is None):
+        return perft(bd, depth)
+    return sum(root_counts(bd, depth, jobs, checkpoint).values())
+
+
+def get_result(bd, mv, depth, total):
+    """Outputs the perft result after a move is made from the starting position."""
+    mover, _ = bb.backend(bd)
+    mover.make_move(mv, bd)
+    n = perft(bd, depth - 1)
+    total += n
+    mover.unmake_move(mv, bd)
+    return n, total
+
+
+def divide(bd, depth, stdout=None, jobs=1, checkpoint=None):
+    """Prints every initial move from a position and how many child nodes it has.
+
+    Args:
+        bd (Board | BitBoard): The board position to begin the traversal from.
         depth (int): The depth at which the search should be halted.
         stdout (SupportsWrite[str], optional): The file object the
             print function should write to. Defaults to None.
+        jobs (int, optional): The number of worker processes. The output is
+            the same for any number. Defaults to 1.
+        checkpoint (str, optional): The path of a checkpoint file to record
+            finished subtrees in and resume from (see root_counts).
     """
-    moves = mg.all_moves(bd)
     total = 0
 
-    for m in moves:
-        mstr = move.int_to_string(bd, m)
-        n, total = get_result(bd, m, depth, total)
-        if n:
-            print(f"{mstr} {n}", file=stdout)
+    if (jobs > 1 or checkpoint) and depth > 1:
+        results = root_counts(bd, depth, jobs, checkpoint).items()
+    else:
+        _, gen = bb.backend(bd)
+        results = ((m, get_result(bd, m, depth, 0)[0]) for m in gen.all_moves(bd))
 
-        if len(mstr) == 5:  # promotion
-            for pc in (cs.N, cs.B, cs.R):
-                mstr = mstr[:4] + cs.LETTERS[pc + cs.BVAL].lower()
-                n, total = get_result(bd, m, depth, total, pr_type=pc)
-                print(f"{mstr} {n}", file=stdout)
+    for m, n in results:
+        total += n
+        if n:
+            print(f"{move.int_to_string(m)} {n}", file=stdout)
 
     print(f"\n{total}", file=stdout)
@@ -0,0 +1,65 @@
+"""Module providing files of packed positions, read through a memory map."""
+
+import mmap
+import os
+
+from chess_engine import board
+
+RECORD_SIZE = board.PACKED_POSITION.size
+
+
+def write_positions(path, boards):
+    """Writes boards to a position file, one packed record each.
+
+    Args:
+        path (str): The path of the file to write.
+        boards (iterable): The boards to write.
+
+    Returns:
+        int: The number of positions written.
+    """
+    count = 0
+
+    with open(path, "wb") as f:
+        for bd in boards:
+            f.write(bd.pack())
+            count += 1
+
+    return count
+
+
+def count_positions(path):
+    """Returns the number of positions in a position file."""
+    size = os.path.getsize(path)
+
+    if size % RECORD_SIZE:
+        raise ValueError(f"{path} is not a whole number of positions")
+
+    return size // RECORD_SIZE
+
+
+def iter_positions(path, start=0, stop=None):
+    """Yields the boards in a position file.
+
+    The file is memory-mapped, so each record is only read from disk when
+    its board is unpacked, and files larger than memory can be iterated.
+
+    Args:
+        path (str): The path of the position file.
+        start (int, optional): The index of the first position to yield.
+        stop (int, optional): The index after the last position to yield.
+            Defaults to the end of the file.
+
+    Yields:
+        Board: The board for each position, in file order.
+    """
+    count = count_positions(path)
+    stop = count if stop is None else min(stop, count)
+
+    if start >= stop:
+        return
+
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for offset in range(start * RECORD_SIZE, stop * RECORD_SIZE, RECORD_SIZE):
+                yield board.Board.unpack(mm, offset)
@@ -0,0 +1,268 @@
+"""Module providing fixed-size transposition tables for the search and perft."""
+
+from multiprocessing import shared_memory
+
+EXACT, LOWER, UPPER = 0, 1, 2  # bound types of a stored score
+
+DEFAULT_SIZE_MB = 16
+SLOT_WORDS = 2  # a 64-bit key and a 64-bit packed data word
+BUCKET_SLOTS = 2  # depth-preferred slot, always-replace slot
+BUCKET_WORDS = SLOT_WORDS * BUCKET_SLOTS
+BUCKET_BYTES = 8 * BUCKET_WORDS
+
+# layout of the data word:
+# bits 0-31: best move, bits 32-51: score, bits 52-59: depth,
+# bits 60-61: bound type, bits 62-63: search generation
+SCORE_SHIFT, DEPTH_SHIFT, FLAG_SHIFT, AGE_SHIFT = 32, 52, 60, 62
+MOVE_MASK = 0xFFFFFFFF
+SCORE_MASK = 0xFFFFF
+SCORE_OFF = 1 << 19
+DEPTH_MASK = 0xFF
+AGE_MASK = 3
+
+# layout of a perft data word: bits 0-7: depth, bits 8-63: node count
+NODES_SHIFT = 8
+
+
+def pack(mv, score, depth, flag, age):
+    """Packs the information of a table entry into a 64-bit integer."""
+    return (
+        mv
+        | ((score + SCORE_OFF) << SCORE_SHIFT)
+        | (depth << DEPTH_SHIFT)
+        | (flag << FLAG_SHIFT)
+        | (age << AGE_SHIFT)
+    )
+
+
+def table_bytes(size_mb):
+    """Returns the number of bytes used by a table of at most size_mb megabytes."""
+    n_buckets = max(1, (size_mb << 20) // BUCKET_BYTES)
+    return (1 << (n_buckets.bit_length() - 1)) * BUCKET_BYTES
+
+
+def unpack(data):
+    """Extracts (best move, score, depth, bound type) from a data word."""
+    return (
+        data & MOVE_MASK,
+        ((data >> SCORE_SHIFT) & SCORE_MASK) - SCORE_OFF,
+        (data >> DEPTH_SHIFT) & DEPTH_MASK,
+        (data >> FLAG_SHIFT) & 3,
+    )
+
+
+class TranspositionTable:
+    """A hash table of searched positions with a fixed memory footprint.
+
+    Each bucket holds two slots. The first slot keeps the deepest entry of
+    the current search and the second slot is always replaced. The key of
+    each slot is stored xored with its data word, so an entry is only found
+    if both words were written together, which lets several processes share
+    a table without locking.
+
+    Attributes:
+        size_mb (int): The maximum size of the table in megabytes.
+        n_buckets (int): The number of buckets, always a power of two.
+        table (memoryview): The entries, stored as [key ^ data, data]
+            64-bit word pairs.
+        age (int): The generation of the current search.
+    """
+
+    def __init__(self, size_mb=DEFAULT_SIZE_MB, buffer=None):
+        self.size_mb = size_mb
+        n_bytes = table_bytes(size_mb)
+        self.n_buckets = n_bytes // BUCKET_BYTES
+        self.mask = self.n_buckets - 1
+
+        if buffer is None:
+            buffer = bytearray(n_bytes)
+
+        self.table = memoryview(buffer)[:n_bytes].cast("Q")
+        self.age = 0
+
+    def __len__(self):
+        return self.n_buckets * BUCKET_SLOTS
+
+    def clear(self):
+        """Removes all entries from the table."""
+        self.table.cast("B")[:] = bytes(self.n_buckets * BUCKET_BYTES)
+        self.age = 0
+
+    def new_search(self):
+        """Marks existing entries as belonging to a previous search."""
+        self.age = (self.age + 1) & AGE_MASK
+
+    def hashfull(self):
+        """Returns the permille of slots used by the current search.
+
+        Only the first 1000 slots are sampled, as for the UCI hashfull field.
+        """
+        n_slots = min(1000, len(self))
+        table = self.table
+        used = 0
+
+        for i in range(1, 2 * n_slots, SLOT_WORDS):
+            data = table[i]
+            if data and data >> AGE_SHIFT == self.age:
+                used += 1
+
+        return used * 1000 // n_slots
+
+    def probe(self, b_hash):
+        """Looks up a board hash in the table.
+
+        Args:
+            b_hash (int): The hash of the board position.
+
+        Returns:
+            tuple: (best move, score, depth, bound type), or None if the
+                position is not stored.
+        """
+        i = (b_hash & self.mask) * BUCKET_WORDS
+        table = self.table
+
+        data = table[i + 1]
+        if table[i] ^ data == b_hash:
+            return unpack(data)
+
+        data = table[i + 3]
+        if table[i + 2] ^ data == b_hash:
+            return unpack(data)
+
+        return None
+
+    def store(self, b_hash, mv, score, depth, flag):
+        """Stores the result of a search in the table.
+
+        The depth-preferred slot is overwritten if it holds the same
+        position, an entry from an earlier search or a shallower entry.
+        Otherwise the entry goes into the always-replace slot.
+
+        Args:
+            b_hash (int): The hash of the board position.
+            mv (int): The best move found, or 0 if there is none.
+            score (int): The score of the position.
+            depth (int): The remaining depth the position was searched to.
+            flag (int): Whether the score is exact, a lower or upper bound.
+        """
+        i = (b_hash & self.mask) * BUCKET_WORDS
+        table = self.table
+        old = table[i + 1]
+
+        if not (
+            table[i] ^ old == b_hash
+            or (old >> AGE_SHIFT) != self.age
+            or depth >= (old >> DEPTH_SHIFT) & DEPTH_MASK
+        ):
+            i += SLOT_WORDS
+            old = table[i + 1]
+
+        if not mv and table[i] ^ old == b_hash:  # keep the previous best move
+            mv = old & MOVE_MASK
+
+        data = pack(mv, score, depth, flag, self.age)
+        table[i] = b_hash ^ data
+        table[i + 1] = data
+
+
+class SharedTranspositionTable(TranspositionTable):
+    """A transposition table in shared memory that several processes can use.
+
+    The process that creates the table owns the shared memory block. Other
+    processes attach to it by name.
+
+    Attributes:
+        owner (bool): Whether this process created the shared memory block.
+        shm (SharedMemory): The shared memory block holding the entries.
+        name (str): The name of the shared memory block.
+    """
+
+    def __init__(self, size_mb=DEFAULT_SIZE_MB, name=None):
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(
+            name=name, create=self.owner, size=table_bytes(size_mb)
+        )
+        self.name = self.shm.name
+        super().__init__(size_mb, self.shm.buf)
+
+    def close(self):
+        """Detaches from the shared memory, freeing it if this process owns it."""
+        self.table.release()
+        self.shm.close()
+
+        if self.owner:
+            self.shm.unlink()
+
+
+class PerftTable:
+    """A hash table of perft results with a fixed memory footprint.
+
+    Each slot holds the node count below one position at one depth. A slot
+    is only replaced by a result of at least the same depth, as deeper
+    results save the most work when they are found again. As in
+    TranspositionTable, the key is stored xored with the data word, and an
+    entry is only returned if both the full key and the depth match.
+
+    Attributes:
+        size_mb (int): The maximum size of the table in megabytes.
+        n_slots (int): The number of slots, always a power of two.
+        table (memoryview): The entries, stored as [key ^ data, data]
+            64-bit word pairs.
+        probes (int): The number of lookups made.
+        hits (int): The number of lookups which found a stored result.
+    """
+
+    def __init__(self, size_mb=DEFAULT_SIZE_MB):
+        self.size_mb = size_mb
+        n_bytes = table_bytes(size_mb)
+        self.n_slots = n_bytes // (8 * SLOT_WORDS)
+        self.mask = self.n_slots - 1
+        self.table = memoryview(bytearray(n_bytes)).cast("Q")
+        self.probes = 0
+        self.hits = 0
+
+    def __len__(self):
+        return self.n_slots
+
+    def hit_rate(self):
+        """Returns the fraction of lookups which found a stored result."""
+        return self.hits / self.probes if self.probes else 0.0
+
+    def probe(self, b_hash, depth):
+        """Looks up the perft result of a position.
+
+        Args:
+            b_hash (int): The hash of the board position.
+            depth (int): The perft depth.
+
+        Returns:
+            int: The number of nodes at the given depth below the position,
+                or None if it is not stored.
+        """
+        self.probes += 1
+        i = (b_hash & self.mask) * SLOT_WORDS
+        table = self.table
+        data = table[i + 1]
+
+        if table[i] ^ data == b_hash and data & DEPTH_MASK == depth:
+            self.hits += 1
+            return data >> NODES_SHIFT
+
+        return None
+
+    def store(self, b_hash, depth, nodes):
+        """Stores the perft result of a position, unless its slot is deeper.
+
+        Args:
+            b_hash (int): The hash of the board position.
+            depth (int): The perft depth.
+            nodes (int): The number of nodes at the given depth below the
+                position.
+        """
+        i = (b_hash & self.mask) * SLOT_WORDS
+        table = self.table
+
+        if depth >= table[i + 1] & DEPTH_MASK:
+            data = (nodes << NODES_SHIFT) | depth
+            table[i] = b_hash ^ data
+            table[i + 1] = data
@@ -0,0 +1,157 @@
+import io
+import os
+import unittest
+
+from chess_engine import (
+    bitboard as bb,
+    board,
+    fen_parser as fp,
+    move,
+    move_gen as mg,
+    perft_divide as pd,
+)
+
+EPD_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "perft_results", "standard.epd"
+)
+
+
+class TestBitBoard(unittest.TestCase):
+    def assert_same_tree(self, array_board, bit_board, depth):
+        self.assertCountEqual(mg.all_moves(array_board), bb.all_moves(bit_board))
+        self.assertEqual(array_board.hash, bit_board.hash)
+        self.assertEqual(array_board.scores, bit_board.scores)
+        self.assertEqual(bool(array_board.check), bool(bit_board.check))
+
+        if depth == 0:
+            return
+
+        for mv in mg.all_moves(array_board):
+            move.make_move(mv, array_board)
+            bb.make_move(mv, bit_board)
+            self.assert_same_tree(array_board, bit_board, depth - 1)
+            move.unmake_move(mv, array_board)
+            bb.unmake_move(mv, bit_board)
+
+    def test_bitboard_converts_starting_position(self):
+        # ARRANGE
+        test_board = board.Board()
+
+        # ACT
+        bit_board = bb.BitBoard(test_board)
+
+        # ASSERT
+        self.assertEqual(bit_board.to_fen(), test_board.to_fen())
+        self.assertEqual(bit_board.hash, test_board.hash)
+
+    def test_unmake_move_restores_bitboard(self):
+        # ARRANGE
+        bit_board = bb.from_fen(
+            "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+        )
+        expected = bb.from_fen(bit_board.to_fen())
+
+        # ACT
+        for mv in bb.all_moves(bit_board):
+            bb.make_move(mv, bit_board)
+            bb.unmake_move(mv, bit_board)
+
+        # ASSERT
+        self.assertEqual(bit_board, expected)
+        self.assertEqual(bit_board.mailbox, expected.mailbox)
+        self.assertEqual(bit_board.hash, expected.hash)
+
+    def test_all_moves_matches_array_board_on_tricky_positions(self):
+        # ARRANGE
+        fens = (
+            "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+            "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+            "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+            "8/8/8/K2pP2q/8/8/8/7k w - d6 0 2",
+        )
+
+        for fen in fens:
+            # ACT & ASSERT
+            with self.subTest(fen=fen):
+                self.assert_same_tree(fp.fen_to_board(fen), bb.from_fen(fen), 2)
+
+    def test_perft_matches_epd_suite_on_both_boards(self):
+        # ARRANGE
+        results = fp.iter_epd(EPD_PATH)
+
+        for array_board, operations in results:
+            fen = array_board.to_fen()
+
+            for depth in (1, 2):
+                # ACT
+                array_nodes = pd.perft(array_board, depth)
+                bit_nodes = pd.perft(bb.BitBoard(array_board), depth)
+
+                # ASSERT
+                with self.subTest(fen=fen, depth=depth):
+                    self.assertEqual(bit_nodes, array_nodes)
+                    if f"D{depth}" in operations:
+                        self.assertEqual(bit_nodes, int(operations[f"D{depth}"]))
+
+    def test_divide_on_bitboard_reports_total(self):
+        # ARRANGE
+        bit_board = bb.BitBoard()
+        out = io.StringIO()
+
+        # ACT
+        pd.divide(bit_board, 3, stdout=out)
+
+        # ASSERT
+        self.assertEqual(out.getvalue().split()[-1], "8902")
+
+    def test_staged_moves_match_array_board_on_epd_suite(self):
+        # ARRANGE
+        results = fp.iter_epd(EPD_PATH)
+
+        for array_board, _ in results:
+            bit_board = bb.BitBoard(array_board)
+
+            # ACT & ASSERT
+            with self.subTest(fen=array_board.to_fen()):
+                self.assertCountEqual(
+                    bb.all_captures(bit_board), mg.all_captures(array_board)
+                )
+                if not array_board.check:
+                    self.assertCountEqual(
+                        bb.all_quiets(bit_board), mg.all_quiets(array_board)
+                    )
+                    self.assertCountEqual(
+                        bb.castle_moves(bit_board), mg.castle_moves(array_board)
+                    )
+
+    def test_null_move_matches_array_board_and_is_reversed(self):
+        # ARRANGE
+        fen = "rnbqkbnr/ppp1pppp/8/8/3pP3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 3"
+        array_board = fp.fen_to_board(fen)
+        bit_board = bb.from_fen(fen)
+
+        # ACT
+        move.make_null_move(array_board)
+        bb.make_null_move(bit_board)
+        null_hash = bit_board.hash
+        bb.unmake_null_move(bit_board)
+
+        # ASSERT
+        self.assertEqual(null_hash, array_board.hash)
+        self.assertEqual(bit_board, bb.from_fen(fen))
+        self.assertEqual(bit_board.hash, bb.from_fen(fen).hash)
+
+    def test_is_repetition_uses_moves_made_before_conversion(self):
+        # ARRANGE
+        array_board = board.Board()
+        for mstr in ("g1f3", "g8f6", "f3g1"):
+            move.make_move_from_string(mstr, array_board)
+        bit_board = bb.BitBoard(array_board)
+
+        # ACT
+        before = bit_board.is_repetition()
+        bb.make_move(move.string_to_int(array_board, "f6g8"), bit_board)
+
+        # ASSERT
+        self.assertFalse(before)
+        self.assertTrue(bit_board.is_repetition())
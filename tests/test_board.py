@@ -1,6 +1,6 @@
 import unittest
 
-from chess_engine import board, fen_parser as fp
+from chess_engine import board, eval_tables as et, fen_parser as fp, move
 
 
 class TestBoard(unittest.TestCase):
@@ -50,3 +50,160 @@ class TestBoard(unittest.TestCase):
 
         # ASSERT
         self.assertEqual(b_string, test_string)
+
+    def test_scores_are_equal_in_starting_position(self):
+        # ARRANGE
+        test_board = board.Board()
+
+        # ACT
+        white, black = test_board.scores
+
+        # ASSERT
+        self.assertEqual(white, black)
+
+    def test_scores_are_updated_by_make_and_unmake_move(self):
+        # ARRANGE
+        test_board = fp.fen_to_board(
+            "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+        )
+        first_scores = list(test_board.scores)
+        test_moves = ("a2a4", "b4a3", "e1c1", "h3g2", "d5e6", "g2h1q")
+
+        # ACT
+        for mstr in test_moves:
+            move.make_move_from_string(mstr, test_board)
+            self.assertEqual(test_board.scores, et.board_scores(test_board.array))
+
+        for mstr in reversed(test_moves):
+            move.unmake_move_from_string(mstr, test_board)
+
+        # ASSERT
+        self.assertEqual(test_board.scores, first_scores)
+
+    def test_undo_stack_grows_past_its_initial_size(self):
+        # ARRANGE
+        test_board = board.Board()
+        expected = board.Board()
+        shuffle = ("g1f3", "g8f6", "f3g1", "f6g8")
+
+        # ACT
+        for _ in range(board.UNDO_SIZE // 2):
+            for mstr in shuffle:
+                move.make_move_from_string(mstr, test_board)
+
+        ply = test_board.ply
+
+        for _ in range(board.UNDO_SIZE // 2):
+            for mstr in reversed(shuffle):
+                move.unmake_move_from_string(mstr, test_board)
+
+        # ASSERT
+        self.assertEqual(ply, 2 * board.UNDO_SIZE)
+        self.assertEqual(test_board, expected)
+        self.assertEqual(test_board.hash, expected.hash)
+        self.assertEqual(test_board.ply, 0)
+
+    def test_copy_is_independent_of_original(self):
+        # ARRANGE
+        test_board = fp.fen_to_board(
+            "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+        )
+        move.make_move_from_string("e1g1", test_board)
+        expected_fen = test_board.to_fen()
+
+        # ACT
+        copied = test_board.copy()
+        move.make_move_from_string("h3g2", copied)
+        move.unmake_move_from_string("h3g2", copied)
+        move.unmake_move_from_string("e1g1", copied)
+
+        # ASSERT
+        self.assertEqual(test_board.to_fen(), expected_fen)
+        self.assertEqual(test_board.ply, 1)
+        self.assertEqual(
+            copied.to_fen(),
+            "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+        )
+        self.assertEqual(copied.hash, fp.fen_to_board(copied.to_fen()).hash)
+
+    def test_pack_returns_32_bytes(self):
+        # ARRANGE
+        test_board = board.Board()
+
+        # ACT
+        data = test_board.pack()
+
+        # ASSERT
+        self.assertEqual(len(data), 32)
+
+    def test_unpack_restores_packed_positions(self):
+        # ARRANGE
+        fens = (
+            "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+            "n1n5/PPPk4/8/8/8/8/4Kppp/5N1N b - - 0 1",
+            "8/8/8/K2pP2q/8/8/8/7k w - d6 0 2",
+            "rnbqkbnr/ppp2Qpp/8/3pp3/2B1P3/8/PPPP1PPP/RNB1K1NR b KQkq - 0 4",
+            "r1b1k2r/pppp1ppp/3Pp3/8/3P3N/3P4/PP2BKPP/RNBQ1R2 b k - 71 300",
+        )
+
+        for fen in fens:
+            test_board = fp.fen_to_board(fen)
+
+            # ACT
+            unpacked = board.Board.unpack(test_board.pack())
+
+            # ASSERT
+            with self.subTest(fen=fen):
+                self.assertEqual(unpacked, test_board)
+                self.assertEqual(unpacked.piece_list, test_board.piece_list)
+                self.assertEqual(unpacked.hash, test_board.hash)
+                self.assertEqual(unpacked.check, test_board.check)
+                self.assertEqual(unpacked.checker, test_board.checker)
+
+    def test_is_repetition_detects_repeated_position(self):
+        # ARRANGE
+        test_board = board.Board()
+        shuffle = ("g1f3", "g8f6", "f3g1", "f6g8")
+        repeated = []
+
+        # ACT
+        for mstr in shuffle:
+            repeated.append(test_board.is_repetition())
+            move.make_move_from_string(mstr, test_board)
+
+        repeated.append(test_board.is_repetition())
+
+        # ASSERT
+        self.assertEqual(repeated, [False, False, False, False, True])
+
+    def test_is_repetition_only_scans_since_last_pawn_move(self):
+        # ARRANGE
+        test_board = board.Board()
+        for mstr in ("g1f3", "g8f6", "f3g1", "f6g8", "e2e3", "e7e6"):
+            move.make_move_from_string(mstr, test_board)
+
+        # ACT
+        for mstr in ("g1f3", "g8f6", "f3g1"):
+            move.make_move_from_string(mstr, test_board)
+
+        before_repetition = test_board.is_repetition()
+        move.make_move_from_string("f6g8", test_board)
+
+        # ASSERT
+        self.assertFalse(before_repetition)
+        self.assertTrue(test_board.is_repetition())
+        self.assertEqual(test_board.halfmove_clock, 4)
+
+    def test_is_repetition_does_not_scan_past_null_move(self):
+        # ARRANGE
+        test_board = board.Board()
+
+        # ACT
+        move.make_null_move(test_board)
+        move.make_move_from_string("g8f6", test_board)
+        move.make_null_move(test_board)
+        move.make_move_from_string("f6g8", test_board)
+
+        # ASSERT
+        self.assertEqual(test_board.hash, board.Board().hash)
+        self.assertFalse(test_board.is_repetition())
@@ -1,9 +1,36 @@
+import multiprocessing as mp
 import unittest
 
-from chess_engine import engine, fen_parser as fp
+from chess_engine import (
+    bitboard as bb,
+    board,
+    engine,
+    fen_parser as fp,
+    limits as lm,
+    move,
+    move_gen as mg,
+    move_order as mo,
+    transposition as tt,
+)
 
 
 class TestEngine(unittest.TestCase):
+    def test_evaluate_returns_material_balance_for_side_to_move(self):
+        # ARRANGE
+        test_board = fp.fen_to_board(
+            "rnbqkbnr/ppp1pppp/8/3p4/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2"
+        )
+        move.make_move_from_string("e4d5", test_board)
+
+        # ACT
+        black_score = engine.evaluate(test_board)
+        test_board.switch_side()
+        white_score = engine.evaluate(test_board)
+
+        # ASSERT
+        self.assertLess(black_score, -50)
+        self.assertEqual(black_score, -white_score)
+
     def test_find_move_position_1_preserves_board(self):
         # ARRANGE
         b_string = "r1b1k2r/pppp1ppp/3Pp3/8/3P3N/3P4/PP2BKPP/RNBQ1R2 b k - 0 11"
@@ -11,8 +38,269 @@ class TestEngine(unittest.TestCase):
         test_board_2 = fp.fen_to_board(b_string)
 
         # ACT
-        m = engine.find_move(test_board_1, 640)
+        m = engine.find_move(test_board_1, 640, depth_lim=3)
 
         # ASSERT
         print(m)
         self.assertEqual(test_board_1, test_board_2)
+
+    def test_quiescence_preserves_board(self):
+        # ARRANGE
+        b_string = (
+            "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+        )
+        test_board_1 = fp.fen_to_board(b_string)
+        test_board_2 = fp.fen_to_board(b_string)
+
+        # ACT
+        engine.quiescence(
+            test_board_1, -engine.INF, engine.INF, engine.SearchInfo(), 0
+        )
+
+        # ASSERT
+        self.assertEqual(test_board_1, test_board_2)
+
+    def test_quiescence_scores_checkmate(self):
+        # ARRANGE
+        test_board = fp.fen_to_board("6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1")
+        move.make_move_from_string("a1a8", test_board)
+
+        # ACT
+        score = engine.quiescence(
+            test_board, -engine.INF, engine.INF, engine.SearchInfo(), 1
+        )
+
+        # ASSERT
+        self.assertEqual(score, 1 - engine.MATE)
+
+    def test_find_move_finds_mate_in_one(self):
+        # ARRANGE
+        test_board = fp.fen_to_board("6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1")
+
+        # ACT
+        m = engine.find_move(test_board, 10, depth_lim=3)
+
+        # ASSERT
+        self.assertEqual(m, "a1a8")
+
+    def test_find_move_with_helper_processes_finds_mate_in_one(self):
+        # ARRANGE
+        test_board = fp.fen_to_board("6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1")
+
+        # ACT
+        m = engine.find_move(test_board, 10, depth_lim=3, threads=2)
+
+        # ASSERT
+        self.assertEqual(m, "a1a8")
+        self.assertEqual(test_board.to_fen(), "6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1")
+
+    def test_find_move_with_helper_processes_requires_shared_table(self):
+        # ARRANGE
+        test_board = board.Board()
+
+        # ACT / ASSERT
+        with self.assertRaises(ValueError):
+            engine.find_move(test_board, 1, 1, tt.TranspositionTable(1), threads=2)
+
+    def test_aspiration_search_widens_window_to_find_score(self):
+        # ARRANGE
+        test_board = fp.fen_to_board("6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1")
+        info = engine.SearchInfo()
+
+        # ACT
+        score = engine.aspiration_search(test_board, info, 3, 0)
+
+        # ASSERT
+        self.assertEqual(score, engine.MATE - 1)
+        self.assertGreater(info.aspiration_fails, 0)
+
+    def test_find_move_stopped_by_node_limit_preserves_board(self):
+        # ARRANGE
+        fen = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+        test_board = fp.fen_to_board(fen)
+        limits = lm.SearchLimits(nodes=5000)
+
+        # ACT
+        m = engine.find_move(test_board, limits=limits)
+
+        # ASSERT
+        legal = [move.int_to_string(mv) for mv in mg.all_moves(test_board)]
+        self.assertIn(m, legal)
+        self.assertEqual(test_board.to_fen(), fen)
+
+    def test_node_limit_stops_search_exactly(self):
+        # ARRANGE
+        fen = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+        test_board = fp.fen_to_board(fen)
+        info = engine.SearchInfo(limits=lm.SearchLimits(nodes=3000))
+        info.new_search()
+
+        # ACT
+        engine.iterative_deepening(test_board, info)
+
+        # ASSERT
+        self.assertEqual(info.nodes, 3000)
+        self.assertEqual(test_board.to_fen(), fen)
+
+    def test_poll_publishes_node_count_of_helper(self):
+        # ARRANGE
+        info = engine.SearchInfo(tt.TranspositionTable(1))
+        info.shared_nodes = mp.Value("q", 0, lock=False)
+        info.nodes = 5000
+
+        # ACT
+        info.poll()
+
+        # ASSERT
+        self.assertEqual(info.shared_nodes.value, 5000)
+
+    def test_node_limit_counts_nodes_of_helpers(self):
+        # ARRANGE
+        limits = lm.SearchLimits(nodes=10000)
+        info = engine.SearchInfo(tt.TranspositionTable(1), limits)
+        info.helper_nodes = (mp.Value("q", 6000, lock=False),)
+        info.nodes = 3000
+
+        # ACT
+        info.poll()
+        next_poll = info.next_poll
+        info.helper_nodes[0].value = 7000
+
+        # ASSERT
+        self.assertEqual(info.total_nodes(), 10000)
+        self.assertEqual(next_poll, 4000)
+        with self.assertRaises(engine.SearchStopped):
+            info.poll()
+
+    def test_find_move_returns_move_of_last_completed_iteration(self):
+        # ARRANGE
+        test_board = fp.fen_to_board("6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1")
+        limits = lm.SearchLimits(depth=3, nodes=60)  # stops during depth 3
+
+        # ACT
+        m = engine.find_move(test_board, limits=limits)
+
+        # ASSERT
+        self.assertEqual(m, "a1a8")
+
+    def test_has_pieces_is_false_for_king_and_pawns(self):
+        # ARRANGE
+        test_board = fp.fen_to_board("4k3/pppp4/8/8/8/8/4P3/4K2N b - - 0 1")
+
+        # ACT
+        black_pieces = engine.has_pieces(test_board)
+        test_board.switch_side()
+        white_pieces = engine.has_pieces(test_board)
+
+        # ASSERT
+        self.assertFalse(black_pieces)
+        self.assertTrue(white_pieces)
+
+    def test_pruning_and_reductions_preserve_mate_score(self):
+        # ARRANGE
+        test_board = fp.fen_to_board("6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1")
+        full = engine.SearchInfo(null_move=False, lmr=False)
+        selective = engine.SearchInfo()
+
+        # ACT
+        full_score = engine.search(test_board, -engine.INF, engine.INF, 5, full)
+        selective_score = engine.search(
+            test_board, -engine.INF, engine.INF, 5, selective
+        )
+
+        # ASSERT
+        self.assertEqual(full_score, engine.MATE - 1)
+        self.assertEqual(selective_score, full_score)
+        self.assertLess(selective.nodes, full.nodes)
+
+    def test_principal_variation_follows_table_and_preserves_board(self):
+        # ARRANGE
+        fen = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+        test_board = fp.fen_to_board(fen)
+        info = engine.SearchInfo(limits=lm.SearchLimits(depth=4))
+        best_move = engine.iterative_deepening(test_board, info)
+
+        # ACT
+        pv = engine.principal_variation(test_board, info.t_table, 4)
+
+        # ASSERT
+        self.assertEqual(pv[0], move.int_to_string(best_move))
+        self.assertLessEqual(len(pv), 4)
+        self.assertEqual(test_board.to_fen(), fen)
+
+    def test_search_records_selective_depth(self):
+        # ARRANGE
+        test_board = fp.fen_to_board(
+            "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+        )
+        info = engine.SearchInfo()
+
+        # ACT
+        engine.search(test_board, -engine.INF, engine.INF, 2, info)
+
+        # ASSERT
+        self.assertGreater(info.seldepth, 2)
+
+    def test_search_scores_repeated_position_as_draw(self):
+        # ARRANGE
+        test_board = fp.fen_to_board("4k3/8/8/8/8/8/8/QQ2K1N1 w - - 0 1")
+        for mstr in ("g1f3", "e8d8", "f3g1", "d8e8"):
+            move.make_move_from_string(mstr, test_board)
+
+        # ACT
+        value = engine.search(test_board, -engine.INF, engine.INF, 2, ply=1)
+        root_value = engine.search(test_board, -engine.INF, engine.INF, 2)
+
+        # ASSERT
+        self.assertEqual(value, engine.DRAW)
+        self.assertGreater(root_value, engine.DRAW)
+
+    def test_find_move_returns_null_move_when_checkmated(self):
+        # ARRANGE
+        test_board = fp.fen_to_board("6k1/8/8/8/8/8/5PPP/r5K1 w - - 0 1")
+
+        # ACT
+        m = engine.find_move(test_board, 10, depth_lim=2)
+
+        # ASSERT
+        self.assertEqual(m, engine.NULL_MOVE)
+
+    def test_search_visits_same_nodes_on_both_boards(self):
+        # ARRANGE
+        fen = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+        array_info = engine.SearchInfo(limits=lm.SearchLimits(depth=3))
+        bit_info = engine.SearchInfo(limits=lm.SearchLimits(depth=3))
+        bit_board = bb.from_fen(fen)
+
+        # ACT
+        array_move = engine.iterative_deepening(fp.fen_to_board(fen), array_info)
+        bit_move = engine.iterative_deepening(bit_board, bit_info)
+
+        # ASSERT
+        self.assertEqual(bit_move, array_move)
+        self.assertEqual(bit_info.nodes, array_info.nodes)
+        self.assertEqual(bit_board.to_fen(), fen)
+
+    def test_find_move_on_bitboard_finds_mate_in_one(self):
+        # ARRANGE
+        bit_board = bb.from_fen("6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1")
+
+        # ACT
+        m = engine.find_move(bit_board, 10, depth_lim=3)
+
+        # ASSERT
+        self.assertEqual(m, "a1a8")
+
+    def test_search_beyond_killer_table_returns_evaluation(self):
+        # ARRANGE
+        test_board = fp.fen_to_board(
+            "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+        )
+
+        # ACT
+        value = engine.search(
+            test_board, -engine.INF, engine.INF, 3, ply=mo.MAX_PLY - 1
+        )
+
+        # ASSERT
+        self.assertEqual(value, engine.evaluate(test_board))
@@ -1,3 +1,4 @@
+import os
 import unittest
 
 from chess_engine import board, constants as cs, fen_parser as fp
@@ -109,7 +110,7 @@ class TestFenParser(unittest.TestCase):
             0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
         ]
         # fmt: on
-        test_board_1 = board.Board(arr=arr, black=1, cr=[False, False, False, False])
+        test_board_1 = board.Board(arr=arr, black=1, cr=0)
 
         # ACT
         test_board_2 = fp.fen_to_board("n1n5/PPPk4/8/8/8/8/4Kppp/5N1N b - - 0 1")
@@ -276,3 +277,56 @@ class TestFenParser(unittest.TestCase):
 
         # ASSERT
         self.assertTrue(valid)
+
+    def test_get_piece_list_includes_every_promoted_piece(self):
+        # ARRANGE
+        test_board = fp.fen_to_board("4k3/8/8/8/8/8/8/QQNNNBBK w - - 0 1")
+
+        # ACT
+        positions = [pos for pos in test_board.piece_list if pos != -1]
+
+        # ASSERT
+        self.assertEqual(len(positions), 9)
+        self.assertTrue(TestFenParser.validate_piece_list(test_board))
+
+    def test_parse_epd_reads_perft_operations(self):
+        # ACT
+        test_board, operations = fp.parse_epd(
+            "4k3/8/8/8/8/8/8/4K2R w K - 0 1 ;D1 15 ;D2 66 ;D3 1197"
+        )
+
+        # ASSERT
+        self.assertEqual(test_board.to_fen(), "4k3/8/8/8/8/8/8/4K2R w K - 0 1")
+        self.assertEqual(operations, {"D1": "15", "D2": "66", "D3": "1197"})
+
+    def test_parse_epd_reads_clocks_from_operations(self):
+        # ACT
+        test_board, operations = fp.parse_epd(
+            'rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 bm e5; id "a"; '
+            "hmvc 0; fmvn 1;"
+        )
+
+        # ASSERT
+        self.assertEqual(
+            test_board.to_fen(),
+            "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1",
+        )
+        self.assertEqual(
+            operations, {"bm": "e5", "id": "a", "hmvc": "0", "fmvn": "1"}
+        )
+
+    def test_iter_epd_yields_each_line_of_file(self):
+        # ARRANGE
+        path = os.path.join(
+            os.path.dirname(__file__), "..", "perft_results", "standard.epd"
+        )
+
+        with open(path, "r", encoding="UTF-8") as f:
+            fens = [line.split(";")[0].strip() for line in f if line.strip()]
+
+        # ACT
+        results = fp.iter_epd(path)
+
+        # ASSERT
+        self.assertNotIsInstance(results, list)
+        self.assertEqual([bd.to_fen() for bd, _ in results], fens)
@@ -161,3 +161,34 @@ class TestHashing(unittest.TestCase):
 
         # ASSERT
         self.assertEqual(first_hash, second_hash)
+
+    def test_make_move_keeps_board_hash_up_to_date(self):
+        # ARRANGE
+        test_board = fp.fen_to_board(
+            "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+        )
+        hashes = []
+
+        # ACT
+        for mstr in ("a2a4", "b4a3", "e1c1", "h3g2", "d5e6", "g2h1q"):
+            move.make_move_from_string(mstr, test_board)
+            hashes.append((test_board.hash, hsh.zobrist_hash(test_board)))
+
+        # ASSERT
+        for incremental, full in hashes:
+            self.assertEqual(incremental, full)
+
+    def test_unmake_move_restores_board_hash(self):
+        # ARRANGE
+        test_board = fp.fen_to_board(
+            "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+        )
+        first_hash = test_board.hash
+        test_move = move.string_to_int(test_board, "e1g1")
+
+        # ACT
+        move.make_move(test_move, test_board)
+        move.unmake_move(test_move, test_board)
+
+        # ASSERT
+        self.assertEqual(test_board.hash, first_hash)
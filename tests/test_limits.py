@@ -0,0 +1,83 @@
+import threading
+import unittest
+
+from chess_engine import limits as lm
+
+
+class TestLimits(unittest.TestCase):
+    def test_allocate_time_keeps_soft_limit_below_hard_limit(self):
+        # ARRANGE
+        time_left, inc = 60, 1
+
+        # ACT
+        soft, hard = lm.allocate_time(time_left, inc)
+
+        # ASSERT
+        self.assertLess(soft, hard)
+        self.assertLessEqual(hard, time_left * lm.HARD_FRACTION)
+
+    def test_allocate_time_never_exceeds_remaining_time(self):
+        # ARRANGE
+        time_left, inc = 0.5, 2
+
+        # ACT
+        soft, hard = lm.allocate_time(time_left, inc)
+
+        # ASSERT
+        self.assertLessEqual(soft, hard)
+        self.assertLess(hard, time_left)
+
+    def test_allocate_time_uses_more_time_with_fewer_moves_to_go(self):
+        # ARRANGE
+        time_left = 60
+
+        # ACT
+        soft_many, _ = lm.allocate_time(time_left, moves_to_go=40)
+        soft_few, _ = lm.allocate_time(time_left, moves_to_go=5)
+
+        # ASSERT
+        self.assertGreater(soft_few, soft_many)
+
+    def test_search_is_stopped_by_node_limit(self):
+        # ARRANGE
+        limits = lm.SearchLimits(nodes=1000)
+
+        # ACT
+        limits.start_clock()
+
+        # ASSERT
+        self.assertFalse(limits.stopped(999))
+        self.assertTrue(limits.stopped(1000))
+
+    def test_search_is_stopped_by_stop_flag(self):
+        # ARRANGE
+        stop = threading.Event()
+        limits = lm.SearchLimits(stop=stop)
+        limits.start_clock()
+
+        # ACT
+        stop.set()
+
+        # ASSERT
+        self.assertTrue(limits.stopped(0))
+
+    def test_search_is_stopped_by_deadline(self):
+        # ARRANGE
+        limits = lm.SearchLimits(hard_time=0)
+
+        # ACT
+        limits.start_clock()
+
+        # ASSERT
+        self.assertTrue(limits.stopped(0))
+
+    def test_no_iteration_is_started_beyond_depth_limit(self):
+        # ARRANGE
+        limits = lm.SearchLimits(depth=4)
+
+        # ACT
+        limits.start_clock()
+
+        # ASSERT
+        self.assertTrue(limits.next_iteration(4, 0))
+        self.assertFalse(limits.next_iteration(5, 0))
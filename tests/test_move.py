@@ -1,6 +1,13 @@
 import unittest
 
-from chess_engine import board, constants as cs, fen_parser as fp, move, utils
+from chess_engine import (
+    board,
+    constants as cs,
+    fen_parser as fp,
+    hashing as hsh,
+    move,
+    utils,
+)
 
 
 class TestMove(unittest.TestCase):
@@ -113,6 +120,19 @@ class TestMove(unittest.TestCase):
         # ASSERT
         self.assertEqual(test_board.array[utils.string_to_coord("b8")] & 15, cs.Q)
 
+    def test_make_move_underpromotes_pawn(self):
+        # ARRANGE
+        test_board = fp.fen_to_board(
+            "r1bqkbnr/pPpppp2/p1n5/6pp/8/4P3/P1PP1PPP/RNBQK1NR w KQkq - 0 13"
+        )
+
+        # ACT
+        move.make_move_from_string("b7b8n", test_board)
+
+        # ASSERT
+        self.assertEqual(test_board.array[utils.string_to_coord("b8")] & 15, cs.N)
+        self.assertEqual(test_board.hash, hsh.zobrist_hash(test_board))
+
     def test_make_move_en_passant_capture(self):
         # ARRANGE
         test_board = fp.fen_to_board(
@@ -137,7 +157,7 @@ class TestMove(unittest.TestCase):
         move.make_move_from_string("a1a2", test_board)
 
         # ASSERT
-        self.assertEqual(test_board.castling_rights, [True, False, True, True])
+        self.assertEqual(test_board.castling_rights, cs.ALL_CASTLING & ~cs.CASTLE_WQ)
 
     def test_make_move_removes_queenside_castling_rights_after_black_rook_move(self):
         # ARRANGE
@@ -149,7 +169,7 @@ class TestMove(unittest.TestCase):
         move.make_move_from_string("a8a7", test_board)
 
         # ASSERT
-        self.assertEqual(test_board.castling_rights, [True, True, True, False])
+        self.assertEqual(test_board.castling_rights, cs.ALL_CASTLING & ~cs.CASTLE_BQ)
 
     def test_make_move_removes_kingside_castling_rights_after_rook_move(self):
         # ARRANGE
@@ -161,7 +181,7 @@ class TestMove(unittest.TestCase):
         move.make_move_from_string("h1h2", test_board)
 
         # ASSERT
-        self.assertEqual(test_board.castling_rights, [False, True, True, True])
+        self.assertEqual(test_board.castling_rights, cs.ALL_CASTLING & ~cs.CASTLE_WK)
 
     def test_make_move_removes_kingside_castling_rights_after_black_rook_move(self):
         # ARRANGE
@@ -173,7 +193,7 @@ class TestMove(unittest.TestCase):
         move.make_move_from_string("h8h7", test_board)
 
         # ASSERT
-        self.assertEqual(test_board.castling_rights, [True, True, False, True])
+        self.assertEqual(test_board.castling_rights, cs.ALL_CASTLING & ~cs.CASTLE_BK)
 
     def test_make_move_removes_castling_rights_after_king_move(self):
         # ARRANGE
@@ -185,7 +205,7 @@ class TestMove(unittest.TestCase):
         move.make_move_from_string("e1e2", test_board)
 
         # ASSERT
-        self.assertEqual(test_board.castling_rights, [False, False, True, True])
+        self.assertEqual(test_board.castling_rights, cs.CASTLE_BK | cs.CASTLE_BQ)
 
     def test_make_move_removes_castling_rights_after_black_king_move(self):
         # ARRANGE
@@ -197,7 +217,7 @@ class TestMove(unittest.TestCase):
         move.make_move_from_string("e8e7", test_board)
 
         # ASSERT
-        self.assertEqual(test_board.castling_rights, [True, True, False, False])
+        self.assertEqual(test_board.castling_rights, cs.CASTLE_WK | cs.CASTLE_WQ)
 
     def test_unmake_move(self):
         # ARRANGE
@@ -257,7 +277,7 @@ class TestMove(unittest.TestCase):
         move.unmake_move_from_string(test_move, test_board)
 
         # ASSERT
-        self.assertEqual(test_board.castling_rights, [True, True, True, True])
+        self.assertEqual(test_board.castling_rights, cs.ALL_CASTLING)
 
     def test_unmake_move_restores_queen_side_castling_rights_after_unmaking_black_rook_move(
         self,
@@ -273,7 +293,7 @@ class TestMove(unittest.TestCase):
         move.unmake_move_from_string(test_move, test_board)
 
         # ASSERT
-        self.assertEqual(test_board.castling_rights, [True, True, True, True])
+        self.assertEqual(test_board.castling_rights, cs.ALL_CASTLING)
 
     def test_unmake_move_restores_king_side_castling_rights_after_unmaking_rook_move(
         self,
@@ -289,7 +309,7 @@ class TestMove(unittest.TestCase):
         move.unmake_move_from_string(test_move, test_board)
 
         # ASSERT
-        self.assertEqual(test_board.castling_rights, [True, True, True, True])
+        self.assertEqual(test_board.castling_rights, cs.ALL_CASTLING)
 
     def test_unmake_move_restores_king_side_castling_rights_after_unmaking_black_rook_move(
         self,
@@ -305,7 +325,7 @@ class TestMove(unittest.TestCase):
         move.unmake_move_from_string(test_move, test_board)
 
         # ASSERT
-        self.assertEqual(test_board.castling_rights, [True, True, True, True])
+        self.assertEqual(test_board.castling_rights, cs.ALL_CASTLING)
 
     def test_unmake_move_restores_castling_rights_after_unmaking_king_move(self):
         # ARRANGE
@@ -319,7 +339,7 @@ class TestMove(unittest.TestCase):
         move.unmake_move_from_string(test_move, test_board)
 
         # ASSERT
-        self.assertEqual(test_board.castling_rights, [True, True, True, True])
+        self.assertEqual(test_board.castling_rights, cs.ALL_CASTLING)
 
     def test_unmake_move_restores_castling_rights_after_unmaking_black_king_move(self):
         # ARRANGE
@@ -333,7 +353,7 @@ class TestMove(unittest.TestCase):
         move.unmake_move_from_string(test_move, test_board)
 
         # ASSERT
-        self.assertEqual(test_board.castling_rights, [True, True, True, True])
+        self.assertEqual(test_board.castling_rights, cs.ALL_CASTLING)
 
     def test_unmake_move_does_not_restore_castling_rights_for_rook_that_returns_to_original_position(
         self,
@@ -349,7 +369,7 @@ class TestMove(unittest.TestCase):
         move.unmake_move_from_string(test_move, test_board)
 
         # ASSERT
-        self.assertEqual(test_board.castling_rights, [False, True, True, True])
+        self.assertEqual(test_board.castling_rights, cs.ALL_CASTLING & ~cs.CASTLE_WK)
 
     def test_unmake_move_does_not_restore_castling_rights_for_king_that_returns_to_original_position(
         self,
@@ -365,7 +385,7 @@ class TestMove(unittest.TestCase):
         move.unmake_move_from_string(test_move, test_board)
 
         # ASSERT
-        self.assertEqual(test_board.castling_rights, [False, False, True, True])
+        self.assertEqual(test_board.castling_rights, cs.CASTLE_BK | cs.CASTLE_BQ)
 
     def test_unmake_move_restores_castling_rights_for_captured_rook(self):
         # ARRANGE
@@ -379,7 +399,7 @@ class TestMove(unittest.TestCase):
         move.unmake_move_from_string(test_move, test_board)
 
         # ASSERT
-        self.assertEqual(test_board.castling_rights, [True, True, False, True])
+        self.assertEqual(test_board.castling_rights, cs.ALL_CASTLING & ~cs.CASTLE_BK)
 
     def test_unmake_move_restores_ep_square(self):
         # ARRANGE
@@ -536,3 +556,33 @@ class TestMove(unittest.TestCase):
 
         # ASSERT
         self.assertEqual(test_board.check, 2)
+
+    def test_make_null_move_switches_side_and_clears_ep_square(self):
+        # ARRANGE
+        test_board = fp.fen_to_board(
+            "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1"
+        )
+
+        # ACT
+        move.make_null_move(test_board)
+
+        # ASSERT
+        self.assertEqual(
+            test_board.to_fen(),
+            "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 1 2",
+        )
+        self.assertEqual(test_board.hash, hsh.zobrist_hash(test_board))
+
+    def test_unmake_null_move_restores_board(self):
+        # ARRANGE
+        fen = "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1"
+        test_board = fp.fen_to_board(fen)
+        b_hash = test_board.hash
+
+        # ACT
+        move.make_null_move(test_board)
+        move.unmake_null_move(test_board)
+
+        # ASSERT
+        self.assertEqual(test_board.to_fen(), fen)
+        self.assertEqual(test_board.hash, b_hash)
@@ -0,0 +1,207 @@
+import unittest
+
+from chess_engine import constants as cs, fen_parser as fp, move, move_gen as mg
+
+
+class TestMoveGen(unittest.TestCase):
+    def test_all_captures_generates_captures_and_promotions_only(self):
+        # ARRANGE
+        test_board = fp.fen_to_board("4k3/1P6/8/3q4/2P1n3/3Q4/8/4K3 w - - 0 1")
+
+        # ACT
+        moves = mg.all_captures(test_board)
+
+        # ASSERT
+        self.assertCountEqual(
+            [move.int_to_string(mv) for mv in moves],
+            ["c4d5", "d3d5", "d3e4", "b7b8q"],
+        )
+
+    def test_all_captures_includes_en_passant_capture(self):
+        # ARRANGE
+        test_board = fp.fen_to_board(
+            "rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3"
+        )
+
+        # ACT
+        moves = mg.all_captures(test_board)
+
+        # ASSERT
+        self.assertEqual([move.int_to_string(mv) for mv in moves], ["e5f6"])
+
+    def test_all_captures_only_moves_pinned_piece_along_pin(self):
+        # ARRANGE
+        test_board = fp.fen_to_board("4k3/8/8/4r3/3p4/4B3/8/4K3 w - - 0 1")
+
+        # ACT
+        moves = mg.all_captures(test_board)
+
+        # ASSERT
+        self.assertEqual(moves, [])
+
+    def test_all_captures_generates_evasions_in_check(self):
+        # ARRANGE
+        test_board = fp.fen_to_board("4k3/8/8/8/8/8/3q4/4K3 w - - 0 1")
+
+        # ACT
+        moves = mg.all_captures(test_board)
+
+        # ASSERT
+        self.assertCountEqual(moves, mg.all_moves(test_board))
+
+    def test_stages_together_generate_all_moves(self):
+        # ARRANGE
+        test_board = fp.fen_to_board(
+            "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+        )
+
+        # ACT
+        staged = list(mg.staged_moves(test_board))
+
+        # ASSERT
+        self.assertCountEqual(staged, mg.all_moves(test_board))
+
+    def test_staged_moves_yields_captures_before_quiets_and_castling(self):
+        # ARRANGE
+        test_board = fp.fen_to_board("4k3/8/8/7q/6P1/8/8/R3K3 w Q - 0 1")
+
+        # ACT
+        staged = [
+            move.int_to_string(mv) for mv in mg.staged_moves(test_board)
+        ]
+
+        # ASSERT
+        self.assertEqual(staged[0], "g4h5")
+        self.assertEqual(staged[-1], "e1c1")
+        self.assertEqual(len(staged), len(mg.all_moves(test_board)))
+
+    def test_all_quiets_includes_only_underpromotions(self):
+        # ARRANGE
+        test_board = fp.fen_to_board("2r1k3/1P6/8/8/8/8/8/4K3 w - - 0 1")
+
+        # ACT
+        moves = [move.int_to_string(mv) for mv in mg.all_quiets(test_board)]
+
+        # ASSERT
+        self.assertNotIn("b7b8q", moves)
+        self.assertNotIn("b7c8q", moves)
+        for mstr in ("b7b8n", "b7b8b", "b7b8r", "b7c8n", "b7c8b", "b7c8r"):
+            self.assertIn(mstr, moves)
+
+    def test_all_moves_generates_every_promotion(self):
+        # ARRANGE
+        test_board = fp.fen_to_board("4k3/1P6/8/8/8/8/8/4K3 w - - 0 1")
+
+        # ACT
+        moves = [move.int_to_string(mv) for mv in mg.all_moves(test_board)]
+
+        # ASSERT
+        self.assertEqual(
+            sorted(mstr for mstr in moves if mstr.startswith("b7")),
+            ["b7b8b", "b7b8n", "b7b8q", "b7b8r"],
+        )
+
+    def test_generated_moves_carry_piece_capture_and_flags(self):
+        # ARRANGE
+        test_board = fp.fen_to_board(
+            "rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3"
+        )
+
+        # ACT
+        moves = {move.int_to_string(mv): mv for mv in mg.all_moves(test_board)}
+
+        # ASSERT
+        ep_capture = moves["e5f6"]
+        self.assertEqual(move.moved_piece(ep_capture), cs.WP)
+        self.assertEqual(move.captured_piece(ep_capture), cs.BP)
+        self.assertTrue(ep_capture & move.CAPTURE and ep_capture & move.EN_PASSANT)
+        self.assertTrue(moves["d2d4"] & move.DOUBLE_PUSH)
+        self.assertFalse(moves["d2d3"] & (move.CAPTURE | move.DOUBLE_PUSH))
+        self.assertEqual(move.moved_piece(moves["g1f3"]), cs.WN)
+
+    def test_all_moves_excludes_king_moves_into_check(self):
+        # ARRANGE
+        test_board = fp.fen_to_board("4k3/8/8/8/8/8/r7/4K3 w - - 0 1")
+
+        # ACT
+        moves = [move.int_to_string(mv) for mv in mg.all_moves(test_board)]
+
+        # ASSERT
+        self.assertCountEqual(moves, ["e1d1", "e1f1"])
+
+    def test_all_moves_excludes_king_retreat_along_checking_line(self):
+        # ARRANGE
+        test_board = fp.fen_to_board("4k3/8/8/8/4K2r/8/8/8 w - - 0 1")
+
+        # ACT
+        moves = [move.int_to_string(mv) for mv in mg.all_moves(test_board)]
+
+        # ASSERT
+        self.assertNotIn("e4d4", moves)
+        self.assertIn("e4e3", moves)
+
+    def test_all_moves_excludes_castling_through_check(self):
+        # ARRANGE
+        test_board = fp.fen_to_board("4k3/8/8/8/8/8/5r2/R3K2R w KQ - 0 1")
+
+        # ACT
+        moves = [move.int_to_string(mv) for mv in mg.all_moves(test_board)]
+
+        # ASSERT
+        self.assertNotIn("e1g1", moves)
+        self.assertIn("e1c1", moves)
+
+    def test_all_moves_excludes_en_passant_capture_exposing_king(self):
+        # ARRANGE
+        test_board = fp.fen_to_board("8/8/8/K2pP2r/8/8/8/4k3 w - d6 0 1")
+
+        # ACT
+        moves = [move.int_to_string(mv) for mv in mg.all_moves(test_board)]
+
+        # ASSERT
+        self.assertNotIn("e5d6", moves)
+
+    def test_all_moves_never_leaves_king_in_check(self):
+        # ARRANGE
+        test_board = fp.fen_to_board(
+            "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+        )
+        illegal = []
+
+        # ACT
+        for mv in mg.all_moves(test_board):
+            move.make_move(mv, test_board)
+            for reply in mg.all_moves(test_board):
+                move.make_move(reply, test_board)
+                off = cs.SIDE_OFFSET * (test_board.black ^ 1)
+                king_pos = test_board.piece_list[off + 4]
+                if move.is_square_attacked(test_board, king_pos, test_board.black):
+                    illegal.append(reply)
+                move.unmake_move(reply, test_board)
+            move.unmake_move(mv, test_board)
+
+        # ASSERT
+        self.assertEqual(illegal, [])
+
+    def test_rays_stop_at_the_edge_of_the_board(self):
+        # ARRANGE
+        a1_rays = {v: cs.RAYS[v][cs.A1] for v in cs.VALID_VECS[cs.Q]}
+
+        # ACT
+        lengths = sorted(len(ray) for ray in a1_rays.values())
+
+        # ASSERT
+        self.assertEqual(lengths, [0, 0, 0, 0, 0, 7, 7, 7])
+        self.assertEqual(a1_rays[0x11][-1], cs.A1 + 0x77)
+
+    def test_steps_only_include_squares_on_the_board(self):
+        # ARRANGE
+        steps = cs.STEPS
+
+        # ACT
+        knight_steps = steps[cs.N][cs.A1]
+        pawn_steps = steps[cs.P][cs.A1]
+
+        # ASSERT
+        self.assertCountEqual(knight_steps, [cs.A1 + 0x12, cs.A1 + 0x21])
+        self.assertEqual(pawn_steps, (cs.A1 + 0x11,))
@@ -0,0 +1,93 @@
+import unittest
+
+from chess_engine import fen_parser as fp, move, move_gen as mg, move_order as mo
+
+
+class TestMoveOrder(unittest.TestCase):
+    def test_order_yields_every_move_once(self):
+        # ARRANGE
+        test_board = fp.fen_to_board(
+            "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+        )
+        moves = mg.all_moves(test_board)
+        orderer = mo.MoveOrderer()
+
+        # ACT
+        ordered = list(orderer.order(test_board, 0, 0))
+
+        # ASSERT
+        self.assertCountEqual(ordered, moves)
+
+    def test_order_yields_tt_move_first(self):
+        # ARRANGE
+        test_board = fp.fen_to_board(
+            "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+        )
+        tt_move = move.string_to_int(test_board, "a2a3")
+
+        # ACT
+        ordered = list(mo.MoveOrderer().order(test_board, tt_move, 0))
+
+        # ASSERT
+        self.assertEqual(ordered[0], tt_move)
+        self.assertEqual(ordered.count(tt_move), 1)
+
+    def test_order_sorts_captures_by_mvv_lva(self):
+        # ARRANGE
+        test_board = fp.fen_to_board("4k3/8/8/3q4/2P1n3/3Q4/8/4K3 w - - 0 1")
+
+        # ACT
+        ordered = list(mo.MoveOrderer().order(test_board, 0, 0))
+
+        # ASSERT
+        self.assertEqual(
+            [move.int_to_string(mv) for mv in ordered[:3]],
+            ["c4d5", "d3d5", "d3e4"],
+        )
+
+    def test_order_yields_killer_moves_before_other_quiet_moves(self):
+        # ARRANGE
+        test_board = fp.fen_to_board("4k3/8/8/3q4/2P1n3/3Q4/8/4K3 w - - 0 1")
+        orderer = mo.MoveOrderer()
+        killer = move.string_to_int(test_board, "e1f1")
+        orderer.record_cutoff(test_board, killer, 3, 2)
+
+        # ACT
+        ordered = list(orderer.order(test_board, 0, 2))
+
+        # ASSERT
+        self.assertEqual(ordered[3], killer)
+
+    def test_order_yields_every_evasion_once_in_check(self):
+        # ARRANGE
+        test_board = fp.fen_to_board("4k3/8/8/8/1b6/8/8/1N2K3 w - - 0 1")
+        moves = mg.all_moves(test_board)
+
+        # ACT
+        ordered = list(mo.MoveOrderer().order(test_board, 0, 0))
+
+        # ASSERT
+        self.assertCountEqual(ordered, moves)
+
+    def test_order_drops_tt_move_that_is_not_generated(self):
+        # ARRANGE
+        test_board = fp.fen_to_board("4k3/8/8/3q4/2P1n3/3Q4/8/4K3 w - - 0 1")
+        tt_move = move.encode(0x44, 0x45)  # from an empty square
+
+        # ACT
+        ordered = list(mo.MoveOrderer().order(test_board, tt_move, 0))
+
+        # ASSERT
+        self.assertNotIn(tt_move, ordered)
+        self.assertCountEqual(ordered, mg.all_moves(test_board))
+
+    def test_capture_value_is_read_from_move(self):
+        # ARRANGE
+        test_board = fp.fen_to_board("2r1k3/1P6/8/8/8/8/8/4K3 w - - 0 1")
+        moves = {move.int_to_string(mv): mv for mv in mg.all_moves(test_board)}
+
+        # ACT
+        values = [mo.capture_value(moves[mstr]) for mstr in ("b7c8q", "b7b8n", "e1e2")]
+
+        # ASSERT
+        self.assertEqual(values, [500 + 800, 220, 0])
@@ -1,7 +1,16 @@
+import io
+import os
+import tempfile
 import unittest
 
 
-from chess_engine import board, fen_parser as fp, perft_divide as pd
+from chess_engine import (
+    bitboard as bb,
+    board,
+    fen_parser as fp,
+    perft_divide as pd,
+    transposition as tt,
+)
 
 
 class TestPerftDivide(unittest.TestCase):
@@ -450,3 +459,177 @@ class TestPerftDivide(unittest.TestCase):
 
         # ASSERT
         self.assertEqual(n, 20)
+
+    def test_perft_3_with_hash_checking_from_test_position_equals_97862(self):
+        # ARRANGE
+        test_board = fp.fen_to_board(
+            "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+        )
+
+        # ACT
+        n = pd.perft(test_board, 3, debug=True)
+
+        # ASSERT
+        self.assertEqual(n, 97862)
+
+    def test_parallel_perft_3_from_test_position_equals_97862(self):
+        # ARRANGE
+        test_board = fp.fen_to_board(
+            "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+        )
+
+        # ACT
+        n = pd.parallel_perft(test_board, 3, 2)
+
+        # ASSERT
+        self.assertEqual(n, 97862)
+
+    def test_parallel_divide_output_matches_serial_divide(self):
+        # ARRANGE
+        fens = (
+            "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+            # few root moves, so the work is split at ply 2
+            "8/8/8/K2pP2q/8/8/8/7k w - d6 0 2",
+        )
+
+        for fen in fens:
+            for make_board in (fp.fen_to_board, bb.from_fen):
+                serial = io.StringIO()
+                parallel = io.StringIO()
+
+                # ACT
+                pd.divide(make_board(fen), 3, stdout=serial)
+                pd.divide(make_board(fen), 3, stdout=parallel, jobs=3)
+
+                # ASSERT
+                with self.subTest(fen=fen, board=make_board.__name__):
+                    self.assertEqual(parallel.getvalue(), serial.getvalue())
+
+    def test_hashed_perft_5_from_rook_endgame_equals_133987(self):
+        # ARRANGE
+        fen = "4k3/8/8/8/8/8/8/4K2R w K - 0 1"
+
+        for make_board in (fp.fen_to_board, bb.from_fen):
+            table = tt.PerftTable(1)
+
+            # ACT
+            n = pd.hashed_perft(make_board(fen), 5, table)
+
+            # ASSERT
+            with self.subTest(board=make_board.__name__):
+                self.assertEqual(n, 133987)
+                self.assertGreater(table.hits, 0)
+
+    def test_hashed_perft_4_with_colliding_slots_equals_197281(self):
+        # ARRANGE
+        test_board = board.Board()
+        table = tt.PerftTable(1)
+        table.mask = 0xFF  # use only 256 slots, so most stores collide
+
+        # ACT
+        n = pd.hashed_perft(test_board, 4, table)
+
+        # ASSERT
+        self.assertEqual(n, 197281)
+        self.assertEqual(test_board, board.Board())
+
+    def test_perft_stats_match_reference_tables(self):
+        # ARRANGE
+        cases = (
+            (
+                "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+                3,
+                (97862, 17102, 45, 3162, 0, 993, 0, 0, 1),
+            ),
+            (
+                "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+                4,
+                (43238, 3348, 123, 0, 0, 1680, 106, 0, 17),
+            ),
+            (
+                "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+                3,
+                (9467, 1021, 4, 0, 120, 38, 2, 0, 22),
+            ),
+        )
+
+        for fen, depth, expected in cases:
+            # ACT
+            stats = pd.perft_stats(fp.fen_to_board(fen), depth)
+
+            # ASSERT
+            with self.subTest(fen=fen):
+                self.assertEqual(tuple(stats[name] for name in pd.STATS), expected)
+
+    def test_print_stats_prints_a_row_for_each_depth(self):
+        # ARRANGE
+        test_board = board.Board()
+        stdout = io.StringIO()
+
+        # ACT
+        pd.print_stats(test_board, 3, stdout=stdout)
+
+        # ASSERT
+        lines = stdout.getvalue().splitlines()
+        self.assertEqual(lines[0].split()[:3], ["Depth", "Nodes", "Captures"])
+        self.assertEqual(
+            [line.split() for line in lines[1:]],
+            [
+                ["1", "20", "0", "0", "0", "0", "0", "0", "0", "0"],
+                ["2", "400", "0", "0", "0", "0", "0", "0", "0", "0"],
+                ["3", "8902", "34", "0", "0", "0", "12", "0", "0", "0"],
+            ],
+        )
+        self.assertEqual(test_board, board.Board())
+
+    def test_checkpointed_perft_skips_recorded_subtrees(self):
+        # ARRANGE
+        fen = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "perft.ckpt")
+            with open(path, "w", encoding="UTF-8") as f:
+                # a subtree with a wrong count, which must not be recounted,
+                # then a line cut short by a crash, which must be
+                f.write(f"3 {fen}\ne1f1 e8g8 1000000\ne1f1 e8f8 4")
+
+            # ACT
+            n = pd.parallel_perft(fp.fen_to_board(fen), 3, 1, checkpoint=path)
+            resumed = pd.parallel_perft(fp.fen_to_board(fen), 3, 2, checkpoint=path)
+
+            with open(path, "r", encoding="UTF-8") as f:
+                lines = f.readlines()
+
+        # ASSERT
+        e8g8 = 1000000 - 45  # e1f1 e8g8 has 45 replies
+        self.assertEqual(n, 97862 + e8g8)
+        self.assertEqual(resumed, n)
+        self.assertEqual(len(lines), 2 + 2039)
+
+    def test_checkpoint_of_other_position_is_rejected(self):
+        # ARRANGE
+        test_board = board.Board()
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "perft.ckpt")
+            pd.parallel_perft(test_board, 3, 1, checkpoint=path)
+
+            # ACT & ASSERT
+            with self.assertRaises(ValueError):
+                pd.parallel_perft(test_board, 4, 1, checkpoint=path)
+
+    def test_checkpointed_perft_resumes_from_empty_file(self):
+        # ARRANGE
+        test_board = board.Board()
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "perft.ckpt")
+            open(path, "w", encoding="UTF-8").close()
+
+            # ACT
+            n = pd.parallel_perft(test_board, 3, 1, checkpoint=path)
+            resumed = pd.parallel_perft(test_board, 3, 1, checkpoint=path)
+
+        # ASSERT
+        self.assertEqual(n, 8902)
+        self.assertEqual(resumed, 8902)
@@ -0,0 +1,69 @@
+import os
+import tempfile
+import unittest
+
+from chess_engine import board, fen_parser as fp, position_file as pf
+
+FENS = (
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+    "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+)
+
+
+class TestPositionFile(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "positions.bin")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_write_positions_writes_one_record_per_board(self):
+        # ACT
+        count = pf.write_positions(self.path, (fp.fen_to_board(f) for f in FENS))
+
+        # ASSERT
+        self.assertEqual(count, len(FENS))
+        self.assertEqual(os.path.getsize(self.path), len(FENS) * 32)
+        self.assertEqual(pf.count_positions(self.path), len(FENS))
+
+    def test_iter_positions_yields_boards_in_file_order(self):
+        # ARRANGE
+        pf.write_positions(self.path, (fp.fen_to_board(f) for f in FENS))
+
+        # ACT
+        fens = [bd.to_fen() for bd in pf.iter_positions(self.path)]
+
+        # ASSERT
+        self.assertEqual(fens, list(FENS))
+
+    def test_iter_positions_yields_range_of_positions(self):
+        # ARRANGE
+        pf.write_positions(self.path, (fp.fen_to_board(f) for f in FENS))
+
+        # ACT
+        fens = [bd.to_fen() for bd in pf.iter_positions(self.path, 1, 3)]
+
+        # ASSERT
+        self.assertEqual(fens, list(FENS[1:3]))
+
+    def test_iter_positions_yields_nothing_for_empty_file(self):
+        # ARRANGE
+        pf.write_positions(self.path, ())
+
+        # ACT
+        boards = list(pf.iter_positions(self.path))
+
+        # ASSERT
+        self.assertEqual(boards, [])
+
+    def test_count_positions_rejects_truncated_file(self):
+        # ARRANGE
+        with open(self.path, "wb") as f:
+            f.write(board.Board().pack()[:20])
+
+        # ACT & ASSERT
+        with self.assertRaises(ValueError):
+            pf.count_positions(self.path)
@@ -0,0 +1,160 @@
+import unittest
+
+from chess_engine import board, hashing as hsh, transposition as tt
+
+
+class TestTranspositionTable(unittest.TestCase):
+    def test_table_size_is_capped_by_megabytes(self):
+        # ARRANGE
+        size_mb = 3
+
+        # ACT
+        t_table = tt.TranspositionTable(size_mb)
+
+        # ASSERT
+        self.assertLessEqual(t_table.table.itemsize * len(t_table.table), size_mb << 20)
+        self.assertEqual(t_table.n_buckets & (t_table.n_buckets - 1), 0)
+
+    def test_probe_returns_stored_entry(self):
+        # ARRANGE
+        t_table = tt.TranspositionTable(1)
+        b_hash = hsh.zobrist_hash(board.Board())
+
+        # ACT
+        t_table.store(b_hash, 0x3414, -250, 5, tt.LOWER)
+
+        # ASSERT
+        self.assertEqual(t_table.probe(b_hash), (0x3414, -250, 5, tt.LOWER))
+
+    def test_probe_returns_none_for_missing_position(self):
+        # ARRANGE
+        t_table = tt.TranspositionTable(1)
+
+        # ACT
+        t_table.store(0x1234, 0x3414, 10, 2, tt.EXACT)
+
+        # ASSERT
+        self.assertIsNone(t_table.probe(0x1234 + t_table.n_buckets))
+
+    def test_shallower_entry_does_not_replace_deeper_entry(self):
+        # ARRANGE
+        t_table = tt.TranspositionTable(1)
+        deep_hash = 0x1234
+        shallow_hash = deep_hash + t_table.n_buckets
+
+        # ACT
+        t_table.store(deep_hash, 0x3414, 10, 6, tt.EXACT)
+        t_table.store(shallow_hash, 0x3515, 20, 2, tt.UPPER)
+
+        # ASSERT
+        self.assertEqual(t_table.probe(deep_hash), (0x3414, 10, 6, tt.EXACT))
+        self.assertEqual(t_table.probe(shallow_hash), (0x3515, 20, 2, tt.UPPER))
+
+    def test_entry_from_previous_search_is_replaced(self):
+        # ARRANGE
+        t_table = tt.TranspositionTable(1)
+        old_hash = 0x1234
+        new_hash = old_hash + t_table.n_buckets
+        t_table.store(old_hash, 0x3414, 10, 6, tt.EXACT)
+
+        # ACT
+        t_table.new_search()
+        t_table.store(new_hash, 0x3515, 20, 2, tt.UPPER)
+
+        # ASSERT
+        self.assertIsNone(t_table.probe(old_hash))
+
+    def test_store_without_move_keeps_previous_best_move(self):
+        # ARRANGE
+        t_table = tt.TranspositionTable(1)
+        t_table.store(0x1234, 0x3414, 10, 3, tt.EXACT)
+
+        # ACT
+        t_table.store(0x1234, 0, -5, 4, tt.UPPER)
+
+        # ASSERT
+        self.assertEqual(t_table.probe(0x1234), (0x3414, -5, 4, tt.UPPER))
+
+    def test_clear_removes_all_entries(self):
+        # ARRANGE
+        t_table = tt.TranspositionTable(1)
+        t_table.store(0x1234, 0x3414, 10, 3, tt.EXACT)
+
+        # ACT
+        t_table.clear()
+
+        # ASSERT
+        self.assertIsNone(t_table.probe(0x1234))
+
+    def test_shared_table_entries_are_visible_when_attached(self):
+        # ARRANGE
+        owner = tt.SharedTranspositionTable(1)
+        attached = tt.SharedTranspositionTable(1, name=owner.name)
+
+        # ACT
+        owner.store(0x1234, 0x3414, 10, 3, tt.EXACT)
+        entry = attached.probe(0x1234)
+        attached.close()
+        owner.close()
+
+        # ASSERT
+        self.assertEqual(entry, (0x3414, 10, 3, tt.EXACT))
+
+    def test_hashfull_counts_entries_of_current_search(self):
+        # ARRANGE
+        t_table = tt.TranspositionTable(1)
+        for i in range(100):
+            t_table.store(i, 0x3414, 10, 3, tt.EXACT)
+        t_table.new_search()
+        for i in range(100, 150):
+            t_table.store(i, 0x3414, 10, 3, tt.EXACT)
+
+        # ACT
+        hashfull = t_table.hashfull()
+
+        # ASSERT
+        self.assertEqual(hashfull, 50)
+
+
+class TestPerftTable(unittest.TestCase):
+    def test_probe_returns_stored_node_count(self):
+        # ARRANGE
+        p_table = tt.PerftTable(1)
+        b_hash = hsh.zobrist_hash(board.Board())
+
+        # ACT
+        p_table.store(b_hash, 5, 4865609)
+
+        # ASSERT
+        self.assertEqual(p_table.probe(b_hash, 5), 4865609)
+        self.assertIsNone(p_table.probe(b_hash, 4))
+        self.assertIsNone(p_table.probe(b_hash + len(p_table), 5))
+
+    def test_shallower_count_does_not_replace_deeper_count(self):
+        # ARRANGE
+        p_table = tt.PerftTable(1)
+        deep_hash = 0x1234
+        shallow_hash = deep_hash + len(p_table)
+
+        # ACT
+        p_table.store(deep_hash, 4, 197281)
+        p_table.store(shallow_hash, 2, 400)
+
+        # ASSERT
+        self.assertEqual(p_table.probe(deep_hash, 4), 197281)
+        self.assertIsNone(p_table.probe(shallow_hash, 2))
+
+    def test_hit_rate_counts_successful_probes(self):
+        # ARRANGE
+        p_table = tt.PerftTable(1)
+        p_table.store(0x1234, 3, 8902)
+
+        # ACT
+        p_table.probe(0x1234, 3)
+        p_table.probe(0x1234, 2)
+        p_table.probe(0x5678, 3)
+        p_table.probe(0x1234, 3)
+
+        # ASSERT
+        self.assertEqual((p_table.probes, p_table.hits), (4, 2))
+        self.assertEqual(p_table.hit_rate(), 0.5)
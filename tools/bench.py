@@ -0,0 +1,267 @@
+"""Module providing a search benchmark over a fixed set of positions."""
+
+import argparse
+import math
+import os
+import sys
+import tempfile
+import time
+import timeit
+
+
+from chess_engine import (
+    bitboard as bb,
+    board,
+    engine,
+    fen_parser as fp,
+    limits as lm,
+    move_gen as mg,
+    transposition as tt,
+)
+
+POSITIONS = (
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+    "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+    "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+    "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+    "r1b1k2r/pppp1ppp/3Pp3/8/3P3N/3P4/PP2BKPP/RNBQ1R2 b k - 0 11",
+    "r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4",
+)
+
+EPD_DIR = os.path.join(os.path.dirname(__file__), "..", "perft_results")
+
+
+def count_generated():
+    """Wraps the move generators so that every move they return is counted.
+
+    The generators of both the array board and the bitboard are wrapped.
+    all_captures returns all_moves when in check, so those moves are only
+    counted once.
+
+    Returns:
+        list: A single-item list holding the number of moves so far.
+    """
+    count = [0]
+
+    def wrap(module, name):
+        gen = getattr(module, name)
+
+        def counting_gen(bd):
+            moves = gen(bd)
+            if name != "all_captures" or not bd.check:
+                count[0] += len(moves)
+            return moves
+
+        setattr(module, name, counting_gen)
+
+    for module in (mg, bb):
+        for name in ("all_moves", "all_captures", "all_quiets", "castle_moves"):
+            wrap(module, name)
+
+    return count
+
+
+def run_bench(depth, hash_mb, null_move=True, lmr=True, bitboard=False):
+    """Searches every position to a fixed depth and reports the node counts.
+
+    The effective branching factor is the geometric mean over the positions
+    of nodes ** (1 / depth). The node counts are the same on either board.
+
+    Returns:
+        int: The total number of nodes searched.
+    """
+    f_string = "{:72}{:>12}{:>12}{:>12}{:>12}"
+    print(f_string.format("FEN", "Nodes", "Re-search", "Aspiration", "Time"))
+
+    total_nodes = 0
+    total_time = 0
+    total_re_searches = 0
+    total_fails = 0
+    log_ebf = 0
+
+    for fen in POSITIONS:
+        bd = fp.fen_to_board(fen)
+        if bitboard:
+            bd = bb.BitBoard(bd)
+
+        info = engine.SearchInfo(
+            tt.TranspositionTable(hash_mb),
+            lm.SearchLimits(depth=depth),
+            null_move=null_move,
+            lmr=lmr,
+        )
+
+        start = time.time()
+        engine.iterative_deepening(bd, info)
+        elapsed = time.time() - start
+
+        print(
+            f_string.format(
+                fen,
+                info.nodes,
+                info.re_searches,
+                info.aspiration_fails,
+                f"{elapsed:.2f}",
+            )
+        )
+        total_nodes += info.nodes
+        total_time += elapsed
+        total_re_searches += info.re_searches
+        total_fails += info.aspiration_fails
+        log_ebf += math.log(info.nodes) / depth
+
+    print(f"\nNodes: {total_nodes}\nTime elapsed: {total_time}")
+    print(f"NPS: {total_nodes / total_time}")
+    print(f"Re-searches: {total_re_searches}\nAspiration fails: {total_fails}")
+    print(f"Effective branching factor: {math.exp(log_ebf / len(POSITIONS)):.2f}")
+    return total_nodes
+
+
+def run_scaling(depth, hash_mb, thread_counts):
+    """Reports NPS and time to depth over all positions for each thread count."""
+    f_string = "{:>8}{:>12}{:>12}{:>12}{:>12}"
+    print(f_string.format("Threads", "Nodes", "Time", "NPS", "Speedup"))
+    base_time = None
+
+    for threads in thread_counts:
+        total_nodes = 0
+        total_time = 0
+
+        for fen in POSITIONS:
+            bd = fp.fen_to_board(fen)
+            t_table = tt.SharedTranspositionTable(hash_mb)
+            info = engine.SearchInfo(t_table, lm.SearchLimits(depth=depth))
+
+            start = time.time()
+            engine.parallel_search(bd, info, threads)
+            total_time += time.time() - start
+            total_nodes += info.nodes
+            t_table.close()
+
+        if base_time is None:
+            base_time = total_time
+
+        print(
+            f_string.format(
+                threads,
+                total_nodes,
+                f"{total_time:.2f}",
+                int(total_nodes / total_time),
+                f"{base_time / total_time:.2f}",
+            )
+        )
+
+
+def board_footprint(bd):
+    """Returns the number of bytes held by a board and the containers it owns.
+
+    Small integers are shared between boards, so only the lists and the hash
+    are counted.
+    """
+    size = sys.getsizeof(bd) + sys.getsizeof(bd.hash)
+
+    for name in board.Board.__slots__:
+        value = getattr(bd, name)
+        if isinstance(value, list):
+            size += sys.getsizeof(value)
+
+    return size
+
+
+def run_board_bench():
+    """Reports the memory footprint of each position's board and the time
+    taken to copy it."""
+    f_string = "{:72}{:>12}{:>12}"
+    print(f_string.format("FEN", "Bytes", "Copy (us)"))
+
+    for fen in POSITIONS:
+        bd = fp.fen_to_board(fen)
+        copy_time = min(timeit.repeat(bd.copy, number=1000, repeat=5))
+        print(
+            f_string.format(fen, board_footprint(bd), f"{copy_time * 1000:.2f}")
+        )
+
+
+def run_epd_bench(scale):
+    """Streams every line of the perft suite files, repeated scale times,
+    through fen_parser.iter_epd and reports the FENs parsed per second."""
+    lines = []
+
+    for name in sorted(os.listdir(EPD_DIR)):
+        if name.endswith(".epd"):
+            with open(os.path.join(EPD_DIR, name), "r", encoding="UTF-8") as f:
+                lines += [line.strip() + "\n" for line in f if line.strip()]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "bench.epd")
+
+        with open(path, "w", encoding="UTF-8") as f:
+            for _ in range(scale):
+                f.writelines(lines)
+
+        start = time.time()
+        count = sum(1 for _ in fp.iter_epd(path))
+        elapsed = time.time() - start
+
+    print(f"FENs: {count}\nTime elapsed: {elapsed}")
+    print(f"FENs/s: {count / elapsed:.0f}")
+
+
+def main():
+    """Runs the search benchmark."""
+    parser = argparse.ArgumentParser(description="Runs a search benchmark.")
+    parser.add_argument("depth", type=int, nargs="?", default=4)
+    parser.add_argument("--hash", type=int, default=16, help="table size in MB")
+    parser.add_argument(
+        "--threads", type=int, nargs="+", help="compare these numbers of processes"
+    )
+    parser.add_argument(
+        "--no-null-move", action="store_true", help="disable null-move pruning"
+    )
+    parser.add_argument(
+        "--no-lmr", action="store_true", help="disable late move reductions"
+    )
+    parser.add_argument(
+        "--moves", action="store_true", help="count moves generated per node"
+    )
+    parser.add_argument(
+        "--bitboard", action="store_true", help="search on the bitboard"
+    )
+    parser.add_argument(
+        "--board", action="store_true", help="report board size and copy time"
+    )
+    parser.add_argument(
+        "--epd",
+        type=int,
+        metavar="SCALE",
+        help="report FEN parsing speed over the perft suites repeated SCALE times",
+    )
+    args = parser.parse_args()
+    generated = count_generated() if args.moves else None
+
+    if args.epd:
+        run_epd_bench(args.epd)
+    elif args.board:
+        run_board_bench()
+    elif args.threads:
+        run_scaling(args.depth, args.hash, args.threads)
+    else:
+        nodes = run_bench(
+            args.depth,
+            args.hash,
+            not args.no_null_move,
+            not args.no_lmr,
+            args.bitboard,
+        )
+
+        if generated is not None:
+            print(f"Moves generated per node: {generated[0] / nodes:.2f}")
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        pass
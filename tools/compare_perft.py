@@ -80,22 +80,13 @@ def compare_engines(depth, fen, moves):
 
         if mv in moves:
             moves.remove(mv)
-            pr_type = cs.Q
-
-            if len(mstr) == 5:
-                moves.add(mv)
-                pr_type = cs.LETTERS.index(mstr[-1]) & 7
-
-            n, total = pd.get_result(bd, mv, depth, total, pr_type=pr_type)
+            n, total = pd.get_result(bd, mv, depth, total)
             print(f_string.format(mstr, s_res, n, n - s_res))
         else:
             print(f_string.format(mstr, s_res, "-", -s_res))
 
     for mv in moves:
-        mstr = move.int_to_string(bd, mv)
-        if len(mstr) == 5:
-            continue
-
+        mstr = move.int_to_string(mv)
         n, total = pd.get_result(bd, mv, depth, total)
         if n:
             print(f_string.format(mstr, "-", n, n))
@@ -1,21 +1,128 @@
+import argparse
 import sys
 import time
 
 
-from chess_engine import board, fen_parser as fp, perft_divide as pd
+from chess_engine import (
+    bitboard as bb,
+    board,
+    fen_parser as fp,
+    perft_divide as pd,
+    transposition as tt,
+)
 
 
 def main():
     """Runs perft and reports the result and time elapsed."""
-    if len(sys.argv) > 2:
-        bd = fp.fen_to_board(sys.argv[2])
+    parser = argparse.ArgumentParser(description="Runs perft on a position.")
+    parser.add_argument("depth", type=int)
+    parser.add_argument("fen", nargs="?")
+    parser.add_argument(
+        "--debug",
+        action="store_true",
+        help="check the incremental board hash and scores at every node",
+    )
+    parser.add_argument(
+        "--bitboard", action="store_true", help="use the bitboard representation"
+    )
+    parser.add_argument(
+        "--jobs", type=int, default=1, help="number of worker processes"
+    )
+    parser.add_argument(
+        "--divide", action="store_true", help="print the nodes below each move"
+    )
+    parser.add_argument(
+        "--hash",
+        type=int,
+        default=0,
+        metavar="MB",
+        help="cache subtree node counts in a table of MB megabytes",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        metavar="FILE",
+        help="record finished subtrees in FILE and resume from it on restart",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="print captures, checks, checkmates etc. at each depth",
+    )
+    args = parser.parse_args()
+
+    if args.debug and args.bitboard:
+        parser.error("--debug is not supported with --bitboard")
+
+    if args.debug and (args.jobs > 1 or args.divide):
+        parser.error("--debug is not supported with --jobs or --divide")
+
+    if args.hash and (args.debug or args.jobs > 1 or args.divide):
+        parser.error("--hash is not supported with --debug, --jobs or --divide")
+
+    if args.checkpoint and (args.debug or args.hash):
+        parser.error("--checkpoint is not supported with --debug or --hash")
+
+    if args.stats and (
+        args.bitboard
+        or args.debug
+        or args.jobs > 1
+        or args.divide
+        or args.hash
+        or args.checkpoint
+    ):
+        parser.error(
+            "--stats is not supported with --bitboard, --debug, --jobs, --divide, "
+            "--hash or --checkpoint"
+        )
+
+    if args.fen:
+        bd = fp.fen_to_board(args.fen)
     else:
         bd = board.Board()
 
+    if args.bitboard:
+        bd = bb.BitBoard(bd)
+
+    resumed = 0
+
+    if args.checkpoint:
+        try:
+            done = pd.read_checkpoint(args.checkpoint, bd.to_fen(), args.depth)
+        except ValueError as e:
+            parser.error(str(e))
+        resumed = sum(done.values())
+
+    if args.divide:
+        pd.divide(bd, args.depth, jobs=args.jobs, checkpoint=args.checkpoint)
+        return
+
     start = time.time()
-    n = pd.perft(bd, int(sys.argv[1]))
+
+    if args.stats:
+        pd.print_stats(bd, args.depth)
+        print(f"\nTime elapsed: {time.time() - start}")
+        return
+
+    table = tt.PerftTable(args.hash) if args.hash else None
+
+    if table:
+        n = pd.hashed_perft(bd, args.depth, table)
+    elif args.jobs > 1 or args.checkpoint:
+        n = pd.parallel_perft(bd, args.depth, args.jobs, args.checkpoint)
+    else:
+        n = pd.perft(bd, args.depth, debug=args.debug)
+
     elapsed = time.time() - start
-    print(f"Nodes: {n}\nTime elapsed: {elapsed}\nNPS: {n / elapsed}")
+    print(f"Nodes: {n}\nTime elapsed: {elapsed}\nNPS: {(n - resumed) / elapsed}")
+
+    if resumed:
+        print(f"Nodes resumed from checkpoint: {resumed}")
+
+    if table:
+        print(
+            f"Hash probes: {table.probes}\nHash hits: {table.hits}"
+            f"\nHit rate: {table.hit_rate():.1%}"
+        )
 
 
 if __name__ == "__main__":
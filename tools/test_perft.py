@@ -1,11 +1,12 @@
 """Module providing functions to test engine against standard perft results."""
 
+import argparse
 import datetime
 import sys
 import time
 
 
-from chess_engine import fen_parser as fp, perft_divide as pd
+from chess_engine import fen_parser as fp, perft_divide as pd, transposition as tt
 
 
 def parse_results_file(file_path):
@@ -30,25 +31,31 @@ def parse_results_file(file_path):
     return all_results
 
 
-def run_tests(all_results, depth_lim):
-    """Compares the engine's perft results to a provided set of results."""
+def run_tests(all_results, depth_lim, table=None):
+    """Compares the engine's perft results to a provided set of results.
+
+    If a PerftTable is given, it is shared by every position and depth.
+    """
     start = time.time()
 
-    print(f"{"":12}{"FEN":72}", end="", flush=True)
+    print(f"{'':12}{'FEN':72}", end="", flush=True)
     for i in range(1, depth_lim + 1):
         print(f"{i:8}", end="", flush=True)
-    print(f"{"Time Elapsed":>19}")
+    print(f"{'Time Elapsed':>19}")
 
     total = len(all_results)
     n = 1
 
     for fen, results in all_results.items():
         bd = fp.fen_to_board(fen)
-        print(f"{f"({n}/{total})":12}{fen:72}", end="", flush=True)
+        print(f"{f'({n}/{total})':12}{fen:72}", end="", flush=True)
 
         for i in range(1, depth_lim + 1):
             if i in results:
-                res = str(pd.perft(bd, i) - results[i])
+                if table:
+                    res = str(pd.hashed_perft(bd, i, table) - results[i])
+                else:
+                    res = str(pd.perft(bd, i) - results[i])
                 print(f"{res:>8}", end="", flush=True)
             else:
                 print(f"{'-':>8}", end="", flush=True)
@@ -60,17 +67,32 @@ def run_tests(all_results, depth_lim):
     end = time.time()
     print(f"\nTime elapsed: {datetime.timedelta(seconds=end - start)}")
 
+    if table:
+        print(
+            f"Hash probes: {table.probes}\nHash hits: {table.hits}"
+            f"\nHit rate: {table.hit_rate():.1%}"
+        )
+
 
 def main():
     """Runs the comparison function."""
-    try:
-        depth = int(sys.argv[1])
-        if depth < 0:
-            depth = 6
-    except ValueError:
-        depth = 6
-
-    run_tests(parse_results_file(sys.argv[2]), depth)
+    parser = argparse.ArgumentParser(
+        description="Compares perft results to those in an EPD file."
+    )
+    parser.add_argument("depth", type=int)
+    parser.add_argument("file_path")
+    parser.add_argument(
+        "--hash",
+        type=int,
+        default=0,
+        metavar="MB",
+        help="cache subtree node counts in a table of MB megabytes",
+    )
+    args = parser.parse_args()
+
+    depth = args.depth if args.depth >= 0 else 6
+    table = tt.PerftTable(args.hash) if args.hash else None
+    run_tests(parse_results_file(args.file_path), depth, table)
 
 
 if __name__ == "__main__":
@@ -1,15 +1,38 @@
 """Module implementing the UCI protocol."""
 
+import os
 import sys
+import threading
 
 
 from chess_engine import (
+    bitboard as bb,
     board,
     constants as cs,
     engine,
     fen_parser as fp,
+    limits as lm,
     move,
+    move_order as mo,
     perft_divide as pd,
+    transposition as tt,
+)
+
+HASH_MIN_MB, HASH_MAX_MB = 1, 1024
+THREADS_MAX = os.cpu_count() or 1
+DEPTH_MAX = mo.MAX_PLY - 1  # the deepest search the killer table allows
+CURRMOVE_DELAY = 1  # seconds before currmove updates are sent
+
+# the go parameters that take an integer value
+GO_PARAMS = (
+    "depth",
+    "nodes",
+    "movetime",
+    "wtime",
+    "btime",
+    "winc",
+    "binc",
+    "movestogo",
 )
 
 
@@ -39,38 +62,182 @@ def position(bd, args):
     return bd
 
 
-def search(bd, t_table, args):
-    """Performs a search according to the specified conditions."""
-    options = {}
+def new_table(options):
+    """Creates a transposition table matching the engine options."""
+    if options["threads"] > 1:
+        return tt.SharedTranspositionTable(options["hash"])
+    return tt.TranspositionTable(options["hash"])
+
+
+def close_table(t_table):
+    """Frees a transposition table if it lives in shared memory."""
+    if isinstance(t_table, tt.SharedTranspositionTable):
+        t_table.close()
+
+
+def search_limits(bd, args, stop):
+    """Builds the limits of a search from the arguments of a go command.
+
+    Unknown tokens, such as searchmoves and its moves, and parameters
+    without an integer value are skipped, so a go command always starts a
+    search.
+
+    Returns:
+        tuple: The limits of the search, and whether it is infinite (go
+            infinite or go ponder). The depth is capped at DEPTH_MAX. An
+            infinite search has no other depth or time limit, and its best
+            move is only sent once it is stopped.
+    """
+    params = {}
     i = 0
     while i < len(args):
-        try:
-            options[args[i]] = int(args[i + 1])
-            i += 2
-        except (IndexError, ValueError):
-            return t_table
+        token = args[i]
+        i += 1
+
+        if token in ("infinite", "ponder"):
+            params[token] = 1
+        elif token in GO_PARAMS:
+            try:
+                params[token] = int(args[i])
+                i += 1
+            except (IndexError, ValueError):
+                pass
+
+    infinite = "infinite" in params or "ponder" in params
+    limits = lm.SearchLimits(
+        depth=DEPTH_MAX if infinite else min(params.get("depth", 100), DEPTH_MAX),
+        nodes=params.get("nodes"),
+        stop=stop,
+    )
+    side = "b" if bd.black else "w"
+
+    if infinite:
+        pass
+    elif "movetime" in params:
+        limits.soft_time = limits.hard_time = params["movetime"] / 1000
+    elif side + "time" in params:
+        limits.soft_time, limits.hard_time = lm.allocate_time(
+            params[side + "time"] / 1000,
+            params.get(side + "inc", 0) / 1000,
+            params.get("movestogo"),
+        )
+
+    return limits, infinite
+
+
+def format_score(score):
+    """Converts a search score into a UCI score field."""
+    if score > engine.MATE_BOUND:
+        return f"mate {(engine.MATE - score + 1) // 2}"
+    if score < -engine.MATE_BOUND:
+        return f"mate {-((engine.MATE + score) // 2)}"
+    return f"cp {score}"
+
 
-    depth = options.get("depth", 100)
+class InfoReporter:
+    """Prints info lines while a search is running."""
 
-    search_time = 0
+    def iteration(self, bd, info, depth, score):
+        """Prints the result of a completed iteration."""
+        elapsed = info.limits.elapsed()
+        nodes = info.total_nodes()
+        pv = engine.principal_variation(bd, info.t_table, depth)
+        line = (
+            f"info depth {depth} seldepth {info.seldepth}"
+            f" score {format_score(score)} nodes {nodes}"
+            f" nps {int(nodes / max(elapsed, 0.001))}"
+            f" time {int(elapsed * 1000)} hashfull {info.t_table.hashfull()}"
+        )
 
-    if "movetime" in options:
-        search_time = options["movetime"]
-    elif "infinite" in options:
-        search_time = 10000000  # TODO: get rid of time cap here
-    else:
-        side = "b" if bd.black else "w"
-        search_time = options.get(side + "time", search_time) / 20
-        search_time += options.get(side + "inc", 0) / 2
+        if pv:
+            line += " pv " + " ".join(pv)
+        print(line, flush=True)
 
-    print(f"bestmove {engine.find_move(bd, search_time / 1000, depth, t_table)}")
-    return t_table
+    def current_move(self, bd, info, depth, mv, number):
+        """Prints the root move about to be searched, once the search is slow."""
+        if info.limits.elapsed() >= CURRMOVE_DELAY:
+            print(
+                f"info depth {depth} currmove {move.int_to_string(mv)}"
+                f" currmovenumber {number}",
+                flush=True,
+            )
+
+
+def report_best_move(bd, t_table, options, limits, infinite=False):
+    """Searches the position and prints the best move found.
+
+    The best move of an infinite search is held until the stop event is
+    set, even if the search ends first.
+    """
+    if options["bitboard"]:
+        bd = bb.BitBoard(bd)
+
+    best_move = engine.find_move(
+        bd,
+        t_table=t_table,
+        threads=options["threads"],
+        limits=limits,
+        reporter=InfoReporter(),
+    )
+
+    if infinite:
+        limits.stop.wait()
+    print(f"bestmove {best_move}", flush=True)
+
+
+def search(bd, t_table, options, args, stop):
+    """Starts a search in the background, returning the thread running it."""
+    limits, infinite = search_limits(bd, args, stop)
+    stop.clear()
+    thread = threading.Thread(
+        target=report_best_move, args=(bd, t_table, options, limits, infinite)
+    )
+    thread.start()
+    return thread
+
+
+def wait_for(thread):
+    """Waits for a running search to finish, if there is one."""
+    if thread is not None:
+        thread.join()
+
+
+def set_option(t_table, options, args):
+    """Applies a setoption command, returning the (possibly new) table."""
+    try:
+        name = " ".join(args[args.index("name") + 1 : args.index("value")])
+        value = args[args.index("value") + 1]
+    except (IndexError, ValueError):
+        return t_table
+
+    if name.lower() == "bitboard":  # a check option, the table is kept
+        options["bitboard"] = value.lower() == "true"
+        return t_table
+
+    try:
+        value = int(value)
+    except ValueError:
+        return t_table
+
+    match name.lower():
+        case "hash":
+            options["hash"] = min(max(value, HASH_MIN_MB), HASH_MAX_MB)
+        case "threads":
+            options["threads"] = min(max(value, 1), THREADS_MAX)
+        case _:
+            return t_table
+
+    close_table(t_table)
+    return new_table(options)
 
 
 def main():
     """Receives inputs from stdin and calls the required functions."""
     bd = board.Board()
-    t_table = {}
+    options = {"hash": tt.DEFAULT_SIZE_MB, "threads": 1, "bitboard": False}
+    t_table = new_table(options)
+    stop = threading.Event()
+    thread = None
 
     while True:
         line = input()
@@ -79,24 +246,44 @@ def main():
             info = line.split(" ")
             command = info[0]
 
+            if command in ("go", "position", "setoption", "ucinewgame"):
+                wait_for(thread)
+
             match command:
                 case "isready":
-                    print("readyok")
+                    print("readyok", flush=True)
                 case "go":
-                    if info[1] == "perft" and len(info) == 3:
+                    if info[1:2] == ["perft"] and len(info) == 3:
                         pd.divide(bd, int(info[2]))
                     else:
-                        t_table = search(bd, t_table, info[1:])
+                        thread = search(bd, t_table, options, info[1:], stop)
+                case "stop":
+                    stop.set()
+                    wait_for(thread)
                 case "position":
                     bd = position(bd, info[1:])
                 case "quit":
+                    stop.set()
+                    wait_for(thread)
+                    close_table(t_table)
                     sys.exit()
                 case "uci":
                     print(f"id name {cs.NAME}")
                     print(f"id author {cs.AUTHOR}")
+                    print(
+                        f"option name Hash type spin default {tt.DEFAULT_SIZE_MB}"
+                        f" min {HASH_MIN_MB} max {HASH_MAX_MB}"
+                    )
+                    print(
+                        "option name Threads type spin default 1"
+                        f" min 1 max {THREADS_MAX}"
+                    )
+                    print("option name Bitboard type check default false")
                     print("uciok")
+                case "setoption":
+                    t_table = set_option(t_table, options, info[1:])
                 case "ucinewgame":
-                    t_table = {}
+                    t_table.clear()
 
 
 if __name__ == "__main__":